@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+"""
+Load and latency benchmark for the public API.
+
+Optionally seeds a synthetic catalog (manage.py seed_catalog), starts a local server (or targets
+--base-url), then fires concurrent requests at the catalog, settings and
+contact/quote endpoints. Per endpoint it records throughput, latency
+percentiles, errors and SQL query counts (read from the Server-Timing header,
+so the server must run with SERVER_TIMING=True; the spawned server does).
+Results are written as JSON so runs on different commits can be compared.
+
+Seeding writes to the configured database: point DATABASE_URL at a scratch
+database first.
+
+Usage (from backend/):
+    python -m benchmarks.api_load --seed --plans 500 --floors 2 --images 6
+    python -m benchmarks.api_load --requests 500 --concurrency 16 --no-cache
+    python -m benchmarks.api_load --compare benchmarks/results/<earlier>.json
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cedric_admin.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from core.models import HousePlan  # noqa: E402
+
+RESULTS_DIR = BACKEND_DIR / 'benchmarks' / 'results'
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+def endpoints(plan_ids):
+    """(name, method, path factory, body factory) for every benchmarked endpoint"""
+    def contact_body(n):
+        return {'name': f'Load {n}', 'email': f'load{n}@example.com', 'phone': '0800000000',
+                'subject': 'Benchmark', 'message': 'Benchmark message'}
+
+    def quote_body(n):
+        return {'name': f'Load {n}', 'email': f'load{n}@example.com', 'phone': '0800000000',
+                'house_plan': plan_ids[n % len(plan_ids)], 'requirements': 'Benchmark quote'}
+
+    return [
+        ('plan_list', 'GET', lambda n: '/api/core/plans/', None),
+        ('plan_list_page', 'GET', lambda n: '/api/core/plans/?page_size=24', None),
+        ('plan_detail', 'GET', lambda n: f'/api/core/plans/{plan_ids[n % len(plan_ids)]}/', None),
+        ('settings', 'GET', lambda n: '/api/core/settings/', None),
+        ('contact_create', 'POST', lambda n: '/api/core/contacts/', contact_body),
+        ('quote_create', 'POST', lambda n: '/api/core/quotes/', quote_body),
+    ]
+
+
+def fetch(base_url, method, path, body):
+    """One request -> (status, seconds, query count or None)"""
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(base_url + path, data=data, method=method,
+                                     headers={'Content-Type': 'application/json', 'Accept': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            status, headers = response.status, response.headers
+    except urllib.error.HTTPError as exc:
+        exc.read()
+        status, headers = exc.code, exc.headers
+    except OSError:
+        return 0, time.perf_counter() - start, None
+    elapsed = time.perf_counter() - start
+    match = QUERIES_RE.search(headers.get('Server-Timing', ''))
+    return status, elapsed, int(match.group(1)) if match else None
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(q * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def run_endpoint(base_url, endpoint, requests, concurrency, warmup):
+    name, method, path_for, body_for = endpoint
+
+    def call(n):
+        return fetch(base_url, method, path_for(n), body_for(n) if body_for else None)
+
+    for n in range(warmup):
+        call(n)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(warmup, warmup + requests)))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(elapsed * 1000 for _, elapsed, _ in results)
+    queries = [count for _, _, count in results if count is not None]
+    errors = sum(1 for status, _, _ in results if not 200 <= status < 300)
+    return {
+        'method': method,
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': errors,
+        'throughput_rps': round(requests / wall, 1),
+        'latency_ms': {
+            'min': round(latencies[0], 2),
+            'mean': round(statistics.fmean(latencies), 2),
+            **{f'p{int(q * 100)}': round(percentile(latencies, q), 2) for q in (0.5, 0.9, 0.95, 0.99)},
+            'max': round(latencies[-1], 2),
+        },
+        'queries': {
+            'min': min(queries), 'mean': round(statistics.fmean(queries), 1), 'max': max(queries),
+        } if queries else None,
+    }
+
+
+def start_server(port, cache):
+    env = {**os.environ, 'SERVER_TIMING': 'True'}
+    # A single runserver process, so its locmem cache is safe to enable
+    env['CATALOG_CACHE_TIMEOUT'] = '600' if cache else '0'
+    server = subprocess.Popen(
+        [sys.executable, 'manage.py', 'runserver', f'127.0.0.1:{port}', '--noreload'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        if fetch(base_url, 'GET', '/api/core/settings/', None)[0] == 200:
+            return server, base_url
+        time.sleep(0.2)
+    server.terminate()
+    raise SystemExit('Server did not start; check ALLOWED_HOSTS includes 127.0.0.1')
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous):
+    print(f"\nvs {previous['meta'].get('commit')} ({previous['meta']['timestamp']})")
+    print(f"{'endpoint':<16} {'p50 ms':>16} {'p95 ms':>16} {'rps':>16} {'queries':>12}")
+    for name, result in current['endpoints'].items():
+        before = previous['endpoints'].get(name)
+        if not before:
+            continue
+
+        def delta(key, sub=None):
+            new = result[key][sub] if sub else result[key]
+            old = before[key][sub] if sub else before[key]
+            change = f'{(new - old) / old * 100:+.0f}%' if old else ''
+            return f'{new:>8} {change:>6}'
+        queries = f"{(before['queries'] or {}).get('mean')}->{(result['queries'] or {}).get('mean')}"
+        print(f"{name:<16} {delta('latency_ms', 'p50'):>16} {delta('latency_ms', 'p95'):>16} "
+              f"{delta('throughput_rps'):>16} {queries:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seed', action='store_true', help='Insert a synthetic catalog before the run')
+    parser.add_argument('--plans', type=int, default=500, help='Plans to seed')
+    parser.add_argument('--floors', type=int, default=2, help='Floors per seeded plan (features/amenities: 2x)')
+    parser.add_argument('--images', type=int, default=6, help='Gallery images per seeded plan')
+    parser.add_argument('--base-url', help='Benchmark a running server instead of starting runserver')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--no-cache', action='store_true', help='Disable the catalog response cache on the spawned server')
+    parser.add_argument('--requests', type=int, default=200, help='Timed requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=10, help='Untimed requests per endpoint')
+    parser.add_argument('--endpoints', help='Comma separated subset of endpoint names')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/<commit>-<time>.json)')
+    parser.add_argument('--compare', help='Earlier result file to print deltas against')
+    args = parser.parse_args()
+
+    if args.seed:
+        call_command('seed_catalog', plans=args.plans, floors=args.floors, features=args.floors * 2,
+                     amenities=args.floors * 2, images=args.images)
+    plan_ids = list(HousePlan.objects.order_by('pk').values_list('pk', flat=True)[:1000])
+    if not plan_ids:
+        raise SystemExit('No house plans in the database; run with --seed')
+    selected = set(args.endpoints.split(',')) if args.endpoints else None
+    targets = [endpoint for endpoint in endpoints(plan_ids) if selected is None or endpoint[0] in selected]
+
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server, base_url = start_server(args.port, cache=not args.no_cache)
+    try:
+        report = {
+            'meta': {
+                'commit': git_commit(),
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'plans': HousePlan.objects.count(),
+                'base_url': base_url,
+                'catalog_cache': not args.no_cache if server else None,
+            },
+            'endpoints': {},
+        }
+        print(f"{'endpoint':<16} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8} {'errors':>7}")
+        for endpoint in targets:
+            result = run_endpoint(base_url, endpoint, args.requests, args.concurrency, args.warmup)
+            report['endpoints'][endpoint[0]] = result
+            latency = result['latency_ms']
+            queries = result['queries']['mean'] if result['queries'] else '-'
+            print(f"{endpoint[0]:<16} {result['throughput_rps']:>8} {latency['p50']:>8} {latency['p95']:>8} "
+                  f"{latency['p99']:>8} {queries:>8} {result['errors']:>7}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"{report['meta']['commit'] or 'unknown'}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f'\nResults written to {output}')
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: per-plan serialization cost of HousePlanSerializer.
+
+Serializes in-memory plans (no database) with prefetched floors, features,
+amenities and gallery images, comparing the previous image URL methods
+(storage .url() + build_absolute_uri per image, config('BACKEND_URL') fallback)
+against the shared media URL resolver in core.media.
+
+Usage (from backend/):
+    python -m benchmarks.plan_serialization [--plans 500] [--images 6]
+"""
+import argparse
+import os
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cedric_admin.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from decouple import config  # noqa: E402
+from rest_framework import serializers  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from core.models import HousePlan, Floor, Feature, Amenity, HousePlanImage  # noqa: E402
+from core.serializers import HousePlanSerializer, HousePlanImageSerializer  # noqa: E402
+
+
+def legacy_image_url(self, obj):
+    """The image URL method both serializers used before core.media"""
+    if obj.image and obj.image.name:
+        try:
+            request = self.context.get('request')
+            if request:
+                return request.build_absolute_uri(obj.image.url)
+        except:  # noqa: E722
+            pass
+        image_url = f"/media/{obj.image.name}" if obj.image.name else None
+        if image_url:
+            backend_url = config('BACKEND_URL')
+            return f"{backend_url}{image_url}"
+    return None
+
+
+class LegacyHousePlanImageSerializer(HousePlanImageSerializer):
+    image = serializers.ImageField()
+    image_url = serializers.SerializerMethodField()
+    get_image_url = legacy_image_url
+
+
+class LegacyHousePlanSerializer(HousePlanSerializer):
+    image = serializers.ImageField()
+    plan_images = LegacyHousePlanImageSerializer(many=True, read_only=True)
+    image_url = serializers.SerializerMethodField()
+    get_image_url = legacy_image_url
+
+
+def build_plans(count, images):
+    plans = []
+    for i in range(count):
+        plan = HousePlan(
+            pk=i + 1, name=f'Plan {i}', description='A family home. ' * 20, price=Decimal('1250000.00'),
+            bedrooms=3, bathrooms=Decimal('2.5'), garage=2, square_feet=240, image=f'plans/plan_{i}.jpg',
+            cover_image=f'plans/plan_{i}.jpg',
+        )
+        plan._prefetched_objects_cache = {
+            'floors': [Floor(pk=i * 2 + n, house_plan=plan, level=level, floor_area=120, order=n)
+                       for n, level in enumerate(['ground', 'first'])],
+            'features': [Feature(pk=i * 5 + n, house_plan=plan, name=f'Feature {n}', order=n) for n in range(5)],
+            'amenities': [Amenity(pk=i * 5 + n, house_plan=plan, name=f'Amenity {n}', order=n) for n in range(5)],
+            'plan_images': [HousePlanImage(pk=i * images + n, house_plan=plan, image=f'plans/plan_{i}_{n}.jpg', order=n)
+                            for n in range(images)],
+        }
+        plans.append(plan)
+    return plans
+
+
+def timed(label, serializer_class, plans, request):
+    start = time.perf_counter()
+    serializer_class(plans, many=True, context={'request': request}).data
+    elapsed = time.perf_counter() - start
+    print(f'{label:<32} {elapsed * 1000:9.2f} ms  {elapsed / len(plans) * 1e6:8.1f} us/plan')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--plans', type=int, default=500)
+    parser.add_argument('--images', type=int, default=6, help='Gallery images per plan')
+    args = parser.parse_args()
+
+    plans = build_plans(args.plans, args.images)
+    request = Request(APIRequestFactory().get('/api/core/plans/'))
+    # Warm both code paths once before timing
+    timed('warm-up (legacy)', LegacyHousePlanSerializer, plans[:10], request)
+    timed('warm-up (media resolver)', HousePlanSerializer, plans[:10], request)
+    print(f'Serializing {args.plans} plans with {args.images} gallery images each')
+    before = timed('before: storage .url() per image', LegacyHousePlanSerializer, plans, request)
+    after = timed('after: shared media resolver', HousePlanSerializer, plans, request)
+    print(f'speed-up: {before / after:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
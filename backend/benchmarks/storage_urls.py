@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: public URL generation for N plan images.
+
+Compares the old pattern (a new S3Boto3Storage per access), a shared stock
+S3Boto3Storage and the shared PublicS3Storage used by core.storage.
+No network access is needed: all variants use a custom domain.
+
+Usage (from backend/):
+    python -m benchmarks.storage_urls [--images 10000]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cedric_admin.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from storages.backends.s3boto3 import S3Boto3Storage  # noqa: E402
+from core.s3 import PublicS3Storage  # noqa: E402
+
+STORAGE_KWARGS = {
+    'bucket_name': 'benchmark-bucket',
+    'custom_domain': 'benchmark-bucket.s3.eu-north-1.amazonaws.com',
+    'querystring_auth': False,
+    'access_key': 'benchmark',
+    'secret_key': 'benchmark',
+}
+
+
+def timed(label, names, url_for):
+    start = time.perf_counter()
+    for name in names:
+        url_for(name)
+    elapsed = time.perf_counter() - start
+    print(f'{label:<40} {elapsed * 1000:9.2f} ms  {elapsed / len(names) * 1e6:8.2f} us/url')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=10000)
+    args = parser.parse_args()
+
+    names = [f'plans/plan_{i // 4}_image {i % 4}.jpg' for i in range(args.images)]
+    shared_stock = S3Boto3Storage(**STORAGE_KWARGS)
+    shared_public = PublicS3Storage(**STORAGE_KWARGS)
+    assert shared_stock.url(names[1]) == shared_public.url(names[1])
+
+    print(f'Generating {args.images} public image URLs')
+    timed('new S3Boto3Storage per access', names, lambda name: S3Boto3Storage(**STORAGE_KWARGS).url(name))
+    timed('shared S3Boto3Storage', names, shared_stock.url)
+    timed('shared PublicS3Storage', names, shared_public.url)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,18 @@
 """
-Middleware to restrict admin panel access to staff and superuser accounts only
+Project middleware: admin access restrictions and request timing
 """
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.contrib.auth.models import AnonymousUser
+from core.metrics import (
+    RequestTimings, current_timings, request_db_queries, request_db_seconds,
+    request_duration_seconds, request_serialize_seconds, requests_total,
+)
 
 
 class AdminAccessMiddleware:
@@ -28,3 +37,56 @@ class AdminAccessMiddleware:
         
         response = self.get_response(request)
         return response
+
+
+class RequestTimingMiddleware:
+    """
+    Per-request instrumentation: wall time, SQL query count and time (via
+    connection execute wrappers) and DRF serializer time.
+
+    Every request feeds the per-route histograms in core.metrics (served at
+    /metrics); with SERVER_TIMING enabled the numbers are also returned as a
+    Server-Timing header for the browser's network panel.
+    Keep this first in MIDDLEWARE so the wall time covers the whole stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = settings.SERVER_TIMING
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings.execute_wrapper))
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        total = time.perf_counter() - timings.started
+        self.record(request, response, timings, total)
+        if self.server_timing:
+            response['Server-Timing'] = self.server_timing_header(timings, total)
+            response['Timing-Allow-Origin'] = '*'
+        return response
+
+    @staticmethod
+    def route(request):
+        match = getattr(request, 'resolver_match', None)
+        return match.view_name if match else 'unmatched'
+
+    def record(self, request, response, timings, total):
+        labels = {'route': self.route(request), 'method': request.method}
+        request_duration_seconds.observe(total, **labels)
+        request_db_seconds.observe(timings.db_time, **labels)
+        request_db_queries.observe(timings.db_queries, **labels)
+        request_serialize_seconds.observe(timings.phases.get('serialize', 0.0), **labels)
+        requests_total.inc(status=response.status_code, **labels)
+
+    @staticmethod
+    def server_timing_header(timings, total):
+        entries = [f'db;dur={timings.db_time * 1000:.1f};desc="{timings.db_queries} queries"']
+        entries.extend(f'{phase};dur={duration * 1000:.1f}' for phase, duration in timings.phases.items())
+        entries.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(entries)
@@ -3,7 +3,7 @@ Django settings for cedric_admin project.
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import config, Csv
 import os
 from dotenv import load_dotenv
 from urllib.parse import urlparse, parse_qsl
@@ -42,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'cedric_admin.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -91,6 +92,17 @@ if USE_S3:
     # Public access settings
     AWS_QUERYSTRING_AUTH = False  # Make URLs public (no signature needed)
     AWS_DEFAULT_ACL = None  # Use bucket default
+
+    # Connection pool and retry tuning for the shared storage client
+    from botocore.config import Config
+    AWS_S3_MAX_POOL_CONNECTIONS = int(os.getenv('AWS_S3_MAX_POOL_CONNECTIONS', '50'))
+    AWS_S3_CLIENT_CONFIG = Config(
+        max_pool_connections=AWS_S3_MAX_POOL_CONNECTIONS,
+        retries={'max_attempts': 3, 'mode': 'standard'},
+        connect_timeout=5,
+        read_timeout=60,
+        tcp_keepalive=True,
+    )
     
     # Construct S3 URL based on region
     if AWS_S3_REGION_NAME == 'us-east-1':
@@ -109,6 +121,9 @@ else:
     STATIC_URL = '/static/'
     STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Public backend URL, used to make local media URLs absolute (see core.media)
+BACKEND_URL = config('BACKEND_URL', default='')
+
 # Database - Neon PostgreSQL with connection pooling
 DATABASE_URL = config('DATABASE_URL', default=None)
 
@@ -135,6 +150,28 @@ else:
         }
     }
 
+# Cache - locmem by default; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. django.core.cache.backends.db.DatabaseCache after running
+# `python manage.py createcachetable`) when running several workers
+CACHE_BACKEND = config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': config('CACHE_LOCATION', default='cedric-cache'),
+    }
+}
+_shared_cache = CACHE_BACKEND not in (
+    'django.core.cache.backends.locmem.LocMemCache', 'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Seconds a public catalog response stays cached (0 disables the cache). Off by
+# default on a process-local cache: a catalog change only invalidates the
+# worker that made it, so the others would serve stale responses
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=600 if _shared_cache else 0, cast=int)
+
+# Seconds a worker reuses its in-process copy of the site settings
+SITE_SETTINGS_CACHE_TIMEOUT = config('SITE_SETTINGS_CACHE_TIMEOUT', default=30, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -191,9 +228,90 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    # Reverse proxies in front of Django; client IPs for throttling are read from
+    # X-Forwarded-For only when this is > 0 (0: REMOTE_ADDR, which clients cannot forge)
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
+    # Public contact/quote/purchase submissions (core.throttling); an empty value disables a limit
+    'DEFAULT_THROTTLE_RATES': {
+        'submissions_ip': config('SUBMISSION_IP_RATE', default='10/min') or None,
+        'submissions_global': config('SUBMISSION_GLOBAL_RATE', default='600/min') or None,
+    },
 }
 
+# Buffered intake (core.intake): contact and quote submissions are validated,
+# spooled to local disk and answered with 202, then bulk-inserted by a flusher
+# thread every INTAKE_FLUSH_INTERVAL seconds (0: only `manage.py flush_intake`)
+INTAKE_BUFFERED = config('INTAKE_BUFFERED', default=False, cast=bool)
+INTAKE_SPOOL_DIR = config('INTAKE_SPOOL_DIR', default=os.path.join(BASE_DIR, 'spool'))
+INTAKE_FLUSH_INTERVAL = config('INTAKE_FLUSH_INTERVAL', default=2.0, cast=float)
+INTAKE_FLUSH_BATCH_SIZE = config('INTAKE_FLUSH_BATCH_SIZE', default=500, cast=int)
+
+# House plan catalog pagination (opt-in via ?cursor= or ?page_size=)
+HOUSE_PLAN_PAGE_SIZE = config('HOUSE_PLAN_PAGE_SIZE', default=24, cast=int)
+HOUSE_PLAN_MAX_PAGE_SIZE = config('HOUSE_PLAN_MAX_PAGE_SIZE', default=100, cast=int)
+HOUSE_PLAN_SEARCH_PAGE_SIZE = config('HOUSE_PLAN_SEARCH_PAGE_SIZE', default=6, cast=int)
+
+# Maximum plans returned per homepage section (/api/core/home/)
+HOME_SECTION_LIMIT = config('HOME_SECTION_LIMIT', default=12, cast=int)
+
+# Unfiltered admin changelists show the table's row estimate instead of an
+# exact COUNT(*) once a PostgreSQL table is estimated above this many rows
+ADMIN_ESTIMATED_COUNT_THRESHOLD = config('ADMIN_ESTIMATED_COUNT_THRESHOLD', default=100000, cast=int)
+
+# Widths of the responsive WebP/JPEG copies generated for plan images
+IMAGE_DERIVATIVE_WIDTHS = config('IMAGE_DERIVATIVE_WIDTHS', default='320,640,1280', cast=Csv(int))
+
+# Background jobs (core.jobs), processed by `manage.py run_jobs`.
+# JOBS_EAGER runs them in-process after commit instead (no worker needed).
+JOBS_EAGER = config('JOBS_EAGER', default=False, cast=bool)
+JOB_MAX_ATTEMPTS = config('JOB_MAX_ATTEMPTS', default=5, cast=int)
+JOB_RETRY_DELAY = config('JOB_RETRY_DELAY', default=30, cast=int)  # seconds, doubled per attempt
+JOB_LOCK_TIMEOUT = config('JOB_LOCK_TIMEOUT', default=600, cast=int)  # seconds before a running job is reclaimed
+
+# Direct-to-bucket multipart uploads for plan images (core.uploads, S3 only).
+# The bucket CORS policy must allow PUT from the admin origin and expose ETag.
+DIRECT_UPLOAD_PART_SIZE = config('DIRECT_UPLOAD_PART_SIZE', default=8 * 1024 * 1024, cast=int)
+DIRECT_UPLOAD_MAX_SIZE = config('DIRECT_UPLOAD_MAX_SIZE', default=200 * 1024 * 1024, cast=int)
+DIRECT_UPLOAD_URL_EXPIRY = config('DIRECT_UPLOAD_URL_EXPIRY', default=3600, cast=int)
+DIRECT_UPLOAD_CONTENT_TYPES = config('DIRECT_UPLOAD_CONTENT_TYPES', default='image/jpeg,image/png,image/webp', cast=Csv())
+
 # Admin login restrictions
 ADMIN_RESTRICT_TO_STAFF = True
 # Logout redirect URL
-LOGOUT_REDIRECT_URL = config('LOGOUT_REDIRECT_URL')
\ No newline at end of file
+LOGOUT_REDIRECT_URL = config('LOGOUT_REDIRECT_URL')
+# Request instrumentation (cedric_admin.middleware.RequestTimingMiddleware).
+# SERVER_TIMING adds a Server-Timing header (DB/serializer/total ms) to every
+# response. /metrics serves Prometheus text to clients presenting
+# "Authorization: Bearer <METRICS_TOKEN>", and to METRICS_ALLOWED_IPS if listed;
+# with neither configured it is closed. Behind a local reverse proxy every
+# request comes from 127.0.0.1, so only allow loopback without a proxy.
+SERVER_TIMING = config('SERVER_TIMING', default=DEBUG, cast=bool)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='', cast=Csv())
+
+# Logging: app loggers ('core', 'core.events', ...) go through a queue
+# handler whose listener thread does the actual writing (see core.logs)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'core.logs.JSONFormatter'},
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'json',
+        },
+        'queue': {
+            '()': 'core.logs.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console'],
+        },
+    },
+    'loggers': {
+        'core': {
+            'handlers': ['queue'],
+            'level': config('CORE_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
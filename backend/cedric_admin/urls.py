@@ -7,6 +7,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
+from core.views import metrics
 
 @require_http_methods(["GET"])
 def api_root(request):
@@ -19,6 +20,7 @@ def api_root(request):
             "api": "/api/",
             "core": "/api/core/",
             "settings": "/api/core/settings/",
+            "home": "/api/core/home/",
             "house_plans": "/api/core/plans/",
             "contacts": "/api/core/contacts/",
             "quotes": "/api/core/quotes/"
@@ -30,6 +32,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('rest_framework.urls')),
     path('api/core/', include('core.urls')),
+    path('metrics', metrics, name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -2,10 +2,23 @@
 Admin configuration for core app.
 Register models here and configure admin interface.
 """
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.widgets import AutocompleteSelect
 from django.contrib.auth.models import User
+from django.core.exceptions import PermissionDenied
+from django.db import models
+from django.http import HttpResponseRedirect
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.translation import gettext as _
 from decouple import config
-from .models import HousePlan, BuiltHome, Contact, Quote, Purchase, SiteSettings, Floor, Feature, Amenity, HousePlanImage
+from .exports import csv_response
+from .forms import DirectUploadImageField, DirectUploadImageInput
+from .jobs import retry_failed
+from .pagination import EstimatedCountPaginator
+from .models import HousePlan, BuiltHome, Contact, Quote, Purchase, SiteSettings, Floor, Feature, Amenity, HousePlanImage, Job, PaymentTransition
 
 
 # Customize the admin site
@@ -48,6 +61,116 @@ class HousePlanImageInline(admin.TabularInline):
     extra = 1
     fields = ('image', 'title', 'order')
     ordering = ('order',)
+    # Large images go straight to the bucket; the form only posts the object key
+    formfield_overrides = {
+        models.ImageField: {'form_class': DirectUploadImageField, 'widget': DirectUploadImageInput},
+    }
+
+
+class PaymentTransitionInline(admin.TabularInline):
+    """Read-only payment status history (written by core.payments)"""
+    model = PaymentTransition
+    extra = 0
+    can_delete = False
+    fields = ('created_at', 'from_status', 'to_status', 'yoco_payment_id', 'yoco_reference', 'idempotency_key')
+    readonly_fields = fields
+    ordering = ('created_at',)
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    Foreign key filter that picks the value with the admin's autocomplete
+    widget instead of listing every related object, which RelatedFieldListFilter
+    loads (and renders) on each changelist view. The related model's admin
+    must define search_fields.
+    """
+    template = 'admin/core/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.admin_site = model_admin.admin_site
+        self.title = field.verbose_name
+
+    def has_output(self):
+        return True
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        value = self.used_parameters.get(self.lookup_kwarg)
+        if isinstance(value, list):
+            value = value[-1]
+        base_query = changelist.get_query_string(remove=[self.lookup_kwarg])
+        choice_field = forms.ModelChoiceField(
+            queryset=self.field.remote_field.model._default_manager.all(),
+            required=False,
+            widget=AutocompleteSelect(self.field, self.admin_site, attrs={
+                'data-filter-query': base_query, 'style': 'width: 100%',
+            }),
+        )
+        yield {
+            'selected': value is None,
+            'query_string': base_query,
+            'display': _('All'),
+            'widget': choice_field.widget.render(self.lookup_kwarg, value),
+        }
+
+
+class LargeChangelistMixin:
+    """
+    Changelist settings for tables that grow into the millions of rows:
+    estimated page counts, no second COUNT(*) for the unfiltered total, and
+    the scripts used by AutocompleteFilter.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @property
+    def media(self):
+        # The widget's scripts and styles do not depend on the field it is bound to
+        autocomplete = AutocompleteSelect(Quote._meta.get_field('house_plan'), self.admin_site)
+        return super().media + autocomplete.media + forms.Media(js=['core/admin/autocomplete_filter.js'])
+
+
+class CSVExportMixin:
+    """
+    Streaming CSV export of a changelist: an 'Export CSV' button that exports
+    every row matching the active filters and search, and an action for the
+    selected rows. Subclasses list their columns as (lookup, header) pairs
+    in export_columns.
+    """
+    change_list_template = 'admin/core/export_change_list.html'
+    export_columns = ()
+    actions = ['export_csv']
+
+    def get_urls(self):
+        opts = self.model._meta
+        return [
+            path('export/', self.admin_site.admin_view(self.export_view),
+                 name=f'{opts.app_label}_{opts.model_name}_export'),
+        ] + super().get_urls()
+
+    def export_filename(self):
+        return f'{self.model._meta.model_name}s-{timezone.localdate():%Y%m%d}.csv'
+
+    def export_view(self, request):
+        if not self.has_view_or_change_permission(request):
+            raise PermissionDenied
+        try:
+            changelist = self.get_changelist_instance(request)
+        except IncorrectLookupParameters:
+            opts = self.model._meta
+            return HttpResponseRedirect(reverse(f'admin:{opts.app_label}_{opts.model_name}_changelist') + '?e=1')
+        return csv_response(changelist.queryset, self.export_columns, self.export_filename(), request.user)
+
+    @admin.action(description='Export selected rows as CSV')
+    def export_csv(self, request, queryset):
+        return csv_response(queryset, self.export_columns, self.export_filename(), request.user)
 
 
 @admin.register(SiteSettings)
@@ -74,7 +197,7 @@ class SiteSettingsAdmin(admin.ModelAdmin):
 
     def has_add_permission(self, request):
         # Only allow one site settings instance
-        return not SiteSettings.objects.exists()
+        return SiteSettings.load() is None
 
 
 @admin.register(HousePlan)
@@ -83,7 +206,7 @@ class HousePlanAdmin(admin.ModelAdmin):
     list_display = ('name', 'price', 'bedrooms', 'bathrooms', 'garage', 'square_feet', 'is_popular', 'is_best_selling', 'is_new', 'created_at')
     list_filter = ('is_popular', 'is_best_selling', 'is_new', 'pet_friendly', 'bedrooms', 'created_at')
     search_fields = ('name', 'description')
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('floor_count', 'total_floor_area', 'created_at', 'updated_at')
     inlines = [HousePlanImageInline, FloorInline, FeatureInline, AmenityInline]
     
     fieldsets = (
@@ -94,7 +217,7 @@ class HousePlanAdmin(admin.ModelAdmin):
             'fields': ('display_on',)
         }),
         ('Specifications', {
-            'fields': ('bedrooms', 'bathrooms', 'garage', 'square_feet', 'width', 'depth')
+            'fields': ('bedrooms', 'bathrooms', 'garage', 'square_feet', 'width', 'depth', 'floor_count', 'total_floor_area')
         }),
         ('Media & Links', {
             'fields': ('image', 'video_url')
@@ -111,8 +234,12 @@ class HousePlanAdmin(admin.ModelAdmin):
 
 
 @admin.register(Contact)
-class ContactAdmin(admin.ModelAdmin):
+class ContactAdmin(LargeChangelistMixin, CSVExportMixin, admin.ModelAdmin):
     """Admin interface for Contact model"""
+    export_columns = (
+        ('id', 'ID'), ('created_at', 'Received'), ('name', 'Name'), ('email', 'Email'), ('phone', 'Phone'),
+        ('subject', 'Subject'), ('message', 'Message'), ('is_read', 'Read'),
+    )
     list_display = ('name', 'email', 'phone', 'subject', 'is_read', 'created_at')
     list_filter = ('is_read', 'created_at')
     search_fields = ('name', 'email', 'phone', 'subject', 'message')
@@ -135,10 +262,15 @@ class ContactAdmin(admin.ModelAdmin):
 
 
 @admin.register(Quote)
-class QuoteAdmin(admin.ModelAdmin):
+class QuoteAdmin(LargeChangelistMixin, CSVExportMixin, admin.ModelAdmin):
     """Admin interface for Quote model"""
+    export_columns = (
+        ('id', 'ID'), ('created_at', 'Requested'), ('name', 'Name'), ('email', 'Email'), ('phone', 'Phone'),
+        ('house_plan__name', 'House plan'), ('requirements', 'Requirements'), ('is_processed', 'Processed'),
+    )
     list_display = ('name', 'email', 'house_plan', 'is_processed', 'created_at')
-    list_filter = ('is_processed', 'house_plan', 'created_at')
+    list_select_related = ('house_plan',)
+    list_filter = ('is_processed', ('house_plan', AutocompleteFilter), 'created_at')
     search_fields = ('name', 'email', 'phone', 'requirements')
     readonly_fields = ('created_at',)
     fieldsets = (
@@ -159,12 +291,21 @@ class QuoteAdmin(admin.ModelAdmin):
 
 
 @admin.register(Purchase)
-class PurchaseAdmin(admin.ModelAdmin):
+class PurchaseAdmin(LargeChangelistMixin, CSVExportMixin, admin.ModelAdmin):
     """Admin interface for Purchase model"""
+    export_columns = (
+        ('id', 'ID'), ('created_at', 'Created'), ('name', 'Name'), ('email', 'Email'), ('phone', 'Phone'),
+        ('province', 'Province'), ('city', 'City'), ('pickup_point', 'Pickup point'), ('area_mall', 'Area/mall'),
+        ('house_plan__name', 'House plan'), ('plan_price', 'Plan price'), ('payment_status', 'Payment status'),
+        ('yoco_payment_id', 'Yoco payment ID'), ('yoco_reference', 'Yoco reference'), ('paid_at', 'Paid'),
+        ('updated_at', 'Updated'),
+    )
     list_display = ('name', 'house_plan', 'plan_price', 'payment_status', 'created_at', 'paid_at')
-    list_filter = ('payment_status', 'house_plan', 'created_at', 'paid_at')
+    list_select_related = ('house_plan',)
+    list_filter = ('payment_status', ('house_plan', AutocompleteFilter), 'created_at', 'paid_at')
     search_fields = ('name', 'email', 'phone', 'yoco_payment_id', 'yoco_reference')
     readonly_fields = ('created_at', 'updated_at', 'yoco_payment_id', 'yoco_reference', 'paid_at')
+    inlines = [PaymentTransitionInline]
     
     fieldsets = (
         ('Customer Information', {
@@ -180,4 +321,23 @@ class PurchaseAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
-    )
\ No newline at end of file
+    )
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Admin interface for background jobs (read-only; processed by `manage.py run_jobs`)"""
+    list_display = ('task', 'key', 'status', 'attempts', 'max_attempts', 'run_at', 'updated_at')
+    list_filter = ('status', 'task')
+    search_fields = ('task', 'key', 'last_error')
+    readonly_fields = ('task', 'key', 'payload', 'status', 'attempts', 'max_attempts', 'run_at',
+                       'locked_at', 'last_error', 'created_at', 'updated_at')
+    actions = ['retry_jobs']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Retry selected failed jobs')
+    def retry_jobs(self, request, queryset):
+        count = retry_failed(queryset)
+        self.message_user(request, f'Re-queued {count} failed jobs.')
@@ -10,5 +10,7 @@ class CoreConfig(AppConfig):
     verbose_name = 'Core Management'
     
     def ready(self):
-        """Import signals when app is ready"""
+        """Import signals, system checks and background job handlers when app is ready"""
+        import core.checks  # noqa
         import core.signals  # noqa
+        import core.tasks  # noqa
@@ -0,0 +1,45 @@
+"""
+Helpers for bulk writes that bypass Model.save() (and therefore signals).
+Callers are responsible for the denormalized plan fields and for bumping the
+catalog version afterwards.
+"""
+from contextlib import contextmanager
+
+from django.db import connection
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Let bulk_create keep the created_at/updated_at values set on each object
+    (auto_now/auto_now_add would overwrite them with the current time).
+    """
+    fields = [
+        (field, field.auto_now, field.auto_now_add)
+        for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def insert_rows(model, objects):
+    """
+    Insert objects without reading back their ids. On PostgreSQL (psycopg 3)
+    this streams them with COPY, which skips per-statement SQL compilation and
+    parameter binding; other backends use bulk_create.
+    """
+    if connection.vendor != 'postgresql':
+        model.objects.bulk_create(objects, batch_size=5000)
+        return
+    fields = [field for field in model._meta.concrete_fields if not field.primary_key]
+    quote = connection.ops.quote_name
+    statement = f"COPY {quote(model._meta.db_table)} ({', '.join(quote(field.column) for field in fields)}) FROM STDIN"
+    with connection.cursor() as cursor, cursor.cursor.copy(statement) as copy:
+        for obj in objects:
+            copy.write_row([field.get_db_prep_save(getattr(obj, field.attname), connection) for field in fields])
@@ -0,0 +1,69 @@
+"""
+Versioned response cache for the public catalog endpoints.
+
+Cached responses are keyed by a catalog version number stored in the default
+cache. Any change to the catalog models bumps the version (see core.signals),
+which makes every previously cached response unreachable at once; stale
+entries simply expire. The version must be visible to every worker, so use
+a shared Django cache backend (database, Redis, Memcached); settings leave
+the cache off by default on the per-process locmem backend.
+"""
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+CATALOG_VERSION_KEY = 'core:catalog-version'
+
+
+def get_catalog_version():
+    """Return the current catalog version, initialising it if missing"""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Start from a timestamp so an evicted counter never reuses old keys
+        cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog response"""
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        return get_catalog_version()
+
+
+def catalog_cache_key(request):
+    """Cache key for a GET request under the current catalog version"""
+    query = request.META.get('QUERY_STRING', '')
+    # Scheme and host both appear in the absolute media URLs of the payload
+    raw = f"{request.scheme}|{request.get_host()}|{request.path}|{query}"
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return f"core:catalog-response:{get_catalog_version()}:{digest}"
+
+
+def cache_catalog_response(view_func):
+    """
+    Cache successful GET responses of a DRF view under the catalog version.
+    Only the response data is cached, so content negotiation still applies.
+    """
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET' or not settings.CATALOG_CACHE_TIMEOUT:
+            return view_func(request, *args, **kwargs)
+
+        key = catalog_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            data, status_code = cached
+            return Response(data, status=status_code)
+
+        response = view_func(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, (response.data, response.status_code), settings.CATALOG_CACHE_TIMEOUT)
+        return response
+    return wrapper
@@ -0,0 +1,43 @@
+"""
+System checks for settings that need a cache shared by every worker process.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+from rest_framework.settings import api_settings
+
+# Backends whose contents are private to one process
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+THROTTLE_SCOPES = ('submissions_ip', 'submissions_global')
+
+
+def shared_cache(alias='default'):
+    """Whether the cache alias is visible to all worker processes"""
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+
+def throttle_cache_issues(level, id):
+    """Submission throttles count in the default cache; per-process counters multiply every limit"""
+    rates = api_settings.DEFAULT_THROTTLE_RATES
+    if settings.DEBUG or shared_cache() or not any(rates.get(scope) for scope in THROTTLE_SCOPES):
+        return []
+    return [level(
+        "Submission throttles are enabled but the default cache is process-local, "
+        "so each worker enforces its own limit.",
+        hint="Set CACHE_BACKEND to a shared backend (database, Redis or Memcached), "
+             "or disable the limits with empty SUBMISSION_IP_RATE/SUBMISSION_GLOBAL_RATE.",
+        id=id,
+    )]
+
+
+@register(Tags.caches)
+def check_throttle_cache(app_configs, **kwargs):
+    return throttle_cache_issues(Warning, 'core.W001')
+
+
+@register(Tags.caches, deploy=True)
+def check_throttle_cache_deploy(app_configs, **kwargs):
+    """`manage.py check --deploy` fails on the same configuration"""
+    return throttle_cache_issues(Error, 'core.E001')
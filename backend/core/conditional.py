@@ -0,0 +1,135 @@
+"""
+Conditional GET support (ETag / Last-Modified / 304) for the public catalog.
+
+Validators come from a cheap probe (row count and max(updated_at)) instead of
+the serialized payload, so a 304 is answered without serializing anything.
+Child rows (floors, features, amenities, gallery images) have no timestamp of
+their own; core.signals touches the parent plan's updated_at when they change,
+so the plan probe also reflects child-table edits.
+
+Probe results are also stored under the catalog version (see core.cache), so
+a warm catalog answers both 200 and 304 responses without a database query.
+"""
+import functools
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from .cache import get_catalog_version
+from .models import HousePlan, SiteSettings
+
+
+def _cached_probe(probe):
+    """
+    Run a probe once per request (ETag and Last-Modified share the result)
+    and cache it until the catalog version changes.
+    """
+    attr = f'_conditional_{probe.__name__}'
+
+    @functools.wraps(probe)
+    def wrapper(request, *args, **kwargs):
+        if not hasattr(request, attr):
+            key = f"core:conditional:{get_catalog_version()}:{probe.__name__}:{kwargs.get('pk', '')}"
+            state = cache.get(key)
+            if state is None:
+                state = probe(request, *args, **kwargs)
+                cache.set(key, state, settings.CATALOG_CACHE_TIMEOUT)
+            setattr(request, attr, state)
+        return getattr(request, attr)
+    return wrapper
+
+
+@_cached_probe
+def plan_list_state(request, *args, **kwargs):
+    """(count, last updated) over the whole plan table"""
+    state = HousePlan.objects.order_by().aggregate(count=Count('pk'), last_modified=Max('updated_at'))
+    return state['count'], state['last_modified']
+
+
+@_cached_probe
+def plan_detail_state(request, *args, **kwargs):
+    """(pk, last updated) of a single plan, or None when it does not exist"""
+    pk = kwargs.get('pk')
+    last_modified = HousePlan.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    if last_modified is None:
+        return None
+    return pk, last_modified
+
+
+@_cached_probe
+def site_settings_state(request, *args, **kwargs):
+    """(pk, last updated) of the site settings row, (0, None) when unset"""
+    site_settings = SiteSettings.load()
+    if site_settings is None:
+        return 0, None
+    return site_settings.pk, site_settings.updated_at
+
+
+def _etag(*parts):
+    return '"{}"'.format('-'.join(
+        str(int(part.timestamp() * 1_000_000)) if hasattr(part, 'timestamp') else str(part)
+        for part in parts
+    ))
+
+
+def plan_list_etag(request, *args, **kwargs):
+    return _etag('plans', *plan_list_state(request))
+
+
+def plan_list_last_modified(request, *args, **kwargs):
+    return plan_list_state(request)[1]
+
+
+def plan_detail_etag(request, *args, **kwargs):
+    state = plan_detail_state(request, *args, **kwargs)
+    return _etag('plan', *state) if state else None
+
+
+def plan_detail_last_modified(request, *args, **kwargs):
+    state = plan_detail_state(request, *args, **kwargs)
+    return state[1] if state else None
+
+
+def site_settings_etag(request, *args, **kwargs):
+    return _etag('settings', *site_settings_state(request))
+
+
+def site_settings_last_modified(request, *args, **kwargs):
+    return site_settings_state(request)[1]
+
+
+def home_etag(request, *args, **kwargs):
+    return _etag('home', *plan_list_state(request), *site_settings_state(request))
+
+
+def home_last_modified(request, *args, **kwargs):
+    timestamps = [ts for ts in (plan_list_state(request)[1], site_settings_state(request)[1]) if ts]
+    return max(timestamps) if timestamps else None
+
+
+def revalidated_condition(etag_func, last_modified_func):
+    """
+    condition() plus Cache-Control: no-cache on every response (304s
+    included). Without it browsers derive a heuristic freshness lifetime from
+    Last-Modified and reuse stale catalog data without asking the server.
+    """
+    conditional = condition(etag_func=etag_func, last_modified_func=last_modified_func)
+
+    def decorator(view_func):
+        view = conditional(view_func)
+
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            patch_cache_control(response, no_cache=True)
+            return response
+        return wrapper
+    return decorator
+
+
+plan_list_condition = revalidated_condition(plan_list_etag, plan_list_last_modified)
+plan_detail_condition = revalidated_condition(plan_detail_etag, plan_detail_last_modified)
+site_settings_condition = revalidated_condition(site_settings_etag, site_settings_last_modified)
+home_condition = revalidated_condition(home_etag, home_last_modified)
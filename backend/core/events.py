@@ -0,0 +1,15 @@
+"""
+Structured application events.
+
+emit('upload.saved', size=..., backend=...) logs one record on the
+'core.events' logger with the fields attached, so the formatter configured in
+settings.LOGGING (core.logs.JSONFormatter by default) renders them as keys.
+"""
+import logging
+
+logger = logging.getLogger('core.events')
+
+
+def emit(event, level=logging.INFO, **fields):
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={'fields': {'event': event, **fields}})
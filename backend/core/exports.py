@@ -0,0 +1,64 @@
+"""
+Streaming CSV exports for the admin.
+
+Rows are read with QuerySet.iterator(), which uses a server-side cursor on
+PostgreSQL, and written to the response one chunk at a time, so an export of
+any size needs constant worker memory and starts sending bytes immediately
+(no proxy timeout while the whole file is built).
+
+The output opens directly in Excel: UTF-8 with a byte order mark, local
+timestamps without offsets, and cells that Excel would evaluate as formulas
+escaped with a leading quote.
+"""
+import csv
+import datetime
+from decimal import Decimal
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .events import emit
+
+CHUNK_SIZE = 2000
+# Leading characters that make spreadsheet applications treat a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class Echo:
+    """File-like object whose write() returns the line instead of buffering it"""
+
+    def write(self, value):
+        return value
+
+
+def cell(value, tz):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'Yes' if value else 'No'
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(tz)
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, (int, float, Decimal)):
+        return value
+    value = str(value)
+    return "'" + value if value.startswith(FORMULA_PREFIXES) else value
+
+
+def csv_lines(queryset, columns):
+    """Header line, then one line per row; columns are (lookup, header) pairs"""
+    writer = csv.writer(Echo())
+    tz = timezone.get_current_timezone()
+    yield '﻿' + writer.writerow([header for _, header in columns])
+    rows = queryset.values_list(*[lookup for lookup, _ in columns]).iterator(chunk_size=CHUNK_SIZE)
+    for row in rows:
+        yield writer.writerow([cell(value, tz) for value in row])
+
+
+def csv_response(queryset, columns, filename, user=None):
+    """StreamingHttpResponse with the queryset as a CSV attachment"""
+    emit('admin.export', model=queryset.model._meta.label, user=getattr(user, 'username', None), filename=filename)
+    response = StreamingHttpResponse(csv_lines(queryset, columns), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,98 @@
+"""
+Filter sets and facet helpers for core app
+"""
+import django_filters
+from django.db.models import Count, Max, Min, Q
+from .models import HousePlan
+
+
+class HousePlanFilter(django_filters.FilterSet):
+    """Range and flag filters used by the plan search endpoint"""
+    bedrooms_min = django_filters.NumberFilter(field_name='bedrooms', lookup_expr='gte')
+    bedrooms_max = django_filters.NumberFilter(field_name='bedrooms', lookup_expr='lte')
+    bathrooms_min = django_filters.NumberFilter(field_name='bathrooms', lookup_expr='gte')
+    bathrooms_max = django_filters.NumberFilter(field_name='bathrooms', lookup_expr='lte')
+    garage_min = django_filters.NumberFilter(field_name='garage', lookup_expr='gte')
+    garage_max = django_filters.NumberFilter(field_name='garage', lookup_expr='lte')
+    price_min = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
+    price_max = django_filters.NumberFilter(field_name='price', lookup_expr='lte')
+    area_min = django_filters.NumberFilter(field_name='square_feet', lookup_expr='gte')
+    area_max = django_filters.NumberFilter(field_name='square_feet', lookup_expr='lte')
+    width_min = django_filters.NumberFilter(field_name='width', lookup_expr='gte')
+    width_max = django_filters.NumberFilter(field_name='width', lookup_expr='lte')
+    depth_min = django_filters.NumberFilter(field_name='depth', lookup_expr='gte')
+    depth_max = django_filters.NumberFilter(field_name='depth', lookup_expr='lte')
+    levels_min = django_filters.NumberFilter(field_name='floor_count', lookup_expr='gte')
+    levels_max = django_filters.NumberFilter(field_name='floor_count', lookup_expr='lte')
+    sort = django_filters.OrderingFilter(fields=(
+        ('created_at', 'created_at'),
+        ('price', 'price'),
+        ('is_popular', 'is_popular'),
+        ('total_floor_area', 'floor_area'),
+    ))
+
+    class Meta:
+        model = HousePlan
+        fields = ['display_on', 'is_new', 'is_popular', 'is_best_selling', 'pet_friendly']
+
+
+FACET_FLAGS = ('is_new', 'is_popular', 'is_best_selling', 'pet_friendly')
+FACET_RANGES = {'price': 'price', 'area': 'square_feet', 'width': 'width', 'depth': 'depth'}
+FACET_VALUES = ('bedrooms', 'bathrooms', 'garage', 'floor_count')
+# Filter parameters narrowing each facet's own field
+FACET_FILTERS = {
+    **{flag: (flag,) for flag in FACET_FLAGS},
+    **{name: (f'{name}_min', f'{name}_max') for name in FACET_RANGES},
+    'bedrooms': ('bedrooms_min', 'bedrooms_max'),
+    'bathrooms': ('bathrooms_min', 'bathrooms_max'),
+    'garage': ('garage_min', 'garage_max'),
+    'floor_count': ('levels_min', 'levels_max'),
+}
+
+
+def plan_facets(filterset):
+    """
+    Compute facet counts for a validated HousePlanFilter. Each facet is
+    counted over the results of every other filter but not its own, so a
+    facet keeps offering the alternatives to its current selection.
+    Facets whose filter is unused share the filtered queryset: flag counts
+    and range bounds come from one aggregate query per distinct queryset,
+    plus one GROUP BY query per discrete facet, regardless of catalog size.
+    """
+    querysets = {}
+
+    def facet_key(facet):
+        """The facet's own active filters; querysets[key] holds results without them"""
+        own = tuple(name for name in FACET_FILTERS[facet] if filterset.data.get(name) not in (None, ''))
+        if own not in querysets:
+            queryset = filterset.qs
+            if own:
+                data = filterset.data.copy()
+                for name in own:
+                    data.pop(name)
+                queryset = type(filterset)(data, queryset=filterset.queryset, request=filterset.request).qs
+            querysets[own] = queryset.order_by()
+        return own
+
+    aggregates = {}
+    for flag in FACET_FLAGS:
+        aggregates.setdefault(facet_key(flag), {})[f'{flag}_count'] = Count('pk', filter=Q(**{flag: True}))
+    for name, field in FACET_RANGES.items():
+        group = aggregates.setdefault(facet_key(name), {})
+        group[f'{name}_min'] = Min(field)
+        group[f'{name}_max'] = Max(field)
+    totals = {}
+    for key, group in aggregates.items():
+        totals.update(querysets[key].aggregate(**group))
+
+    facets = {
+        'flags': {flag: totals[f'{flag}_count'] for flag in FACET_FLAGS},
+        'ranges': {
+            name: {'min': totals[f'{name}_min'], 'max': totals[f'{name}_max']}
+            for name in FACET_RANGES
+        },
+    }
+    for field in FACET_VALUES:
+        rows = querysets[facet_key(field)].values(field).annotate(count=Count('pk')).order_by(field)
+        facets[field] = [{'value': row[field], 'count': row['count']} for row in rows]
+    return facets
@@ -0,0 +1,64 @@
+"""
+Admin form widgets and fields
+"""
+from django import forms
+from django.urls import reverse
+from django.utils.html import format_html
+from .uploads import DirectUploadError, verify_upload
+
+
+class DirectUploadImageInput(forms.ClearableFileInput):
+    """
+    File input that uploads the chosen image straight to the media bucket
+    (core/admin/direct_upload.js) and submits only the resulting object key.
+    If the direct upload is unavailable (local storage, bucket CORS) the file
+    is left in place and posted through Django as before.
+    """
+
+    class Media:
+        js = ('core/admin/direct_upload.js',)
+
+    @staticmethod
+    def key_name(name):
+        return f'{name}_key'
+
+    def render(self, name, value, attrs=None, renderer=None):
+        html = super().render(name, value, attrs, renderer)
+        return html + format_html(
+            '<input type="hidden" name="{}" data-direct-upload-endpoint="{}">'
+            '<span class="help direct-upload-status"></span>',
+            self.key_name(name),
+            reverse('direct-upload-list'),
+        )
+
+    def value_from_datadict(self, data, files, name):
+        key = data.get(self.key_name(name))
+        if key:
+            return key
+        return super().value_from_datadict(data, files, name)
+
+    def value_omitted_from_data(self, data, files, name):
+        return (
+            self.key_name(name) not in data
+            and super().value_omitted_from_data(data, files, name)
+        )
+
+
+class DirectUploadImageField(forms.ImageField):
+    """ImageField that also accepts the key of a verified direct upload"""
+    widget = DirectUploadImageInput
+
+    def to_python(self, data):
+        if isinstance(data, str):
+            try:
+                verify_upload(data)
+            except DirectUploadError as exc:
+                raise forms.ValidationError(str(exc), code='invalid')
+            return data
+        return super().to_python(data)
+
+    def run_validators(self, value):
+        # The image extension validators expect a file; a direct upload's
+        # content type was already checked against the bucket object
+        if not isinstance(value, str):
+            super().run_validators(value)
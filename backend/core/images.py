@@ -0,0 +1,122 @@
+"""
+Responsive image derivatives for plan images.
+
+Every uploaded plan image gets width-bucketed WebP and JPEG copies stored
+next to the original (plans/<name>_w640.webp, ...). The generated files are
+recorded on the row's image_variants JSON field together with the source name,
+so regeneration is skipped until the image itself changes. Widths at or above
+the original collapse into one copy at the original width (no upscaling), named
+and described by that width. Superseded derivatives are deleted when the
+variants are rewritten, and by a queued job when the row itself is deleted.
+"""
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def derivative_name(name, width, fmt):
+    """plans/house.png -> plans/house_w640.webp"""
+    stem, _ = os.path.splitext(name)
+    return f"{stem}_w{width}.{'jpg' if fmt == 'jpeg' else fmt}"
+
+
+def variants_are_current(field_file, variants):
+    return bool(variants) and variants.get('source') == field_file.name
+
+
+def derivative_names(variants):
+    """Storage names of the files recorded in an image_variants structure"""
+    return [variant['name'] for variant in (variants or {}).get('files', ())]
+
+
+def delete_derivatives(storage, names, keep=()):
+    """Delete derivative files, except names still referenced in keep"""
+    for name in set(names) - set(keep):
+        storage.delete(name)
+
+
+def target_widths(widths, original_width):
+    """Configured widths below the original, plus the original width when any bucket reaches it"""
+    targets = [width for width in widths if width < original_width]
+    if len(targets) < len(widths):
+        targets.append(original_width)
+    return targets
+
+
+def generate_derivatives(field_file, widths=None):
+    """
+    Create the derivative files for an image field and return the
+    image_variants structure: {'source': name, 'width': w, 'height': h,
+    'files': [{'width': 320, 'format': 'webp', 'name': ...}, ...]}.
+    Returns None when the original cannot be read as an image.
+    """
+    widths = sorted(widths or settings.IMAGE_DERIVATIVE_WIDTHS)
+    storage = field_file.storage
+    try:
+        with storage.open(field_file.name, 'rb') as source:
+            original = Image.open(source)
+            original.load()
+    except (OSError, ValueError, UnidentifiedImageError) as exc:
+        logger.warning("Could not read image %s for derivatives: %s", field_file.name, exc)
+        return None
+
+    original = ImageOps.exif_transpose(original)
+    if original.mode not in ('RGB', 'L'):
+        original = original.convert('RGB')
+
+    files = []
+    for width in target_widths(widths, original.width):
+        height = round(original.height * width / original.width)
+        resized = original.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt, (pil_format, options) in FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, pil_format, **options)
+            name = storage.save(derivative_name(field_file.name, width, fmt), ContentFile(buffer.getvalue()))
+            files.append({'width': width, 'format': fmt, 'name': name})
+    return {
+        'source': field_file.name,
+        'width': original.width,
+        'height': original.height,
+        'files': files,
+    }
+
+
+class UnreadableImageError(Exception):
+    """The stored original could not be opened as an image"""
+
+
+def refresh_image_variants(instance, field_name='image'):
+    """
+    Generate derivatives for instance.<field_name> when they are missing or
+    stale, and store them with a queryset update (no save() signals). The
+    previous derivatives are deleted once the new ones are recorded.
+    Returns True when image_variants changed.
+    """
+    field_file = getattr(instance, field_name)
+    variants = previous = instance.image_variants
+    if not field_file or not field_file.name:
+        if not variants:
+            return False
+        variants = {}
+    elif variants_are_current(field_file, variants):
+        return False
+    else:
+        variants = generate_derivatives(field_file)
+        if variants is None:
+            raise UnreadableImageError(field_file.name)
+    type(instance).objects.filter(pk=instance.pk).update(image_variants=variants)
+    instance.image_variants = variants
+    storage = instance._meta.get_field(field_name).storage
+    delete_derivatives(storage, derivative_names(previous), keep=derivative_names(variants))
+    return True
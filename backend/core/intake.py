@@ -0,0 +1,229 @@
+"""
+Buffered intake for public form submissions (INTAKE_BUFFERED=True).
+
+Validated contact messages and quote requests are appended to a local spool
+file and fsync'ed before the client gets 202 Accepted. A flusher thread in
+each worker process moves them into the database with batched inserts every
+INTAKE_FLUSH_INTERVAL seconds, so a traffic spike costs one transaction per
+batch instead of one connection and INSERT per request. Purchases are never
+buffered: the payment flow needs the row id immediately.
+
+Every record carries an intake_id (a unique column), so a batch replayed
+after a crash between the database commit and the spool cleanup inserts
+nothing twice.
+
+Spool layout (INTAKE_SPOOL_DIR):
+    <pid>.ndjson            appended to by worker <pid>
+    <pid>-<uuid>.batch      rotated out, waiting to be flushed
+    <pid>-<uuid>.<owner>.work   claimed by the flusher running as <owner>
+Files left by a process that is gone are picked up by any flusher, including
+`manage.py flush_intake`.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import nullcontext
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+from django.utils import timezone
+
+from .events import emit
+from .metrics import intake_flushed_total, intake_submissions_total
+from .models import Contact, Quote
+
+logger = logging.getLogger(__name__)
+
+INTAKE_MODELS = {model._meta.label_lower: model for model in (Contact, Quote)}
+
+_spool_lock = threading.Lock()  # serializes appends to, and rotation of, this process's spool
+_flush_lock = threading.Lock()
+_start_lock = threading.Lock()
+_flusher = None  # (pid, thread)
+
+
+def spool_dir():
+    path = Path(settings.INTAKE_SPOOL_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def submission_data(serializer):
+    """Validated data of a ModelSerializer as JSON-ready {attname: value}"""
+    model = serializer.Meta.model
+    data = {}
+    for name, value in serializer.validated_data.items():
+        field = model._meta.get_field(name)
+        if field.is_relation:
+            data[field.attname] = value.pk if value is not None else None
+        else:
+            data[name] = value
+    return data
+
+
+def spool_submission(serializer):
+    """Durably record a validated submission for the flusher; returns its intake id"""
+    model = serializer.Meta.model
+    record = {
+        'id': uuid.uuid4().hex,
+        'model': model._meta.label_lower,
+        'received_at': timezone.now().isoformat(),
+        'data': submission_data(serializer),
+    }
+    line = (json.dumps(record, cls=DjangoJSONEncoder) + '\n').encode()
+    path = spool_dir() / f'{os.getpid()}.ndjson'
+    with _spool_lock:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, line)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    intake_submissions_total.inc(model=record['model'], mode='spooled')
+    ensure_flusher()
+    return record['id']
+
+
+def pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def claim_files():
+    """
+    Rotate this process's spool (and those of dead processes) into batches,
+    then claim every unowned batch by renaming it. Returns the claimed paths.
+    """
+    directory = spool_dir()
+    me = os.getpid()
+    for path in directory.glob('*.ndjson'):
+        if not path.stem.isdigit():
+            continue
+        pid = int(path.stem)
+        if pid != me and pid_alive(pid):
+            continue
+        with _spool_lock if pid == me else nullcontext():
+            try:
+                os.rename(path, directory / f'{pid}-{uuid.uuid4().hex}.batch')
+            except FileNotFoundError:  # another flusher got there first
+                pass
+
+    claimed = []
+    for path in sorted(directory.glob('*.batch')) + sorted(directory.glob('*.work')):
+        base = path.stem
+        if path.suffix == '.work':
+            base, owner = path.stem.rsplit('.', 1)
+            # Our own leftovers are from a failed flush; the flush lock rules out one in progress
+            if int(owner) != me and pid_alive(int(owner)):
+                continue
+        target = directory / f'{base}.{me}.work'
+        try:
+            os.rename(path, target)
+        except FileNotFoundError:
+            continue
+        claimed.append(target)
+    return claimed
+
+
+def read_spool(path):
+    records = []
+    with open(path, 'rb') as stream:
+        for number, line in enumerate(stream, 1):
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A torn final line from a crash mid-append; it was never acknowledged
+                logger.warning("Skipping unreadable line %s of %s", number, path)
+    return records
+
+
+def write_submissions(records):
+    """
+    Insert spooled records in one transaction, skipping intake ids that are
+    already stored. Returns the number of records per model label.
+    """
+    by_model = defaultdict(list)
+    for record in records:
+        model = INTAKE_MODELS.get(record.get('model'))
+        if model is None:
+            logger.warning("Skipping spooled record %s for unknown model %s", record.get('id'), record.get('model'))
+            continue
+        by_model[model].append(model(
+            **record['data'], intake_id=record['id'], created_at=parse_datetime(record['received_at']),
+        ))
+    with transaction.atomic():
+        for model, objects in by_model.items():
+            drop_dangling_references(model, objects)
+            model.objects.bulk_create(objects, batch_size=settings.INTAKE_FLUSH_BATCH_SIZE, ignore_conflicts=True)
+    return {model._meta.label_lower: len(objects) for model, objects in by_model.items()}
+
+
+def drop_dangling_references(model, objects):
+    """Clear nullable foreign keys to rows deleted since the submission was accepted (SET_NULL semantics)"""
+    for field in model._meta.concrete_fields:
+        if not (field.is_relation and field.null):
+            continue
+        ids = {getattr(obj, field.attname) for obj in objects} - {None}
+        existing = set(field.related_model._base_manager.filter(pk__in=ids).values_list('pk', flat=True))
+        for obj in objects:
+            if getattr(obj, field.attname) not in existing:
+                setattr(obj, field.attname, None)
+
+
+def flush():
+    """Write every claimable spool batch to the database; returns the number of records written"""
+    written = 0
+    with _flush_lock:
+        for path in claim_files():
+            records = read_spool(path)
+            try:
+                counts = write_submissions(records)
+            except Exception:
+                # The claimed file stays in place and is retried on the next flush
+                logger.exception("Could not flush intake spool %s", path.name)
+                break
+            path.unlink()
+            for label, count in counts.items():
+                intake_flushed_total.inc(count, model=label)
+            written += sum(counts.values())
+            emit('intake.flushed', file=path.name, records=len(records))
+    return written
+
+
+def run_flusher(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            flush()
+        except Exception:
+            logger.exception("Intake flush failed")
+        finally:
+            connection.close()
+
+
+def ensure_flusher():
+    """Start this process's flusher thread (once per process; restarted after a fork)"""
+    global _flusher
+    interval = settings.INTAKE_FLUSH_INTERVAL
+    if interval <= 0:
+        return
+    with _start_lock:
+        if _flusher is not None and _flusher[0] == os.getpid() and _flusher[1].is_alive():
+            return
+        thread = threading.Thread(target=run_flusher, args=(interval,), name='intake-flusher', daemon=True)
+        thread.start()
+        _flusher = (os.getpid(), thread)
@@ -0,0 +1,135 @@
+"""
+Lightweight database-backed job queue.
+
+Side effects that are too slow for the request path (image derivatives,
+post-upload checks) are recorded as Job rows and executed by
+`manage.py run_jobs`. Jobs are retried with exponential backoff and end up
+in the 'failed' state, visible in the admin, once max_attempts is exhausted.
+
+Set JOBS_EAGER=True to run jobs in-process right after the transaction
+commits instead (development without a worker).
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def task(name):
+    """Register a function as a job handler under the given name"""
+    def register(func):
+        TASKS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, key='', max_attempts=None, **payload):
+    """
+    Queue a job. When key is given and an identical job is still pending, no
+    new row is created and the pending job is returned instead.
+    """
+    if name not in TASKS:
+        raise ValueError(f"Unknown job task: {name}")
+    if key:
+        pending = Job.objects.filter(task=name, key=key, status='pending').first()
+        if pending is not None:
+            return pending
+    job = Job.objects.create(
+        task=name,
+        key=key,
+        payload=payload,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+    if settings.JOBS_EAGER:
+        transaction.on_commit(lambda: run_job_by_id(job.pk))
+    return job
+
+
+def claim_jobs(limit=10):
+    """
+    Lock up to `limit` due jobs for this worker and mark them running.
+    Running jobs whose lock is older than JOB_LOCK_TIMEOUT (a worker died
+    mid-job) are claimed again.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(Q(status='pending', run_at__lte=now) | Q(status='running', locked_at__lt=stale))
+            .order_by('run_at', 'pk')[:limit]
+        )
+        if jobs:
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status='running', locked_at=now, attempts=F('attempts') + 1, updated_at=now,
+            )
+            for job in jobs:
+                job.status, job.locked_at, job.attempts = 'running', now, job.attempts + 1
+    return jobs
+
+
+def retry_delay(attempts):
+    """Exponential backoff: JOB_RETRY_DELAY, 2x, 4x, ... seconds"""
+    return timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def run_job(job):
+    """Execute a claimed job and record the outcome. Returns True on success."""
+    handler = TASKS.get(job.task)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for task {job.task!r}")
+        handler(**job.payload)
+    except Exception:
+        now = timezone.now()
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts or handler is None:
+            job.status = 'failed'
+            logger.error("Job %s failed permanently after %s attempts", job, job.attempts)
+        else:
+            job.status = 'pending'
+            job.run_at = now + retry_delay(job.attempts)
+            logger.warning("Job %s failed (attempt %s), retrying at %s", job, job.attempts, job.run_at)
+        job.locked_at = None
+        job.save(update_fields=['status', 'run_at', 'locked_at', 'last_error', 'updated_at'])
+        return False
+    job.status = 'done'
+    job.locked_at = None
+    job.last_error = ''
+    job.save(update_fields=['status', 'locked_at', 'last_error', 'updated_at'])
+    return True
+
+
+def run_job_by_id(pk):
+    """Claim and run a single job (JOBS_EAGER mode)"""
+    now = timezone.now()
+    if Job.objects.filter(pk=pk, status='pending').update(
+        status='running', locked_at=now, attempts=F('attempts') + 1, updated_at=now,
+    ):
+        run_job(Job.objects.get(pk=pk))
+
+
+def run_pending(limit=10):
+    """Claim and run one batch of due jobs. Returns the number of jobs run."""
+    jobs = claim_jobs(limit)
+    for job in jobs:
+        run_job(job)
+    return len(jobs)
+
+
+def retry_failed(queryset=None):
+    """Re-queue failed jobs with a fresh attempt budget"""
+    queryset = Job.objects.all() if queryset is None else queryset
+    return queryset.filter(status='failed').update(
+        status='pending', attempts=0, run_at=timezone.now(), locked_at=None, updated_at=timezone.now(),
+    )
@@ -0,0 +1,83 @@
+"""
+Logging building blocks referenced from settings.LOGGING.
+
+QueueListenerHandler puts records on an in-memory queue and hands them to the
+real handlers (console, file, ...) on a background thread, so code that logs
+from a request or save path never blocks on stdout or I/O.
+"""
+import atexit
+import copy
+import json
+import logging
+from logging.config import ConvertingList
+from logging.handlers import QueueHandler, QueueListener
+from queue import Queue
+
+_default_formatter = logging.Formatter()
+
+
+def resolve_handlers(handlers):
+    """dictConfig passes 'cfg://handlers.x' references lazily; indexing resolves them"""
+    if isinstance(handlers, ConvertingList):
+        return [handlers[i] for i in range(len(handlers))]
+    return list(handlers)
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    QueueHandler that owns its QueueListener. Configure with
+    {'()': 'core.logs.QueueListenerHandler', 'handlers': ['cfg://handlers.console']}.
+    """
+
+    def __init__(self, handlers, respect_handler_level=True, maxsize=10000):
+        super().__init__(Queue(maxsize))
+        self.listener = QueueListener(self.queue, *resolve_handlers(handlers), respect_handler_level=respect_handler_level)
+        self.listener.start()
+        atexit.register(self.close)
+
+    def prepare(self, record):
+        """
+        Like QueueHandler.prepare() (args merged into the message, traceback
+        objects dropped before crossing threads), but the traceback is kept as
+        exc_text instead of being folded into the message, so the listener's
+        formatter can still render it separately.
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = (self.formatter or _default_formatter).formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        # Drop rather than block the caller when the consumer falls behind
+        try:
+            self.queue.put_nowait(record)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line; structured fields come from extra={'fields': {...}}"""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update(getattr(record, 'fields', None) or {})
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:  # formatted by QueueListenerHandler.prepare()
+            data['exc_info'] = record.exc_text
+        return json.dumps(data, default=str)
@@ -0,0 +1,28 @@
+"""
+Recompute the denormalized floor totals, cover image and search document on
+every house plan
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.cache import bump_catalog_version
+from core.models import HousePlan
+
+
+class Command(BaseCommand):
+    help = 'Backfill HousePlan floor_count, floor/lounge/dining totals, cover_image and search_document'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Plans updated per transaction')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pks = list(HousePlan.objects.order_by('pk').values_list('pk', flat=True))
+        updated = 0
+        for start in range(0, len(pks), batch_size):
+            batch = pks[start:start + batch_size]
+            with transaction.atomic():
+                plans = HousePlan.objects.filter(pk__in=batch)
+                updated += plans.refresh_aggregates()
+                plans.refresh_search_documents()
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f'Updated aggregates on {updated} house plans'))
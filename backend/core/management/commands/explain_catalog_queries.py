@@ -0,0 +1,126 @@
+"""
+EXPLAIN the hot catalog and purchase queries on a seeded dataset, with and
+without the core indexes, to show what each index buys.
+
+Everything runs inside one transaction that is rolled back, so the command
+is safe to point at a development database. On PostgreSQL it uses
+EXPLAIN ANALYZE (DDL is transactional there); on SQLite it prints
+EXPLAIN QUERY PLAN.
+"""
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from core.models import HousePlan, Floor, Feature, Amenity, HousePlanImage, Purchase
+
+INDEXED_MODELS = (HousePlan, Floor, Feature, Amenity, HousePlanImage, Purchase)
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN hot queries before/after the core indexes on a seeded, rolled-back dataset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plans', type=int, default=50000, help='House plans to seed')
+        parser.add_argument('--purchases', type=int, default=50000, help='Purchases to seed')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the dataset')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['plans'], options['purchases'], random.Random(options['seed']))
+            self.analyze()
+            with_indexes = self.explain_all()
+            self.drop_indexes()
+            self.analyze()
+            without_indexes = self.explain_all()
+            transaction.set_rollback(True)
+
+        for label, (plan_after, seconds_after) in with_indexes.items():
+            plan_before, seconds_before = without_indexes[label]
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {label}'))
+            self.stdout.write(f'without indexes: {seconds_before * 1000:.2f} ms\n{plan_before}')
+            self.stdout.write(f'with indexes:    {seconds_after * 1000:.2f} ms\n{plan_after}')
+
+    def queries(self):
+        plan_ids = list(HousePlan.objects.filter(display_on='house-plans').values_list('pk', flat=True)[:24])
+        return {
+            'catalog page (display_on, -created_at)':
+                HousePlan.objects.filter(display_on='house-plans').order_by('-created_at')[:24],
+            'popular plans': HousePlan.objects.filter(is_popular=True).order_by('-created_at')[:12],
+            'best-selling plans': HousePlan.objects.filter(is_best_selling=True).order_by('-created_at')[:12],
+            'bedrooms filter ordered by price': HousePlan.objects.filter(bedrooms=3).order_by('price')[:24],
+            'floors prefetch': Floor.objects.filter(house_plan_id__in=plan_ids).order_by(*Floor._meta.ordering),
+            'gallery prefetch': HousePlanImage.objects.filter(house_plan_id__in=plan_ids).order_by(*HousePlanImage._meta.ordering),
+            'purchases by status': Purchase.objects.filter(payment_status='pending').order_by('-created_at')[:50],
+            'purchase by yoco id': Purchase.objects.filter(yoco_payment_id='yoco-000123'),
+        }
+
+    def explain_all(self):
+        options = {'analyze': True} if connection.vendor == 'postgresql' else {}
+        results = {}
+        for label, queryset in self.queries().items():
+            start = time.perf_counter()
+            list(queryset)
+            elapsed = time.perf_counter() - start
+            results[label] = (queryset.explain(**options), elapsed)
+        return results
+
+    def drop_indexes(self):
+        with connection.cursor() as cursor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def seed(self, plan_count, purchase_count, rng):
+        self.stdout.write(f'Seeding {plan_count} plans and {purchase_count} purchases...')
+        now = timezone.now()
+        plans = [
+            HousePlan(
+                name=f'Plan {i}',
+                price=Decimal(rng.randrange(150000, 3000000)),
+                bedrooms=rng.randint(1, 6),
+                bathrooms=Decimal(rng.randint(2, 8)) / 2,
+                garage=rng.randint(0, 3),
+                square_feet=rng.randint(60, 600),
+                display_on=rng.choice(['house-plans', 'built-homes']),
+                is_popular=rng.random() < 0.02,
+                is_best_selling=rng.random() < 0.02,
+            )
+            for i in range(plan_count)
+        ]
+        HousePlan.objects.bulk_create(plans, batch_size=2000)
+        # bulk_create applies auto_now_add; restore the spread of creation dates
+        for i, plan in enumerate(plans):
+            plan.created_at = now - timedelta(minutes=i)
+        HousePlan.objects.bulk_update(plans, ['created_at'], batch_size=1000)
+        plan_ids = [plan.pk for plan in plans]
+
+        levels = [choice for choice, _ in Floor.LEVEL_CHOICES]
+        Floor.objects.bulk_create(
+            [Floor(house_plan_id=pk, level=levels[n], floor_area=120, order=n) for pk in plan_ids for n in range(2)],
+            batch_size=2000,
+        )
+        HousePlanImage.objects.bulk_create(
+            [HousePlanImage(house_plan_id=pk, image=f'plans/seed-{pk}-{n}.jpg', order=n) for pk in plan_ids for n in range(2)],
+            batch_size=2000,
+        )
+        Purchase.objects.bulk_create(
+            [
+                Purchase(
+                    name=f'Customer {i}', email=f'customer{i}@example.com', phone='0000000000',
+                    house_plan_id=rng.choice(plan_ids) if plan_ids else None,
+                    plan_price=Decimal('1000.00'),
+                    payment_status=rng.choice(['pending', 'processing', 'completed', 'completed', 'failed']),
+                    yoco_payment_id=f'yoco-{i:06d}',
+                )
+                for i in range(purchase_count)
+            ],
+            batch_size=2000,
+        )
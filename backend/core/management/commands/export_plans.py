@@ -0,0 +1,27 @@
+"""
+Stream the house plan catalog (plans, floors, features, amenities and image
+references) to newline-delimited JSON or CSV
+"""
+from django.core.management.base import BaseCommand
+
+from core.transfer import FORMATS, export_records, write_records
+
+
+class Command(BaseCommand):
+    help = 'Export every house plan with its floors, features, amenities and images as NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', default='-', help='File to write (default: stdout)')
+        parser.add_argument('--format', choices=FORMATS, help='Output format (default: from the file extension, else ndjson)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Plans fetched (with their children) per query')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        fmt = options['format'] or ('csv' if output.endswith('.csv') else 'ndjson')
+        records = export_records(options['batch_size'])
+        if output == '-':
+            write_records(records, self.stdout, fmt)
+            return
+        with open(output, 'w', encoding='utf-8', newline='') as stream:
+            count = write_records(records, stream, fmt)
+        self.stderr.write(f'Exported {count} house plans to {output}')
@@ -0,0 +1,27 @@
+"""
+Write spooled public submissions (buffered intake mode) to the database,
+including spool files left behind by worker processes that have exited
+"""
+import time
+from django.core.management.base import BaseCommand
+from core.intake import flush
+
+
+class Command(BaseCommand):
+    help = 'Flush the buffered intake spool into the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep flushing until interrupted')
+        parser.add_argument('--sleep', type=float, default=5.0, help='Seconds between flushes with --loop')
+
+    def handle(self, *args, **options):
+        written = 0
+        try:
+            while True:
+                written += flush()
+                if not options['loop']:
+                    break
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'Flushed {written} submissions'))
@@ -0,0 +1,33 @@
+"""
+Generate the responsive WebP/JPEG derivatives for existing plan images
+"""
+from django.core.management.base import BaseCommand
+from core.cache import bump_catalog_version
+from core.images import delete_derivatives, derivative_names, generate_derivatives, variants_are_current
+from core.models import HousePlan, HousePlanImage
+
+
+class Command(BaseCommand):
+    help = 'Generate responsive image derivatives for HousePlan and HousePlanImage images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Regenerate derivatives that are already current')
+
+    def handle(self, *args, **options):
+        generated = failed = 0
+        for model in (HousePlan, HousePlanImage):
+            rows = model.objects.exclude(image='').exclude(image__isnull=True).only('pk', 'image', 'image_variants')
+            for row in rows.iterator():
+                if not options['force'] and variants_are_current(row.image, row.image_variants):
+                    continue
+                variants = generate_derivatives(row.image)
+                if variants is None:
+                    failed += 1
+                    continue
+                model.objects.filter(pk=row.pk).update(image_variants=variants)
+                delete_derivatives(row.image.storage, derivative_names(row.image_variants),
+                                   keep=derivative_names(variants))
+                generated += 1
+        if generated:
+            bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f'Generated derivatives for {generated} images ({failed} unreadable)'))
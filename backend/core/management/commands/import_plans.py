@@ -0,0 +1,37 @@
+"""
+Create or update house plans and their floors, features, amenities and image
+references from an export_plans file
+"""
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.transfer import FORMATS, CatalogImportError, import_records, read_records
+
+
+class Command(BaseCommand):
+    help = 'Import house plans from NDJSON or CSV, matching existing plans by name'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to read ('-' for stdin)")
+        parser.add_argument('--format', choices=FORMATS, help='Input format (default: from the file extension, else ndjson)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Plans written per transaction')
+        parser.add_argument('--prune', action='store_true',
+                            help='Delete floors, features, amenities and images of imported plans that are not in the file')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.endswith('.csv') else 'ndjson')
+        stream = sys.stdin if path == '-' else open(path, encoding='utf-8', newline='')
+        try:
+            stats = import_records(read_records(stream, fmt), batch_size=options['batch_size'], prune=options['prune'])
+        except CatalogImportError as exc:
+            raise CommandError(f'{exc} (earlier batches were committed)') from exc
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        self.stdout.write(self.style.SUCCESS(
+            f"Plans: {stats['created']} created, {stats['updated']} updated, {stats['unchanged']} unchanged. "
+            f"Children: {stats['children_created']} created, {stats['children_updated']} updated, "
+            f"{stats['children_deleted']} deleted"
+        ))
@@ -0,0 +1,48 @@
+"""
+Background job worker: runs queued jobs (image derivatives, upload checks)
+"""
+import time
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from core.jobs import retry_failed, run_pending
+from core.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Process queued background jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the jobs that are due now, then exit')
+        parser.add_argument('--batch-size', type=int, default=10, help='Jobs claimed per poll')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--status', action='store_true', help='Print job counts per task and status, then exit')
+        parser.add_argument('--retry-failed', action='store_true', help='Re-queue failed jobs, then exit')
+
+    def handle(self, *args, **options):
+        if options['status']:
+            return self.print_status()
+        if options['retry_failed']:
+            count = retry_failed()
+            self.stdout.write(self.style.SUCCESS(f'Re-queued {count} failed jobs'))
+            return
+
+        processed = 0
+        try:
+            while True:
+                ran = run_pending(options['batch_size'])
+                processed += ran
+                if ran:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} jobs'))
+
+    def print_status(self):
+        rows = Job.objects.values('task', 'status').annotate(count=Count('id')).order_by('task', 'status')
+        if not rows:
+            self.stdout.write('No jobs')
+        for row in rows:
+            self.stdout.write(f"{row['task']:<30} {row['status']:<10} {row['count']}")
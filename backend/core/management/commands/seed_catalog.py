@@ -0,0 +1,209 @@
+"""
+Seed a large, deterministic synthetic catalog for benchmarking and for
+reproducing production-scale issues.
+
+Rows are built in memory with their denormalized fields (floor totals, cover
+image, search document) already filled in and written in batched
+transactions: plans with bulk_create (their ids are needed for the children),
+everything else with COPY on PostgreSQL or bulk_create elsewhere. No signals,
+per-object save() calls or follow-up UPDATEs are involved, and the same --seed
+always produces the same data.
+
+With local file storage, a handful of placeholder JPEGs (and their responsive
+derivatives) are written under plans/seed/ and shared by every seeded image.
+"""
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from core.bulk import explicit_timestamps, insert_rows
+from core.cache import bump_catalog_version
+from core.images import FORMATS, derivative_name, generate_derivatives
+from core.models import (
+    HousePlan, Floor, Feature, Amenity, HousePlanImage, Contact, Quote, Purchase, build_search_document,
+)
+
+PLACEHOLDER_COUNT = 6
+PLACEHOLDER_SIZE = (1600, 1067)
+FEATURE_NAMES = ['Open-plan kitchen', 'Walk-in closet', 'Covered patio', 'Built-in braai', 'Scullery',
+                 'Study nook', 'Double-volume entrance', 'Solar geyser', 'Fireplace', 'Skylights']
+AMENITY_NAMES = ['Swimming pool', 'Garden', 'Staff quarters', 'Borehole', 'Electric fence',
+                 'Guest suite', 'Home gym', 'Wine cellar', 'Play area', 'Carport']
+STYLES = ['Modern', 'Farmhouse', 'Tuscan', 'Contemporary', 'Cape Dutch', 'Bali', 'Minimalist', 'Coastal']
+
+
+class Command(BaseCommand):
+    help = 'Bulk-insert a deterministic synthetic catalog with customer histories'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plans', type=int, default=1000, help='House plans to create')
+        parser.add_argument('--floors', type=int, default=2, help='Floors per plan')
+        parser.add_argument('--features', type=int, default=4, help='Features per plan')
+        parser.add_argument('--amenities', type=int, default=4, help='Amenities per plan')
+        parser.add_argument('--images', type=int, default=4, help='Gallery images per plan')
+        parser.add_argument('--contacts', type=int, default=10000, help='Contact messages to create')
+        parser.add_argument('--quotes', type=int, default=10000, help='Quote requests to create')
+        parser.add_argument('--purchases', type=int, default=10000, help='Purchases to create')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Parent rows per transaction')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument('--no-files', action='store_true', help='Do not write placeholder image files')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.batch_size = options['batch_size']
+        start = time.perf_counter()
+
+        placeholders = self.placeholders(options['no_files'])
+        with explicit_timestamps(HousePlan, Contact, Quote, Purchase):
+            plan_ids = self.seed_plans(options, placeholders)
+            if not plan_ids:
+                plan_ids = list(HousePlan.objects.values_list('pk', flat=True)[:1000])
+            created = {
+                'contacts': self.seed_rows(Contact, options['contacts'], self.contact),
+                'quotes': self.seed_rows(Quote, options['quotes'], lambda i: self.quote(i, plan_ids)),
+                'purchases': self.seed_rows(Purchase, options['purchases'], lambda i: self.purchase(i, plan_ids)),
+            }
+        bump_catalog_version()
+
+        summary = ', '.join(f'{count} {name}' for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(plan_ids) if options["plans"] else 0} plans, {summary} '
+            f'in {time.perf_counter() - start:.1f}s'
+        ))
+
+    def placeholders(self, no_files):
+        """[(name, image_variants)] shared by all seeded images"""
+        field = HousePlanImage._meta.get_field('image')
+        storage = field.storage
+        names = [f'plans/seed/placeholder_{n}.jpg' for n in range(PLACEHOLDER_COUNT)]
+        if no_files or not hasattr(storage, 'path'):
+            if not no_files:
+                self.stdout.write('Media storage is not local; seeding image names without files.')
+            return [(name, {}) for name in names]
+
+        placeholders = []
+        for n, name in enumerate(names):
+            # Rewritten on every run so names stay stable (no _abc123 suffixes)
+            for stale in [name] + [derivative_name(name, width, fmt)
+                                   for width in [*settings.IMAGE_DERIVATIVE_WIDTHS, PLACEHOLDER_SIZE[0]]
+                                   for fmt in FORMATS]:
+                storage.delete(stale)
+            image = Image.new('RGB', PLACEHOLDER_SIZE, (90 + 25 * n, 120 + 15 * n, 150))
+            ImageDraw.Draw(image).text((40, 40), f'Placeholder {n + 1}', fill='white')
+            buffer = BytesIO()
+            image.save(buffer, 'JPEG', quality=80)
+            name = storage.save(name, ContentFile(buffer.getvalue()))
+            variants = generate_derivatives(field.attr_class(None, field, name)) or {}
+            placeholders.append((name, variants))
+        return placeholders
+
+    def seed_plans(self, options, placeholders):
+        rng = self.rng
+        levels = [choice for choice, _ in Floor.LEVEL_CHOICES]
+        plan_ids = []
+        for offset in range(0, options['plans'], self.batch_size):
+            plans, children = [], []
+            for i in range(offset, min(offset + self.batch_size, options['plans'])):
+                name = f'{rng.choice(STYLES)} Home {i + 1:06d}'
+                description = f'{name}: a {rng.randint(2, 6)}-bedroom family home. ' * 5
+                image, variants = placeholders[i % len(placeholders)]
+                floors = [
+                    Floor(level=levels[n % len(levels)], floor_area=rng.randint(60, 250), bedrooms=rng.randint(0, 3),
+                          bathrooms=Decimal(rng.randint(0, 4)) / 2, lounges=rng.randint(0, 2),
+                          dining_areas=rng.randint(0, 1), order=n)
+                    for n in range(options['floors'])
+                ]
+                features = [Feature(name=rng.choice(FEATURE_NAMES), description='Included as standard', order=n)
+                            for n in range(options['features'])]
+                amenities = [Amenity(name=rng.choice(AMENITY_NAMES), order=n) for n in range(options['amenities'])]
+                gallery = [
+                    HousePlanImage(image=placeholders[(i + n) % len(placeholders)][0],
+                                   image_variants=placeholders[(i + n) % len(placeholders)][1], order=n)
+                    for n in range(options['images'])
+                ]
+                created_at = self.now - timedelta(minutes=17 * i)
+                plans.append(HousePlan(
+                    name=name,
+                    description=description,
+                    price=Decimal(rng.randrange(250_000, 6_000_000, 1000)),
+                    bedrooms=sum(floor.bedrooms for floor in floors) or 1,
+                    bathrooms=Decimal(rng.randint(2, 8)) / 2,
+                    garage=rng.randint(0, 3),
+                    square_feet=sum(floor.floor_area for floor in floors) or rng.randint(60, 600),
+                    width=Decimal(rng.randint(800, 3000)) / 100,
+                    depth=Decimal(rng.randint(800, 3000)) / 100,
+                    image=image,
+                    image_variants=variants,
+                    display_on=rng.choice(['house-plans', 'house-plans', 'house-plans', 'built-homes']),
+                    is_popular=rng.random() < 0.05,
+                    is_best_selling=rng.random() < 0.05,
+                    is_new=rng.random() < 0.1,
+                    pet_friendly=rng.random() < 0.3,
+                    floor_count=len(floors),
+                    total_floor_area=sum(floor.floor_area for floor in floors),
+                    total_lounges=sum(floor.lounges for floor in floors),
+                    total_dining_areas=sum(floor.dining_areas for floor in floors),
+                    cover_image=image,
+                    search_document=build_search_document(name, description, features + amenities),
+                    created_at=created_at,
+                    updated_at=created_at,
+                ))
+                children.append((floors, features, amenities, gallery))
+
+            with transaction.atomic():
+                HousePlan.objects.bulk_create(plans)
+                rows = {Floor: [], Feature: [], Amenity: [], HousePlanImage: []}
+                for plan, groups in zip(plans, children):
+                    for model, group in zip(rows, groups):
+                        for child in group:
+                            child.house_plan_id = plan.pk
+                        rows[model].extend(group)
+                for model, objects in rows.items():
+                    insert_rows(model, objects)
+            plan_ids.extend(plan.pk for plan in plans)
+            self.stdout.write(f'  plans: {len(plan_ids)}/{options["plans"]}')
+        return plan_ids
+
+    def seed_rows(self, model, count, build):
+        for offset in range(0, count, self.batch_size):
+            with transaction.atomic():
+                insert_rows(model, [build(i) for i in range(offset, min(offset + self.batch_size, count))])
+        return count
+
+    def customer(self, i):
+        return {'name': f'Customer {i + 1:07d}', 'email': f'customer{i + 1}@example.com',
+                'phone': f'08{self.rng.randrange(10 ** 8):08d}'}
+
+    def contact(self, i):
+        return Contact(**self.customer(i), subject=self.rng.choice(['General Inquiry', 'Plan changes', 'Pricing']),
+                       message='Seeded enquiry about a house plan. ' * 3, is_read=self.rng.random() < 0.7,
+                       created_at=self.now - timedelta(minutes=5 * i))
+
+    def quote(self, i, plan_ids):
+        return Quote(**self.customer(i), house_plan_id=self.rng.choice(plan_ids) if plan_ids else None,
+                     requirements='Seeded quote requirements. ' * 3, is_processed=self.rng.random() < 0.6,
+                     created_at=self.now - timedelta(minutes=5 * i))
+
+    def purchase(self, i, plan_ids):
+        status = self.rng.choice(['pending', 'processing', 'completed', 'completed', 'completed', 'failed', 'cancelled'])
+        created_at = self.now - timedelta(minutes=5 * i)
+        return Purchase(
+            **self.customer(i), province='Gauteng', city='Johannesburg',
+            house_plan_id=self.rng.choice(plan_ids) if plan_ids else None,
+            plan_price=Decimal(self.rng.randrange(1500, 15000)),
+            payment_status=status,
+            yoco_payment_id=f'seed-{i + 1:08d}' if status != 'pending' else None,
+            created_at=created_at,
+            updated_at=created_at,
+            paid_at=created_at + timedelta(minutes=3) if status == 'completed' else None,
+        )
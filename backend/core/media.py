@@ -0,0 +1,82 @@
+"""
+Media URL resolution for serializers.
+
+The public base URL for uploaded media is worked out once per process from
+USE_S3 / MEDIA_URL / BACKEND_URL, after which turning a stored file name into
+an absolute URL is a single string concatenation - no storage backend, boto3
+or configuration lookups inside the serialization loop.
+"""
+import functools
+
+from django.conf import settings
+from django.utils.encoding import filepath_to_uri
+from rest_framework import serializers
+
+
+@functools.lru_cache(maxsize=None)
+def media_base_url():
+    """
+    Base URL that stored media names are appended to.
+    S3: MEDIA_URL already points at the bucket's custom domain.
+    Local storage: BACKEND_URL + MEDIA_URL, or the bare MEDIA_URL (made
+    absolute per request) when BACKEND_URL is not configured.
+    """
+    media_url = settings.MEDIA_URL
+    if settings.USE_S3 or media_url.startswith(('http://', 'https://')):
+        return media_url
+    backend_url = settings.BACKEND_URL.rstrip('/')
+    return f"{backend_url}{media_url}" if backend_url else media_url
+
+
+def media_url(name, request=None):
+    """Absolute URL for a stored media name, or None when there is no file"""
+    if not name:
+        return None
+    base = media_base_url()
+    url = base + filepath_to_uri(name)
+    if base.startswith('/') and request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+class MediaURLField(serializers.Field):
+    """Read-only field rendering a FileField (or a stored file name) as an absolute URL"""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return media_url(getattr(value, 'name', value), self.context.get('request'))
+
+
+class MediaImageField(serializers.ImageField):
+    """Writable ImageField whose output uses the shared media URL resolver"""
+
+    def to_representation(self, value):
+        return media_url(getattr(value, 'name', None), self.context.get('request'))
+
+
+class MediaSrcsetField(serializers.Field):
+    """
+    Read-only field rendering an image_variants structure (see core.images)
+    as srcset strings keyed by format, ready for <source type="image/webp">
+    and <img> tags: {"webp": "https://.../a_w320.webp 320w, ...", "jpeg": ...}.
+    None when no derivatives have been generated.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        files = (value or {}).get('files')
+        if not files:
+            return None
+        request = self.context.get('request')
+        srcset = {}
+        for variant in files:
+            srcset.setdefault(variant['format'], []).append(
+                f"{media_url(variant['name'], request)} {variant['width']}w"
+            )
+        return {fmt: ', '.join(candidates) for fmt, candidates in srcset.items()}
@@ -0,0 +1,257 @@
+"""
+In-process metrics.
+
+Counters and histograms are kept per label set in process memory and are
+cheap enough to update from request and save paths (one lock, no I/O).
+render_prometheus() exposes them in the Prometheus text format; each worker
+process keeps its own numbers, so scrape every worker (or run one).
+
+RequestTimings collects per-request phase durations (DB, serialization) for
+cedric_admin.middleware.RequestTimingMiddleware.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+REGISTRY = {}
+
+
+def register(metric):
+    REGISTRY[metric.name] = metric
+    return metric
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def label_key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.label_key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._series.get(self.label_key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return dict(self._series)
+
+
+class Histogram(Metric):
+    """Fixed-bucket histogram: per label set, bucket counts plus sum and count"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self.label_key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0, 'count': 0}
+            # Last slot counts observations above the largest bucket (+Inf)
+            series['buckets'][bisect_left(self.buckets, value)] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def samples(self):
+        with self._lock:
+            return {key: {**series, 'buckets': list(series['buckets'])} for key, series in self._series.items()}
+
+    def quantile(self, q, series):
+        """
+        Estimate the q-quantile of one series by linear interpolation within
+        its bucket, as Prometheus' histogram_quantile() does.
+        """
+        count = series['count']
+        if not count:
+            return None
+        rank = q * count
+        cumulative = 0
+        for index, bucket_count in enumerate(series['buckets']):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+
+upload_size_bytes = register(Histogram(
+    'core_upload_size_bytes',
+    'Size of files uploaded to media storage',
+    buckets=[2 ** exponent for exponent in range(14, 30, 2)],  # 16 KiB .. 256 MiB
+    labelnames=('backend', 'model'),
+))
+upload_duration_seconds = register(Histogram(
+    'core_upload_duration_seconds',
+    'Time spent saving a model with a new file, storage write included',
+    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],
+    labelnames=('backend', 'model'),
+))
+
+request_duration_seconds = register(Histogram(
+    'core_request_duration_seconds',
+    'Wall time per request, by route',
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+    labelnames=('route', 'method'),
+))
+request_db_seconds = register(Histogram(
+    'core_request_db_seconds',
+    'Time spent executing SQL per request, by route',
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5],
+    labelnames=('route', 'method'),
+))
+request_db_queries = register(Histogram(
+    'core_request_db_queries',
+    'SQL queries executed per request, by route',
+    buckets=[0, 1, 2, 3, 5, 10, 20, 50, 100],
+    labelnames=('route', 'method'),
+))
+request_serialize_seconds = register(Histogram(
+    'core_request_serialize_seconds',
+    'Time spent in DRF serializers per request, by route',
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1],
+    labelnames=('route', 'method'),
+))
+requests_total = register(Counter(
+    'core_requests_total',
+    'Requests served, by route and status code',
+    labelnames=('route', 'method', 'status'),
+))
+
+# Quantiles published next to each request histogram for dashboards without
+# histogram_quantile()
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def format_labels(names, values, **extra):
+    pairs = list(zip(names, values)) + list(extra.items())
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def render_prometheus():
+    """All registered metrics in the Prometheus text exposition format (0.0.4)"""
+    lines = []
+    for metric in REGISTRY.values():
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        samples = metric.samples()
+        if metric.kind == 'counter':
+            for key, value in samples.items():
+                lines.append(f'{metric.name}{format_labels(metric.labelnames, key)} {value}')
+            continue
+        for key, series in samples.items():
+            cumulative = 0
+            for bound, bucket_count in zip(list(metric.buckets) + ['+Inf'], series['buckets']):
+                cumulative += bucket_count
+                lines.append(f'{metric.name}_bucket{format_labels(metric.labelnames, key, le=bound)} {cumulative}')
+            lines.append(f'{metric.name}_sum{format_labels(metric.labelnames, key)} {series["sum"]}')
+            lines.append(f'{metric.name}_count{format_labels(metric.labelnames, key)} {series["count"]}')
+        if metric.name.startswith('core_request_'):
+            name = f'{metric.name}_quantile'
+            lines.append(f'# HELP {name} Estimated p50/p95/p99 of {metric.name}')
+            lines.append(f'# TYPE {name} gauge')
+            for key, series in samples.items():
+                for q in QUANTILES:
+                    lines.append(f'{name}{format_labels(metric.labelnames, key, quantile=q)} {metric.quantile(q, series)}')
+    return '\n'.join(lines) + '\n'
+
+
+class RequestTimings:
+    """Phase durations (seconds) and SQL query count for the current request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.phases = {}
+        self.active = set()
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        """connection.execute_wrapper() hook timing every SQL statement"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.db_queries += 1
+
+
+current_timings = ContextVar('current_timings', default=None)
+
+
+class timed:
+    """
+    Add the duration of a block to the current request's named phase.
+    Re-entrant: nested blocks of the same phase (a serializer inside a
+    serializer) are only counted once. A no-op outside a timed request.
+    """
+    __slots__ = ('phase', 'timings', 'start')
+
+    def __init__(self, phase):
+        self.phase = phase
+
+    def __enter__(self):
+        timings = current_timings.get()
+        if timings is None or self.phase in timings.active:
+            self.timings = None
+            return
+        timings.active.add(self.phase)
+        self.timings = timings
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        timings = self.timings
+        if timings is not None:
+            timings.phases[self.phase] = timings.phases.get(self.phase, 0.0) + time.perf_counter() - self.start
+            timings.active.discard(self.phase)
+
+intake_submissions_total = register(Counter(
+    'core_intake_submissions_total',
+    'Public form submissions accepted, by model and intake mode (direct or spooled)',
+    labelnames=('model', 'mode'),
+))
+
+intake_flushed_total = register(Counter(
+    'core_intake_flushed_total',
+    'Spooled submissions written to the database by the intake flusher',
+    labelnames=('model',),
+))
+
+throttled_total = register(Counter(
+    'core_throttled_total',
+    'Requests rejected by a throttle, by scope',
+    labelnames=('scope',),
+))
+payment_transitions_total = register(Counter(
+    'core_payment_transitions_total',
+    'Payment status callbacks, by target status and outcome (applied, replayed, unchanged, rejected)',
+    labelnames=('status', 'outcome'),
+))
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+SINGLETON_PK = 1
+
+
+def move_settings_to_singleton_pk(apps, schema_editor):
+    """Keep the first settings row under the fixed primary key and drop duplicates"""
+    SiteSettings = apps.get_model('core', 'SiteSettings')
+    first = SiteSettings.objects.order_by('pk').first()
+    if first is None:
+        return
+    SiteSettings.objects.exclude(pk=first.pk).delete()
+    if first.pk != SINGLETON_PK:
+        SiteSettings.objects.filter(pk=first.pk).update(pk=SINGLETON_PK)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_purchase'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_settings_to_singleton_pk, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_sitesettings_singleton_pk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='houseplan',
+            name='floor_count',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Number of floors (levels)'),
+        ),
+        migrations.AddField(
+            model_name='houseplan',
+            name='total_floor_area',
+            field=models.IntegerField(default=0, editable=False, help_text='Sum of floor areas'),
+        ),
+        migrations.AddField(
+            model_name='houseplan',
+            name='total_lounges',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='houseplan',
+            name='total_dining_areas',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='houseplan',
+            name='cover_image',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Primary image, or first gallery image when unset', max_length=100),
+        ),
+    ]
@@ -0,0 +1,78 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+from django.db.migrations.operations import AddIndex
+
+
+class AddIndexConcurrentlyIfPostgres(AddIndexConcurrently):
+    """
+    CREATE INDEX CONCURRENTLY on PostgreSQL so production tables are not
+    locked against writes; a plain CREATE INDEX on other backends (SQLite).
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0011_houseplan_aggregates'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfPostgres(
+            model_name='houseplan',
+            index=models.Index(fields=['display_on', '-created_at'], name='core_plan_display_created'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='houseplan',
+            index=models.Index(condition=models.Q(('is_popular', True)), fields=['-created_at'], name='core_plan_popular_created'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='houseplan',
+            index=models.Index(condition=models.Q(('is_best_selling', True)), fields=['-created_at'], name='core_plan_bestsell_created'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='houseplan',
+            index=models.Index(fields=['bedrooms', 'price'], name='core_plan_bedrooms_price'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='houseplan',
+            index=models.Index(fields=['price'], name='core_plan_price'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='houseplanimage',
+            index=models.Index(fields=['house_plan', 'order'], name='core_planimage_plan_order'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='floor',
+            index=models.Index(fields=['house_plan', 'order', 'level'], name='core_floor_plan_order'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='feature',
+            index=models.Index(fields=['house_plan', 'order'], name='core_feature_plan_order'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='amenity',
+            index=models.Index(fields=['house_plan', 'order'], name='core_amenity_plan_order'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='purchase',
+            index=models.Index(fields=['payment_status', '-created_at'], name='core_purchase_status_created'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='purchase',
+            index=models.Index(fields=['yoco_payment_id'], name='core_purchase_yoco_id'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations, models
+
+
+def build_search_documents(apps, schema_editor):
+    HousePlan = apps.get_model('core', 'HousePlan')
+    for plan in HousePlan.objects.prefetch_related('features', 'amenities').iterator(chunk_size=500):
+        parts = [plan.name, plan.description]
+        for child in [*plan.features.all(), *plan.amenities.all()]:
+            parts.extend([child.name, child.description])
+        document = '\n'.join(part for part in parts if part)
+        HousePlan.objects.filter(pk=plan.pk).update(search_document=document)
+
+
+def add_search_vector(apps, schema_editor):
+    """PostgreSQL only: generated tsvector column plus GIN index"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "ALTER TABLE core_houseplan ADD COLUMN search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('english', coalesce(search_document, ''))) STORED"
+    )
+    schema_editor.execute(
+        "CREATE INDEX core_plan_search_vector ON core_houseplan USING gin (search_vector)"
+    )
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS core_plan_search_vector")
+    schema_editor.execute("ALTER TABLE core_houseplan DROP COLUMN IF EXISTS search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='houseplan',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(build_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(add_search_vector, drop_search_vector),
+    ]
@@ -0,0 +1,32 @@
+import importlib
+
+from django.db import migrations, models
+
+# Module names starting with a digit cannot be imported with an import statement
+AddIndexConcurrentlyIfPostgres = importlib.import_module(
+    'core.migrations.0012_catalog_indexes'
+).AddIndexConcurrentlyIfPostgres
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('core', '0015_job'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfPostgres(
+            model_name='contact',
+            index=models.Index(fields=['-created_at', '-id'], name='core_contact_created'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='quote',
+            index=models.Index(fields=['-created_at', '-id'], name='core_quote_created'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='purchase',
+            index=models.Index(fields=['-created_at', '-id'], name='core_purchase_created'),
+        ),
+    ]
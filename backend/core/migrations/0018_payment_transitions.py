@@ -0,0 +1,31 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_intake'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(blank=True, max_length=200, null=True)),
+                ('from_status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('to_status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('yoco_payment_id', models.CharField(blank=True, max_length=200, null=True)),
+                ('yoco_reference', models.CharField(blank=True, max_length=200, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('purchase', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_transitions', to='core.purchase')),
+            ],
+            options={
+                'verbose_name': 'Payment Transition',
+                'verbose_name_plural': 'Payment Transitions',
+                'ordering': ['purchase', 'created_at'],
+                'constraints': [models.UniqueConstraint(fields=('purchase', 'idempotency_key'), name='core_payment_transition_key')],
+            },
+        ),
+    ]
@@ -1,13 +1,25 @@
 """
 Core app models - Define your application models here
 """
+import time
+
+from django.conf import settings
 from django.db import models
+from django.db.models.functions import Coalesce, NullIf
+from django.utils import timezone
 from django.contrib.auth.models import User
+from .cache import get_catalog_version
 from .storage import get_storage
 
 
 class SiteSettings(models.Model):
-    """Model for site-wide configuration and settings"""
+    """
+    Model for site-wide configuration and settings.
+    Stored as a single row with a fixed primary key; use SiteSettings.load()
+    to read it from the in-process cache.
+    """
+    SINGLETON_PK = 1
+
     youtube_link = models.URLField(blank=True, null=True, help_text="YouTube channel or video link (short or embed format)")
     company_phone = models.CharField(max_length=20, blank=True, null=True)
     company_email = models.EmailField(blank=True, null=True)
@@ -47,11 +59,109 @@ class SiteSettings(models.Model):
         
         return url
 
+    # (catalog version, monotonic load time, instance or None) for the current process
+    _cached = None
+
+    @classmethod
+    def load(cls):
+        """
+        Return the settings row (or None) from the in-process cache.
+        An entry is reused while the catalog version (see core.cache) is
+        unchanged and for at most SITE_SETTINGS_CACHE_TIMEOUT seconds: with a
+        process-local cache backend the version only reflects saves made in
+        this process, so the timeout bounds how stale other workers can be.
+        """
+        version = get_catalog_version()
+        cached = cls._cached
+        if (cached is not None and cached[0] == version
+                and time.monotonic() - cached[1] < settings.SITE_SETTINGS_CACHE_TIMEOUT):
+            return cached[2]
+        instance = cls.objects.filter(pk=cls.SINGLETON_PK).first()
+        cls._cached = (version, time.monotonic(), instance)
+        return instance
+
+    @classmethod
+    def clear_cache(cls):
+        cls._cached = None
+
     def save(self, *args, **kwargs):
-        # Ensure only one instance exists
-        if not self.pk and SiteSettings.objects.exists():
-            self.pk = SiteSettings.objects.first().pk
+        """Always save as the singleton row, so there can never be a second one"""
+        self.pk = self.SINGLETON_PK
         super().save(*args, **kwargs)
+        self.__class__.clear_cache()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.__class__.clear_cache()
+        return result
+
+
+class HousePlanQuerySet(models.QuerySet):
+    """QuerySet helpers for loading house plans with their related rows"""
+
+    def with_details(self, relations=None):
+        """
+        Prefetch the child collections the nested serializer renders
+        (all of HousePlan.DETAIL_RELATIONS unless a subset is given).
+        Each prefetch is ordered like the child model's Meta.ordering so the
+        API output is identical to walking the reverse relations one by one.
+        """
+        child_models = {
+            'floors': Floor,
+            'features': Feature,
+            'amenities': Amenity,
+            'plan_images': HousePlanImage,
+        }
+        lookups = [
+            models.Prefetch(name, queryset=model.objects.order_by(*model._meta.ordering))
+            for name, model in child_models.items()
+            if relations is None or name in relations
+        ]
+        return self.prefetch_related(*lookups)
+
+    def refresh_aggregates(self):
+        """
+        Recompute the denormalized floor totals and cover image of every plan
+        in the queryset with a single UPDATE ... SET col = (subquery) statement.
+        """
+        floors = Floor.objects.filter(house_plan=models.OuterRef('pk')).order_by().values('house_plan')
+
+        def floor_total(expression):
+            return Coalesce(models.Subquery(floors.annotate(total=expression).values('total')), 0)
+
+        first_gallery_image = (
+            HousePlanImage.objects.filter(house_plan=models.OuterRef('pk'))
+            .order_by('order', 'pk').values('image')[:1]
+        )
+        return self.order_by().update(
+            floor_count=floor_total(models.Count('pk')),
+            total_floor_area=floor_total(models.Sum('floor_area')),
+            total_lounges=floor_total(models.Sum('lounges')),
+            total_dining_areas=floor_total(models.Sum('dining_areas')),
+            cover_image=Coalesce(NullIf('image', models.Value('')), models.Subquery(first_gallery_image), models.Value('')),
+            updated_at=timezone.now(),
+        )
+
+    def refresh_search_documents(self):
+        """
+        Rebuild the denormalized search text (name, description, feature and
+        amenity names/descriptions) of every plan in the queryset.
+        On PostgreSQL the generated search_vector column follows automatically.
+        """
+        updated = 0
+        for plan in self.order_by().only('pk', 'name', 'description').prefetch_related('features', 'amenities'):
+            document = build_search_document(plan.name, plan.description, [*plan.features.all(), *plan.amenities.all()])
+            updated += HousePlan.objects.filter(pk=plan.pk).update(search_document=document, updated_at=timezone.now())
+        return updated
+
+
+def build_search_document(name, description, children):
+    """Search text for a plan: its name and description plus each feature/amenity name and description"""
+    parts = [name, description]
+    for child in children:
+        parts.extend([child.name, child.description])
+    return '\n'.join(part for part in parts if part)
+
 
 class HousePlan(models.Model):
     """Model for house plans"""
@@ -76,9 +186,28 @@ class HousePlan(models.Model):
     is_best_selling = models.BooleanField(default=False, help_text="Show in 'Best-Selling Designs' section")
     is_new = models.BooleanField(default=False)
     pet_friendly = models.BooleanField(default=False)
+
+    # Denormalized from floors and images; maintained by core.signals and
+    # rebuilt with `manage.py backfill_plan_aggregates`
+    floor_count = models.PositiveSmallIntegerField(default=0, editable=False, help_text="Number of floors (levels)")
+    total_floor_area = models.IntegerField(default=0, editable=False, help_text="Sum of floor areas")
+    total_lounges = models.IntegerField(default=0, editable=False)
+    total_dining_areas = models.IntegerField(default=0, editable=False)
+    cover_image = models.CharField(max_length=100, blank=True, default='', editable=False, help_text="Primary image, or first gallery image when unset")
+    # Source text for full-text search (see core.search); PostgreSQL also keeps
+    # a generated, GIN-indexed search_vector column derived from it
+    search_document = models.TextField(blank=True, default='', editable=False)
+    # Responsive copies of `image` (see core.images)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = HousePlanQuerySet.as_manager()
+
+    # Reverse relations rendered by the detail serializer
+    DETAIL_RELATIONS = {'floors', 'features', 'amenities', 'plan_images'}
+
     def __str__(self):
         return self.name
 
@@ -86,6 +215,15 @@ class HousePlan(models.Model):
         ordering = ['-created_at']
         verbose_name = 'House Plan'
         verbose_name_plural = 'House Plans'
+        indexes = [
+            # Catalog pages: ?display_on=... ordered newest first
+            models.Index(fields=['display_on', '-created_at'], name='core_plan_display_created'),
+            # Homepage sections only ever read the flagged rows
+            models.Index(fields=['-created_at'], condition=models.Q(is_popular=True), name='core_plan_popular_created'),
+            models.Index(fields=['-created_at'], condition=models.Q(is_best_selling=True), name='core_plan_bestsell_created'),
+            models.Index(fields=['bedrooms', 'price'], name='core_plan_bedrooms_price'),
+            models.Index(fields=['price'], name='core_plan_price'),
+        ]
 
 
 class HousePlanImage(models.Model):
@@ -94,6 +232,8 @@ class HousePlanImage(models.Model):
     image = models.ImageField(upload_to='plans/', storage=get_storage)
     title = models.CharField(max_length=200, blank=True, null=True, help_text="Image title or description")
     order = models.IntegerField(default=0, help_text="Order to display images")
+    # Responsive copies of `image` (see core.images)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     def __str__(self):
         return f"{self.house_plan.name} - {self.title or 'Image'}"
@@ -102,6 +242,7 @@ class HousePlanImage(models.Model):
         ordering = ['order']
         verbose_name = 'House Plan Image'
         verbose_name_plural = 'House Plan Images'
+        indexes = [models.Index(fields=['house_plan', 'order'], name='core_planimage_plan_order')]
 
 
 class Floor(models.Model):
@@ -136,6 +277,7 @@ class Floor(models.Model):
         verbose_name = 'Floor'
         verbose_name_plural = 'Floors'
         unique_together = ('house_plan', 'level')
+        indexes = [models.Index(fields=['house_plan', 'order', 'level'], name='core_floor_plan_order')]
 
 
 class Feature(models.Model):
@@ -152,6 +294,7 @@ class Feature(models.Model):
         ordering = ['order']
         verbose_name = 'Feature'
         verbose_name_plural = 'Features'
+        indexes = [models.Index(fields=['house_plan', 'order'], name='core_feature_plan_order')]
 
 
 class Amenity(models.Model):
@@ -168,6 +311,7 @@ class Amenity(models.Model):
         ordering = ['order']
         verbose_name = 'Amenity'
         verbose_name_plural = 'Amenities'
+        indexes = [models.Index(fields=['house_plan', 'order'], name='core_amenity_plan_order')]
 
 
 class BuiltHome(models.Model):
@@ -198,7 +342,10 @@ class Contact(models.Model):
     subject = models.CharField(max_length=200, default='General Inquiry')
     message = models.TextField()
     is_read = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: spooled submissions keep the time they were received (see core.intake)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Spool record id of a buffered submission; makes replaying a spool file idempotent
+    intake_id = models.UUIDField(null=True, blank=True, unique=True, editable=False)
 
     def __str__(self):
         return f"{self.name} - {self.created_at}"
@@ -207,6 +354,8 @@ class Contact(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Contact Message'
         verbose_name_plural = 'Contact Messages'
+        # Admin changelist order (Django appends -pk for a deterministic order)
+        indexes = [models.Index(fields=['-created_at', '-id'], name='core_contact_created')]
 
 
 class Quote(models.Model):
@@ -217,7 +366,8 @@ class Quote(models.Model):
     house_plan = models.ForeignKey(HousePlan, on_delete=models.SET_NULL, related_name='quotes', null=True, blank=True)
     requirements = models.TextField(blank=True)
     is_processed = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    intake_id = models.UUIDField(null=True, blank=True, unique=True, editable=False)
 
     def __str__(self):
         if self.house_plan:
@@ -228,6 +378,8 @@ class Quote(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Quote Request'
         verbose_name_plural = 'Quote Requests'
+        # Admin changelist order (Django appends -pk for a deterministic order)
+        indexes = [models.Index(fields=['-created_at', '-id'], name='core_quote_created')]
 
 
 class Purchase(models.Model):
@@ -271,3 +423,73 @@ class Purchase(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Purchase'
         verbose_name_plural = 'Purchases'
+        indexes = [
+            models.Index(fields=['payment_status', '-created_at'], name='core_purchase_status_created'),
+            models.Index(fields=['yoco_payment_id'], name='core_purchase_yoco_id'),
+            models.Index(fields=['-created_at', '-id'], name='core_purchase_created'),
+        ]
+
+
+class PaymentTransition(models.Model):
+    """
+    One applied payment status change of a purchase (see core.payments).
+    The idempotency key, when the callback sent one, is unique per purchase,
+    so a retried callback finds its earlier transition instead of applying it again.
+    """
+    purchase = models.ForeignKey(Purchase, on_delete=models.CASCADE, related_name='payment_transitions')
+    idempotency_key = models.CharField(max_length=200, blank=True, null=True)
+    from_status = models.CharField(max_length=20, choices=Purchase.PAYMENT_STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Purchase.PAYMENT_STATUS_CHOICES)
+    yoco_payment_id = models.CharField(max_length=200, blank=True, null=True)
+    yoco_reference = models.CharField(max_length=200, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Purchase #{self.purchase_id}: {self.from_status} -> {self.to_status}"
+
+    class Meta:
+        ordering = ['purchase', 'created_at']
+        verbose_name = 'Payment Transition'
+        verbose_name_plural = 'Payment Transitions'
+        constraints = [
+            models.UniqueConstraint(fields=['purchase', 'idempotency_key'], name='core_payment_transition_key'),
+        ]
+
+
+class Job(models.Model):
+    """
+    Background job processed by `manage.py run_jobs` (see core.jobs).
+    Rows are inserted inside the caller's transaction, so a job only becomes
+    visible to the worker once the change that produced it has committed.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100)
+    key = models.CharField(max_length=200, blank=True, default='', help_text="De-duplication key for pending jobs")
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now, help_text="Not picked up before this time")
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Background Job'
+        verbose_name_plural = 'Background Jobs'
+        indexes = [
+            # Worker poll: next due job
+            models.Index(fields=['status', 'run_at'], name='core_job_status_run_at'),
+            models.Index(fields=['task', 'key'], condition=models.Q(status='pending'), name='core_job_pending_key'),
+        ]
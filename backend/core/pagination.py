@@ -0,0 +1,101 @@
+"""
+Pagination classes for core app
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class HousePlanCursorPagination(CursorPagination):
+    """
+    Opt-in cursor pagination for the plan catalog.
+    Requests without ?cursor= or ?page_size= keep the plain list response so
+    existing clients are unaffected; paginated responses use the
+    {"next", "previous", "results"} shape.
+    """
+    ordering = ('-created_at', 'id')
+    page_size = settings.HOUSE_PLAN_PAGE_SIZE
+    max_page_size = settings.HOUSE_PLAN_MAX_PAGE_SIZE
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return super().get_page_size(request)
+
+
+class HousePlanSearchPagination(PageNumberPagination):
+    """
+    Page number pagination for faceted plan search results. The primary key
+    is appended to the ordering so rows with equal sort values (price,
+    created_at, rank) keep a stable order and never repeat or go missing
+    across pages.
+    """
+    page_size = settings.HOUSE_PLAN_SEARCH_PAGE_SIZE
+    max_page_size = settings.HOUSE_PLAN_MAX_PAGE_SIZE
+    page_size_query_param = 'page_size'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = queryset.query.order_by or (queryset.model._meta.ordering if queryset.query.default_ordering else ())
+        if not {'pk', 'id'} & {field.lstrip('-') for field in ordering if isinstance(field, str)}:
+            queryset = queryset.order_by(*ordering, 'pk')
+        return super().paginate_queryset(queryset, request, view)
+
+
+class HousePlanRankedListPagination(HousePlanSearchPagination):
+    """
+    Catalog list pagination while ?search= is active. A cursor would re-order
+    by created_at and throw away the rank order, so ranked results are paged
+    by number instead; still opt-in through ?page_size=, ?cursor= or ?page=.
+    """
+    page_size = settings.HOUSE_PLAN_PAGE_SIZE
+
+    def get_page_size(self, request):
+        params = request.query_params
+        if not {'cursor', self.page_size_query_param, self.page_query_param} & set(params):
+            return None
+        return super().get_page_size(request)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin changelist paginator for large tables. On PostgreSQL the table's
+    row estimate (pg_class.reltuples, kept by ANALYZE) is used as the count
+    of an unfiltered changelist when it exceeds ADMIN_ESTIMATED_COUNT_THRESHOLD,
+    so paging through millions of rows does not run an exact COUNT(*) on every
+    page view. Filtered and searched changelists, smaller tables and other
+    databases are counted exactly: the planner's estimate for a WHERE clause
+    can be far off and would link to pages that do not exist.
+    """
+
+    @cached_property
+    def count(self):
+        estimate = self.estimated_count()
+        if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+            return estimate
+        return super().count
+
+    def estimated_count(self):
+        queryset = self.object_list
+        if queryset.query.where or queryset.query.distinct:
+            return None
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        # reltuples is -1 until the table is first analyzed
+        return row[0] if row and row[0] >= 0 else None
+
+    def page(self, number):
+        page = super().page(number)
+        if page.number > 1 and not page.object_list:
+            # A stale estimate ran past the end: count exactly and show the last real page
+            self.__dict__['count'] = super().count
+            self.__dict__.pop('num_pages', None)
+            page = super().page(self.num_pages)
+        return page
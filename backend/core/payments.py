@@ -0,0 +1,96 @@
+"""
+Payment status state machine for purchases.
+
+Provider callbacks are retried and can arrive concurrently or out of order.
+apply_payment_status() applies one as a conditional UPDATE that only matches
+while the purchase is still in the status that was read, which must be an
+allowed predecessor of the target, and records the change as a
+PaymentTransition in the same transaction. A concurrent change makes the
+UPDATE match nothing, and the status is re-read instead of overwritten, so
+a completed purchase is never moved back to pending.
+
+A callback may carry an idempotency key (unique per purchase): a repeat of
+an applied callback is then reported as replayed without touching the row.
+Callbacks without one rely on the conditional UPDATE alone. The common path
+is one SELECT, one UPDATE of the changed columns and one INSERT.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, Exists, OuterRef, Value
+from django.utils import timezone
+
+from .events import emit
+from .metrics import payment_transitions_total
+from .models import Purchase, PaymentTransition
+
+PAYMENT_STATUSES = {status for status, _ in Purchase.PAYMENT_STATUS_CHOICES}
+# status -> statuses it may move to; completed and cancelled are final
+TRANSITIONS = {
+    'pending': {'processing', 'completed', 'failed', 'cancelled'},
+    'processing': {'completed', 'failed', 'cancelled'},
+    'failed': {'processing', 'completed', 'cancelled'},
+    'completed': set(),
+    'cancelled': set(),
+}
+# Re-reads allowed when concurrent callbacks keep changing the status under us
+MAX_ATTEMPTS = 5
+
+
+class PaymentTransitionError(Exception):
+    """The purchase's current status cannot move to the requested one"""
+
+    def __init__(self, current, target):
+        self.current = current
+        self.target = target
+        super().__init__(f"Cannot change payment status from {current} to {target}")
+
+
+def apply_payment_status(purchase_id, payment_status, key=None, yoco_payment_id=None, yoco_reference=None):
+    """
+    Move a purchase to payment_status. Returns (outcome, previous status),
+    where outcome is 'applied', 'replayed' (key already applied) or
+    'unchanged' (already in that status). Raises PaymentTransitionError for
+    a disallowed change and Purchase.DoesNotExist for an unknown purchase.
+    """
+    if payment_status not in PAYMENT_STATUSES:
+        raise ValueError(f"Unknown payment status: {payment_status}")
+    if key:
+        seen = Exists(PaymentTransition.objects.filter(purchase=OuterRef('pk'), idempotency_key=key))
+    else:
+        seen = Value(False, output_field=BooleanField())
+    current = None
+    for _ in range(MAX_ATTEMPTS):
+        current, replayed = Purchase.objects.filter(pk=purchase_id).annotate(
+            replayed=seen,
+        ).values_list('payment_status', 'replayed').get()
+        if replayed or current == payment_status:
+            return finish('replayed' if replayed else 'unchanged', purchase_id, current, payment_status)
+        if payment_status not in TRANSITIONS.get(current, ()):
+            break
+        now = timezone.now()
+        values = {'payment_status': payment_status, 'updated_at': now}
+        if yoco_payment_id:
+            values['yoco_payment_id'] = yoco_payment_id
+        if yoco_reference:
+            values['yoco_reference'] = yoco_reference
+        if payment_status == 'completed':
+            values['paid_at'] = now
+        try:
+            with transaction.atomic():
+                if not Purchase.objects.filter(pk=purchase_id, payment_status=current).update(**values):
+                    continue
+                PaymentTransition.objects.create(
+                    purchase_id=purchase_id, idempotency_key=key or None, from_status=current, to_status=payment_status,
+                    yoco_payment_id=yoco_payment_id or None, yoco_reference=yoco_reference or None,
+                )
+        except IntegrityError:
+            continue  # the same key was applied concurrently
+        return finish('applied', purchase_id, current, payment_status)
+    payment_transitions_total.inc(status=payment_status, outcome='rejected')
+    emit('payment.rejected', purchase=purchase_id, from_status=current, to_status=payment_status)
+    raise PaymentTransitionError(current, payment_status)
+
+
+def finish(outcome, purchase_id, previous, payment_status):
+    payment_transitions_total.inc(status=payment_status, outcome=outcome)
+    emit('payment.transition', purchase=purchase_id, outcome=outcome, from_status=previous, to_status=payment_status)
+    return outcome, previous
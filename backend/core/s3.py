@@ -0,0 +1,30 @@
+"""
+S3 storage tuned for serving public catalog media.
+Imported lazily from core.storage so boto3 is only loaded when USE_S3 is on.
+"""
+from django.utils.encoding import filepath_to_uri
+from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
+
+
+class PublicS3Storage(S3Boto3Storage):
+    """
+    S3Boto3Storage whose public URLs are plain string concatenation.
+
+    With AWS_S3_CUSTOM_DOMAIN set and querystring auth disabled, the object URL
+    is just "<protocol>//<domain>/<location>/<name>", so url() never touches
+    boto3 and skips the per-call path normalisation of the parent class.
+    Everything else (uploads, signed URLs) is inherited unchanged.
+    """
+
+    def __init__(self, **settings):
+        super().__init__(**settings)
+        self._public_base = None
+        if self.custom_domain and not self.querystring_auth:
+            location = f"{self.location.strip('/')}/" if self.location else ''
+            self._public_base = f"{self.url_protocol}//{self.custom_domain}/{location}"
+
+    def url(self, name, parameters=None, expire=None, http_method=None):
+        if self._public_base is None or parameters:
+            return super().url(name, parameters=parameters, expire=expire, http_method=http_method)
+        return self._public_base + filepath_to_uri(clean_name(name).lstrip('/'))
@@ -0,0 +1,46 @@
+"""
+Full-text search over house plans.
+
+HousePlan.search_document holds the plan name, description and feature and
+amenity text (kept current by core.signals). On PostgreSQL, migration 0013
+adds a generated tsvector column over it with a GIN index, and queries are
+matched with websearch_to_tsquery and ranked with ts_rank. Other backends
+(SQLite in development) fall back to case-insensitive LIKE matching of every
+search term.
+"""
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+from .models import HousePlan
+
+SEARCH_CONFIG = 'english'
+SEARCH_PARAM = 'search'
+
+
+def search_plans(queryset, terms):
+    """Filter a plan queryset to plans matching the search terms, best match first"""
+    terms = (terms or '').strip()
+    if not terms:
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        column = f'{connection.ops.quote_name(HousePlan._meta.db_table)}.search_vector'
+        tsquery = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+        return queryset.filter(
+            RawSQL(f'{column} @@ {tsquery}', (terms,), output_field=BooleanField())
+        ).annotate(
+            search_rank=RawSQL(f'ts_rank({column}, {tsquery})', (terms,), output_field=FloatField())
+        ).order_by('-search_rank', '-created_at')
+
+    condition = Q()
+    for term in terms.split():
+        condition &= Q(search_document__icontains=term)
+    return queryset.filter(condition)
+
+
+class HousePlanSearchFilter(BaseFilterBackend):
+    """DRF filter backend applying search_plans() for ?search="""
+
+    def filter_queryset(self, request, queryset, view):
+        return search_plans(queryset, request.query_params.get(SEARCH_PARAM))
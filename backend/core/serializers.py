@@ -1,12 +1,64 @@
 """
 Serializers for core app
 """
+from django.db import models
 from rest_framework import serializers
-from decouple import config
+from .media import MediaImageField, MediaSrcsetField, MediaURLField
+from .metrics import timed
 from .models import HousePlan, BuiltHome, Contact, Quote, Purchase, SiteSettings, Floor, Feature, Amenity, HousePlanImage
+from .uploads import DirectUploadError, verify_upload
 
 
-class SiteSettingsSerializer(serializers.ModelSerializer):
+def query_param_list(request, name):
+    """Return the comma separated values of a query parameter as a set"""
+    if request is None:
+        return set()
+    value = request.query_params.get(name, '')
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+class TimedSerializerMixin:
+    """Counts to_representation() time towards the request's 'serialize' Server-Timing phase"""
+
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin for sparse fieldsets.
+    ?expand=a,b adds fields declared in get_expandable_fields() and
+    ?fields=x,y keeps only the listed fields (applied after expansion).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None:
+            return
+
+        expandable = self.get_expandable_fields()
+        for name in query_param_list(request, 'expand') & set(expandable):
+            self.fields[name] = expandable[name]()
+
+        requested = query_param_list(request, 'fields')
+        if requested:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+    @classmethod
+    def get_expandable_fields(cls):
+        """Map of field name to a factory building the field on demand"""
+        return {}
+
+    @classmethod
+    def requested_expansions(cls, request):
+        """Names of expandable fields asked for by the request"""
+        return query_param_list(request, 'expand') & set(cls.get_expandable_fields())
+
+
+class SiteSettingsSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     youtube_link = serializers.SerializerMethodField()
     
     def get_youtube_link(self, obj):
@@ -40,84 +92,100 @@ class AmenitySerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class HousePlanImageSerializer(serializers.ModelSerializer):
-    image_url = serializers.SerializerMethodField()
-    
-    def get_image_url(self, obj):
-        """Return full URL for image"""
-        if obj.image and obj.image.name:
-            try:
-                request = self.context.get('request')
-                if request:
-                    return request.build_absolute_uri(obj.image.url)
-            except:
-                pass
-            # Fallback URL construction
-            image_url = f"/media/{obj.image.name}" if obj.image.name else None
-            if image_url:
-                backend_url = config('BACKEND_URL')
-                return f"{backend_url}{image_url}"
-        return None
+class MediaModelSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """ModelSerializer rendering every ImageField through the shared media URL resolver"""
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.ImageField: MediaImageField,
+    }
+
+
+class HousePlanImageSerializer(MediaModelSerializer):
+    image_url = MediaURLField(source='image')
+    image_srcset = MediaSrcsetField(source='image_variants')
     
     class Meta:
         model = HousePlanImage
-        fields = ['id', 'image', 'image_url', 'title', 'order']
+        fields = ['id', 'image', 'image_url', 'image_srcset', 'title', 'order']
         read_only_fields = ['id']
 
 
-class HousePlanSerializer(serializers.ModelSerializer):
+class HousePlanSerializer(DynamicFieldsMixin, MediaModelSerializer):
     floors = FloorSerializer(many=True, read_only=True)
     features = FeatureSerializer(many=True, read_only=True)
     amenities = AmenitySerializer(many=True, read_only=True)
     plan_images = HousePlanImageSerializer(many=True, read_only=True)
-    image_url = serializers.SerializerMethodField()
-    
-    def get_image_url(self, obj):
-        """Return full URL for primary image"""
-        if obj.image and obj.image.name:
-            try:
-                request = self.context.get('request')
-                if request:
-                    return request.build_absolute_uri(obj.image.url)
-            except:
-                pass
-            # Fallback URL construction
-            image_url = f"/media/{obj.image.name}" if obj.image.name else None
-            if image_url:
-                backend_url = config('BACKEND_URL')
-                return f"{backend_url}{image_url}"
-        return None
+    image_url = MediaURLField(source='image')
+    image_srcset = MediaSrcsetField(source='image_variants')
+    cover_image_url = MediaURLField(source='cover_image')
     
     class Meta:
         model = HousePlan
         fields = ['id', 'name', 'description', 'price', 'bedrooms', 'bathrooms', 'garage', 
-                  'square_feet', 'width', 'depth', 'image', 'image_url', 'plan_images', 'video_url', 
+                  'square_feet', 'width', 'depth', 'image', 'image_url', 'image_srcset', 'plan_images', 'video_url', 
                   'is_popular', 'is_best_selling', 'is_new', 'pet_friendly', 'floors', 'features', 'amenities', 
+                  'floor_count', 'total_floor_area', 'total_lounges', 'total_dining_areas', 'cover_image_url',
                   'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class BuiltHomeSerializer(serializers.ModelSerializer):
+class HousePlanSummarySerializer(HousePlanSerializer):
+    """
+    Compact plan representation for list views (catalog cards).
+    Nested collections and long text are opt-in through ?expand=.
+    """
+    floors = None
+    features = None
+    amenities = None
+    plan_images = None
+
+    @classmethod
+    def get_expandable_fields(cls):
+        return {
+            'description': lambda: serializers.CharField(read_only=True, allow_null=True),
+            'video_url': lambda: serializers.URLField(read_only=True, allow_null=True),
+            'floors': lambda: FloorSerializer(many=True, read_only=True),
+            'features': lambda: FeatureSerializer(many=True, read_only=True),
+            'amenities': lambda: AmenitySerializer(many=True, read_only=True),
+            'plan_images': lambda: HousePlanImageSerializer(many=True, read_only=True),
+        }
+
+    class Meta(HousePlanSerializer.Meta):
+        fields = ['id', 'name', 'price', 'bedrooms', 'bathrooms', 'garage', 'square_feet',
+                  'width', 'depth', 'image', 'image_url', 'image_srcset', 'is_popular',
+                  'is_best_selling', 'is_new', 'pet_friendly', 'floor_count', 'total_floor_area',
+                  'total_lounges', 'total_dining_areas', 'cover_image_url', 'created_at', 'updated_at']
+
+
+class HousePlanCardSerializer(HousePlanSummarySerializer):
+    """Homepage plan card: summary fields plus gallery images for the cover fallback"""
+    plan_images = HousePlanImageSerializer(many=True, read_only=True)
+
+    class Meta(HousePlanSummarySerializer.Meta):
+        fields = HousePlanSummarySerializer.Meta.fields + ['plan_images']
+
+
+class BuiltHomeSerializer(MediaModelSerializer):
     class Meta:
         model = BuiltHome
         fields = ['id', 'name', 'description', 'location', 'image', 'completion_date', 'is_featured', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
 
-class ContactSerializer(serializers.ModelSerializer):
+class ContactSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Contact
         fields = ['id', 'name', 'email', 'phone', 'subject', 'message', 'is_read', 'created_at']
         read_only_fields = ['id', 'created_at']
 
 
-class QuoteSerializer(serializers.ModelSerializer):
+class QuoteSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Quote
         fields = ['id', 'name', 'email', 'phone', 'house_plan', 'requirements', 'is_processed', 'created_at']
         read_only_fields = ['id', 'created_at']
 
-class PurchaseSerializer(serializers.ModelSerializer):
+class PurchaseSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     house_plan_name = serializers.CharField(source='house_plan.name', read_only=True)
     
     class Meta:
@@ -127,4 +195,45 @@ class PurchaseSerializer(serializers.ModelSerializer):
             'house_plan', 'house_plan_name', 'plan_price', 'payment_status', 'yoco_payment_id', 
             'yoco_reference', 'created_at', 'updated_at', 'paid_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'yoco_payment_id', 'yoco_reference']
\ No newline at end of file
+        read_only_fields = ['id', 'created_at', 'updated_at', 'yoco_payment_id', 'yoco_reference']
+
+class DirectUploadStartSerializer(serializers.Serializer):
+    filename = serializers.CharField(max_length=200)
+    content_type = serializers.CharField(max_length=100)
+    size = serializers.IntegerField(min_value=1)
+
+
+class UploadedPartSerializer(serializers.Serializer):
+    part_number = serializers.IntegerField(min_value=1, max_value=10000)
+    etag = serializers.CharField(max_length=200)
+
+
+class DirectUploadCompleteSerializer(serializers.Serializer):
+    key = serializers.CharField(max_length=100)
+    upload_id = serializers.CharField(max_length=1024)
+    parts = UploadedPartSerializer(many=True, allow_empty=False)
+
+
+class DirectUploadAbortSerializer(serializers.Serializer):
+    key = serializers.CharField(max_length=100)
+    upload_id = serializers.CharField(max_length=1024)
+
+
+class DirectUploadConfirmSerializer(serializers.ModelSerializer):
+    """Attach a completed direct upload to a plan as a gallery image"""
+    key = serializers.CharField(max_length=100, write_only=True)
+
+    class Meta:
+        model = HousePlanImage
+        fields = ['house_plan', 'key', 'title', 'order']
+
+    def validate_key(self, value):
+        try:
+            verify_upload(value)
+        except DirectUploadError as exc:
+            raise serializers.ValidationError(str(exc))
+        return value
+
+    def create(self, validated_data):
+        validated_data['image'] = validated_data.pop('key')
+        return super().create(validated_data)
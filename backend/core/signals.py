@@ -1,38 +1,125 @@
-import logging
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from core.models import HousePlan, HousePlanImage
-
-# Setup logging
-logging.basicConfig(level=logging.DEBUG)
-logger = logging.getLogger('s3_upload_tracker')
-
-@receiver(post_save, sender=HousePlan)
-def track_houseplan_image_upload(sender, instance, created, **kwargs):
-    """Track when HousePlan images are uploaded"""
-    if instance.image:
-        print(f"\n{'='*70}")
-        print(f"[S3 UPLOAD TRACKER] HousePlan Image Saved")
-        print(f"{'='*70}")
-        print(f"Plan: {instance.name}")
-        print(f"Image field: {instance.image.name}")
-        print(f"Image URL: {instance.image.url}")
-        print(f"Storage: {instance.image.storage.__class__.__name__}")
-        print(f"In S3: {'s3' in instance.image.url or 'amazonaws' in instance.image.url}")
-        print(f"{'='*70}\n")
-        logger.info(f"HousePlan '{instance.name}' image uploaded to: {instance.image.url}")
-
-
-@receiver(post_save, sender=HousePlanImage)
-def track_houseplan_gallery_image_upload(sender, instance, created, **kwargs):
-    """Track when HousePlanImage (gallery) images are uploaded"""
-    if instance.image:
-        print(f"\n{'='*70}")
-        print(f"[S3 UPLOAD TRACKER] Gallery Image Saved")
-        print(f"{'='*70}")
-        print(f"Gallery Image: {instance.image.name}")
-        print(f"Image URL: {instance.image.url}")
-        print(f"Storage: {instance.image.storage.__class__.__name__}")
-        print(f"In S3: {'s3' in instance.image.url or 'amazonaws' in instance.image.url}")
-        print(f"{'='*70}\n")
-        logger.info(f"Gallery image uploaded to: {instance.image.url}")
+import time
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from core.cache import bump_catalog_version
+from core.events import emit
+from core.images import derivative_names, variants_are_current
+from core.jobs import enqueue
+from core.metrics import upload_duration_seconds, upload_size_bytes
+from core.models import HousePlan, HousePlanImage, Floor, Feature, Amenity, SiteSettings
+
+
+def start_upload_timer(sender, instance, raw=False, **kwargs):
+    """Note the size of a newly attached file and when its save started"""
+    image = instance.image
+    if not raw and image and not image._committed:
+        # Uncommitted files report their size without a storage call
+        instance._upload_started = (time.perf_counter(), image.size)
+
+
+def record_upload(sender, instance, **kwargs):
+    """
+    Emit an upload.saved event and metrics once the file has been stored.
+    Only in-memory values are used (no url() or storage round trips); the
+    images.check_upload job verifies the stored object off the save path.
+    """
+    started = instance.__dict__.pop('_upload_started', None)
+    if started is None:
+        return
+    start, size = started
+    duration = time.perf_counter() - start
+    model = sender._meta.label_lower
+    backend = type(instance.image.storage).__name__
+    upload_size_bytes.observe(size, backend=backend, model=model)
+    upload_duration_seconds.observe(duration, backend=backend, model=model)
+    emit('upload.saved', model=model, pk=instance.pk, name=instance.image.name, size=size,
+         duration_ms=round(duration * 1000, 1), backend=backend)
+
+
+# Connected first so the recorded duration excludes the other receivers
+for model in (HousePlan, HousePlanImage):
+    pre_save.connect(start_upload_timer, sender=model, dispatch_uid=f'start_upload_timer_{model.__name__}')
+    post_save.connect(record_upload, sender=model, dispatch_uid=f'record_upload_{model.__name__}')
+
+# Models whose changes must invalidate the public catalog response cache.
+# Note: queryset.update() and bulk_create() do not send these signals; callers
+# using them must call bump_catalog_version() themselves.
+CATALOG_MODELS = (HousePlan, Floor, Feature, Amenity, HousePlanImage, SiteSettings)
+
+
+def invalidate_catalog_cache(sender, **kwargs):
+    """Bump the catalog version once the current transaction commits"""
+    transaction.on_commit(bump_catalog_version)
+
+
+for model in CATALOG_MODELS:
+    for signal in (post_save, post_delete):
+        signal.connect(
+            invalidate_catalog_cache,
+            sender=model,
+            dispatch_uid=f'invalidate_catalog_cache_{model.__name__}',
+        )
+
+
+def refresh_plan_search_document(sender, instance, **kwargs):
+    """
+    Rebuild the plan's full-text search document. Features and amenities have
+    no timestamp of their own; this also bumps the parent plan's updated_at so
+    conditional GET validators see child-table changes.
+    """
+    plan_id = instance.pk if sender is HousePlan else instance.house_plan_id
+    HousePlan.objects.filter(pk=plan_id).refresh_search_documents()
+
+
+def refresh_parent_plan_aggregates(sender, instance, **kwargs):
+    """
+    Recompute the plan's denormalized floor totals and cover image (this
+    also bumps updated_at). Runs as one UPDATE inside the caller's transaction.
+    """
+    plan_id = instance.pk if sender is HousePlan else instance.house_plan_id
+    HousePlan.objects.filter(pk=plan_id).refresh_aggregates()
+
+
+for model in (Feature, Amenity):
+    for signal in (post_save, post_delete):
+        signal.connect(refresh_plan_search_document, sender=model, dispatch_uid=f'refresh_plan_search_{model.__name__}')
+
+for model in (Floor, HousePlanImage):
+    for signal in (post_save, post_delete):
+        signal.connect(refresh_parent_plan_aggregates, sender=model, dispatch_uid=f'refresh_plan_aggregates_{model.__name__}')
+
+post_save.connect(refresh_parent_plan_aggregates, sender=HousePlan, dispatch_uid='refresh_plan_aggregates_HousePlan')
+post_save.connect(refresh_plan_search_document, sender=HousePlan, dispatch_uid='refresh_plan_search_HousePlan')
+
+
+def queue_image_processing(sender, instance, raw=False, **kwargs):
+    """
+    Queue derivative generation and the post-upload check when the image is
+    new, replaced or cleared. The work runs in `manage.py run_jobs`, so saves
+    (admin included) do not wait on image processing or storage round trips.
+    """
+    if raw:
+        return
+    image, variants = instance.image, instance.image_variants
+    if (image and variants_are_current(image, variants)) or (not image and not variants):
+        return
+    model = sender._meta.label_lower
+    key = f'{model}:{instance.pk}'
+    enqueue('images.derivatives', key=key, model=model, pk=instance.pk)
+    if image:
+        enqueue('images.check_upload', key=key, model=model, pk=instance.pk)
+
+
+for model in (HousePlan, HousePlanImage):
+    post_save.connect(queue_image_processing, sender=model, dispatch_uid=f'queue_image_processing_{model.__name__}')
+
+
+def queue_derivative_cleanup(sender, instance, **kwargs):
+    """Queue deletion of a deleted row's derivative files (the job commits with the delete)"""
+    names = derivative_names(instance.image_variants)
+    if names:
+        enqueue('images.delete_derivatives', model=sender._meta.label_lower, names=names)
+
+
+for model in (HousePlan, HousePlanImage):
+    post_delete.connect(queue_derivative_cleanup, sender=model, dispatch_uid=f'queue_derivative_cleanup_{model.__name__}')
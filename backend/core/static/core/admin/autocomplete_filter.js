@@ -0,0 +1,13 @@
+'use strict';
+// Applies the changelist autocomplete filters (core.admin.AutocompleteFilter)
+// by reloading the page with the chosen value in the query string.
+{
+    const $ = django.jQuery;
+    $(document).on('change', 'select[data-filter-query]', function() {
+        const params = new URLSearchParams(this.dataset.filterQuery);
+        if (this.value) {
+            params.set(this.name, this.value);
+        }
+        window.location.search = params.toString();
+    });
+}
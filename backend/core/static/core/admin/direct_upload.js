@@ -0,0 +1,117 @@
+/*
+ * Direct-to-bucket uploads for DirectUploadImageInput (core/forms.py).
+ *
+ * When an image is chosen, the file is sent to S3 in presigned multipart
+ * parts, the upload is completed through the API, and the object key is put
+ * in the hidden "<name>_key" input. The file input is then cleared, so the
+ * admin form posts only the key. On any failure the file stays selected and
+ * is uploaded through Django as usual.
+ */
+(function () {
+    'use strict';
+
+    var CONCURRENCY = 4;
+    var pending = 0;
+
+    function csrfToken(form) {
+        var input = form && form.querySelector('[name=csrfmiddlewaretoken]');
+        return input ? input.value : '';
+    }
+
+    function api(endpoint, path, body, form) {
+        return fetch(endpoint + path, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: {'Content-Type': 'application/json', 'X-CSRFToken': csrfToken(form)},
+            body: JSON.stringify(body)
+        }).then(function (response) {
+            return response.json().catch(function () { return {}; }).then(function (data) {
+                if (!response.ok) {
+                    throw new Error(data.detail || JSON.stringify(data) || response.statusText);
+                }
+                return data;
+            });
+        });
+    }
+
+    function uploadParts(file, started, onProgress) {
+        var queue = started.parts.slice();
+        var done = [];
+        function next() {
+            var part = queue.shift();
+            if (!part) {
+                return Promise.resolve();
+            }
+            var start = (part.part_number - 1) * started.part_size;
+            return fetch(part.url, {method: 'PUT', body: file.slice(start, start + started.part_size)})
+                .then(function (response) {
+                    var etag = response.headers.get('ETag');
+                    if (!response.ok || !etag) {
+                        throw new Error('Part ' + part.part_number + ' failed (' + response.status + ')');
+                    }
+                    done.push({part_number: part.part_number, etag: etag});
+                    onProgress(done.length, started.parts.length);
+                    return next();
+                });
+        }
+        var workers = [];
+        for (var i = 0; i < Math.min(CONCURRENCY, queue.length); i++) {
+            workers.push(next());
+        }
+        return Promise.all(workers).then(function () { return done; });
+    }
+
+    function upload(fileInput, keyInput, statusEl) {
+        var file = fileInput.files[0];
+        var endpoint = keyInput.getAttribute('data-direct-upload-endpoint');
+        var form = fileInput.form;
+        var started;
+        keyInput.value = '';
+        pending += 1;
+        statusEl.textContent = 'Uploading…';
+        return api(endpoint, '', {filename: file.name, content_type: file.type, size: file.size}, form)
+            .then(function (data) {
+                started = data;
+                return uploadParts(file, started, function (count, total) {
+                    statusEl.textContent = 'Uploading… ' + Math.round(100 * count / total) + '%';
+                });
+            })
+            .then(function (parts) {
+                return api(endpoint, 'complete/', {key: started.key, upload_id: started.upload_id, parts: parts}, form);
+            })
+            .then(function () {
+                keyInput.value = started.key;
+                fileInput.value = '';
+                statusEl.textContent = 'Uploaded ' + file.name;
+            })
+            .catch(function (error) {
+                if (started) {
+                    api(endpoint, 'abort/', {key: started.key, upload_id: started.upload_id}, form).catch(function () {});
+                }
+                statusEl.textContent = 'Direct upload unavailable (' + error.message + '); the file will be sent with the form.';
+            })
+            .then(function () {
+                pending -= 1;
+            });
+    }
+
+    document.addEventListener('change', function (event) {
+        var fileInput = event.target;
+        if (fileInput.type !== 'file' || !fileInput.files.length || !fileInput.form) {
+            return;
+        }
+        var keyInput = fileInput.form.querySelector('input[name="' + fileInput.name + '_key"]');
+        if (!keyInput) {
+            return;
+        }
+        var statusEl = keyInput.nextElementSibling;
+        upload(fileInput, keyInput, statusEl);
+    });
+
+    document.addEventListener('submit', function (event) {
+        if (pending > 0) {
+            event.preventDefault();
+            window.alert('Please wait for the image uploads to finish.');
+        }
+    }, true);
+})();
@@ -1,14 +1,33 @@
 """
 S3 Storage backend that correctly handles Django's storage configuration
 """
+import threading
+
 from django.conf import settings
 
+_storage = None
+_storage_lock = threading.Lock()
 
-def get_storage():
-    """Get the configured storage backend"""
+
+def _build_storage():
     if settings.DEFAULT_FILE_STORAGE == 'storages.backends.s3boto3.S3Boto3Storage':
-        from storages.backends.s3boto3 import S3Boto3Storage
-        return S3Boto3Storage()
+        from .s3 import PublicS3Storage
+        return PublicS3Storage()
     else:
         from django.core.files.storage import FileSystemStorage
         return FileSystemStorage()
+
+
+def get_storage():
+    """
+    Get the configured storage backend.
+    The instance is shared process-wide, so boto3 sessions and their
+    connection pools (one per thread, see AWS_S3_CLIENT_CONFIG) are reused
+    instead of being rebuilt for every new storage object.
+    """
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = _build_storage()
+    return _storage
@@ -0,0 +1,48 @@
+"""
+Background job handlers (see core.jobs); queued from core.signals
+"""
+from django.apps import apps
+from core.cache import bump_catalog_version
+from core.events import emit
+from core.images import delete_derivatives, refresh_image_variants
+from core.jobs import task
+
+
+def get_instance(model, pk):
+    """The row a job refers to, or None when it has been deleted since"""
+    return apps.get_model(model)._default_manager.filter(pk=pk).first()
+
+
+@task('images.derivatives')
+def generate_image_derivatives(model, pk, field='image'):
+    """Generate responsive derivatives (and record the original's dimensions)"""
+    instance = get_instance(model, pk)
+    if instance is not None and refresh_image_variants(instance, field):
+        bump_catalog_version()
+
+
+@task('images.delete_derivatives')
+def delete_image_derivatives(model, names, field='image'):
+    """Delete the derivative files of a row that no longer exists"""
+    delete_derivatives(apps.get_model(model)._meta.get_field(field).storage, names)
+
+
+@task('images.check_upload')
+def verify_image_upload(model, pk, field='image'):
+    """Post-upload check: the stored object exists; logs its size and public URL"""
+    instance = get_instance(model, pk)
+    image = getattr(instance, field, None)
+    if not image:
+        return
+    storage = image.storage
+    if not storage.exists(image.name):
+        raise FileNotFoundError(f"{image.name} is missing from {type(storage).__name__}")
+    emit(
+        'upload.verified',
+        model=model,
+        pk=pk,
+        name=image.name,
+        size=storage.size(image.name),
+        backend=type(storage).__name__,
+        url=image.url,
+    )
@@ -1,9 +1,65 @@
 """
 Test file for core app
 """
-from django.test import TestCase
+import csv
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock, skipIf
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
-from .models import HousePlan
+try:
+    from moto import mock_aws  # optional test dependency for the direct upload tests
+except ImportError:
+    mock_aws = None
+from django.urls import reverse
+from rest_framework.test import APIClient
+from .models import HousePlan, Floor, Feature, Amenity, HousePlanImage, SiteSettings, Job, Contact, Quote, Purchase
+from .pagination import EstimatedCountPaginator, HousePlanCursorPagination
+from .checks import check_throttle_cache, check_throttle_cache_deploy
+from .intake import flush as flush_intake
+from .jobs import TASKS, enqueue, run_pending
+from .logs import JSONFormatter, QueueListenerHandler
+from .media import media_base_url, media_url
+from .metrics import Histogram, REGISTRY, upload_duration_seconds, upload_size_bytes
+from .storage import get_storage
+
+
+def create_plan(name="Test Plan", floors=2, **kwargs):
+    """Create a house plan with a floor, feature, amenity and image per level"""
+    fields = {'price': 250000, 'bedrooms': 3, 'bathrooms': 2, 'square_feet': 2500}
+    fields.update(kwargs)
+    plan = HousePlan.objects.create(name=name, **fields)
+    levels = [choice for choice, _ in Floor.LEVEL_CHOICES][:floors]
+    for order, level in enumerate(levels):
+        Floor.objects.create(house_plan=plan, level=level, floor_area=100, lounges=1, dining_areas=1, order=order)
+        Feature.objects.create(house_plan=plan, name=f"Feature {order}", order=order)
+        Amenity.objects.create(house_plan=plan, name=f"Amenity {order}", order=order)
+        HousePlanImage.objects.create(house_plan=plan, image=f"plans/{name}-{order}.jpg", order=order)
+    return plan
+
+
+class CatalogAPITestCase(TestCase):
+    """Base class for API tests; starts every test with empty caches"""
+
+    def setUp(self):
+        cache.clear()
+        SiteSettings.clear_cache()
+        self.client = APIClient()
+
 
 class HousePlanTestCase(TestCase):
     def setUp(self):
@@ -18,3 +74,1185 @@ class HousePlanTestCase(TestCase):
     def test_house_plan_creation(self):
         plan = HousePlan.objects.get(name="Test Plan")
         self.assertEqual(plan.bedrooms, 3)
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=0)
+class HousePlanQueryBudgetTestCase(CatalogAPITestCase):
+    """
+    The plan endpoints must use a fixed number of queries regardless of catalog size.
+    Budgets include the conditional GET probe (see core.conditional).
+    """
+    LIST_BUDGET = 2
+    EXPANDED_LIST_BUDGET = 6
+    DETAIL_BUDGET = 6
+
+    def test_list_query_budget_is_constant(self):
+        create_plan("Plan 1")
+        with self.assertNumQueries(self.LIST_BUDGET):
+            self.client.get(reverse('houseplan-list'))
+        for i in range(2, 12):
+            create_plan(f"Plan {i}", floors=3)
+        with self.assertNumQueries(self.LIST_BUDGET):
+            response = self.client.get(reverse('houseplan-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 11)
+
+    def test_expanded_list_query_budget_is_constant(self):
+        for i in range(10):
+            create_plan(f"Plan {i}", floors=3)
+        url = reverse('houseplan-list') + '?expand=floors,features,amenities,plan_images'
+        with self.assertNumQueries(self.EXPANDED_LIST_BUDGET):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data[0]['floors']), 3)
+
+    def test_detail_query_budget(self):
+        plan = create_plan(floors=3)
+        with self.assertNumQueries(self.DETAIL_BUDGET):
+            response = self.client.get(reverse('houseplan-detail', args=[plan.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([f['order'] for f in response.data['floors']], [0, 1, 2])
+        self.assertEqual(len(response.data['plan_images']), 3)
+
+
+class HousePlanFieldsetTestCase(CatalogAPITestCase):
+    """List responses are compact by default and honour ?fields= / ?expand="""
+
+    def setUp(self):
+        super().setUp()
+        self.plan = create_plan(description="Long description")
+
+    def test_list_uses_summary_representation(self):
+        item = self.client.get(reverse('houseplan-list')).data[0]
+        self.assertIn('image_url', item)
+        self.assertNotIn('floors', item)
+        self.assertNotIn('description', item)
+
+    def test_expand_adds_nested_collections(self):
+        response = self.client.get(reverse('houseplan-list') + '?expand=features,description')
+        item = response.data[0]
+        self.assertEqual([f['name'] for f in item['features']], ['Feature 0', 'Feature 1'])
+        self.assertEqual(item['description'], "Long description")
+
+    def test_fields_trims_representation(self):
+        response = self.client.get(reverse('houseplan-list') + '?fields=id,name,floors&expand=floors')
+        self.assertEqual(set(response.data[0]), {'id', 'name', 'floors'})
+
+    def test_detail_keeps_full_representation(self):
+        response = self.client.get(reverse('houseplan-detail', args=[self.plan.pk]))
+        self.assertIn('floors', response.data)
+        self.assertEqual(response.data['description'], "Long description")
+        response = self.client.get(reverse('houseplan-detail', args=[self.plan.pk]) + '?fields=id,price')
+        self.assertEqual(set(response.data), {'id', 'price'})
+
+
+class HousePlanPaginationTestCase(CatalogAPITestCase):
+    """Cursor pagination is opt-in and walks the catalog newest first"""
+
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            create_plan(f"Plan {i}", floors=1)
+
+    def test_unpaginated_by_default(self):
+        response = self.client.get(reverse('houseplan-list'))
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 5)
+
+    def test_cursor_pages_cover_catalog(self):
+        url = reverse('houseplan-list') + '?page_size=2'
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen.extend(plan['name'] for plan in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, [f"Plan {i}" for i in reversed(range(5))])
+
+    def test_page_size_is_capped(self):
+        with mock.patch.object(HousePlanCursorPagination, 'max_page_size', 3):
+            response = self.client.get(reverse('houseplan-list') + '?page_size=100000')
+        self.assertEqual(len(response.data['results']), 3)
+
+
+class HousePlanSearchTestCase(CatalogAPITestCase):
+    """Faceted search filters in the database with a bounded query count"""
+    SEARCH_BUDGET = 8
+
+    def setUp(self):
+        super().setUp()
+        for i in range(8):
+            create_plan(f"Plan {i}", floors=1, bedrooms=2 + i % 3, price=100000 + i * 10000,
+                        is_new=i % 2 == 0, pet_friendly=i < 3)
+
+    def test_filters_and_facets(self):
+        url = reverse('houseplan-search') + '?bedrooms_min=3&sort=price'
+        with self.assertNumQueries(self.SEARCH_BUDGET):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(len(response.data['results']), 5)
+        prices = [float(plan['price']) for plan in response.data['results']]
+        self.assertEqual(prices, sorted(prices))
+        facets = response.data['facets']
+        # A facet ignores its own filter, so the bedrooms facet still offers 2
+        self.assertEqual(facets['bedrooms'], [{'value': 2, 'count': 3}, {'value': 3, 'count': 3}, {'value': 4, 'count': 2}])
+        self.assertEqual(facets['flags']['pet_friendly'], 2)
+
+    def test_flag_facets_exclude_their_own_filter(self):
+        response = self.client.get(reverse('houseplan-search') + '?is_new=true&bedrooms_max=3')
+        facets = response.data['facets']
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(facets['flags']['is_new'], 3)  # new plans among those with <= 3 bedrooms
+        self.assertEqual(facets['flags']['pet_friendly'], 1)  # within the results
+        self.assertEqual(facets['bedrooms'], [{'value': 2, 'count': 2}, {'value': 3, 'count': 1}, {'value': 4, 'count': 1}])
+
+    def test_pages_do_not_overlap_on_equal_sort_values(self):
+        HousePlan.objects.update(price=100000)
+        names = []
+        for page in (1, 2):
+            response = self.client.get(reverse('houseplan-search') + f'?sort=price&page={page}')
+            names += [plan['name'] for plan in response.data['results']]
+        self.assertEqual(sorted(names), sorted(f"Plan {i}" for i in range(8)))
+
+    def test_results_are_paginated(self):
+        response = self.client.get(reverse('houseplan-search') + '?page=2')
+        self.assertEqual(response.data['count'], 8)
+        self.assertEqual(response.data['num_pages'], 2)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_invalid_filter_returns_400(self):
+        response = self.client.get(reverse('houseplan-search') + '?price_min=cheap')
+        self.assertEqual(response.status_code, 400)
+
+
+class HomeEndpointTestCase(CatalogAPITestCase):
+    """The homepage endpoint returns settings and both plan sections in one response"""
+
+    def setUp(self):
+        super().setUp()
+        SiteSettings.objects.create(company_phone="0123456789")
+        create_plan("Popular", floors=2, is_popular=True)
+        create_plan("Best Seller", floors=1, is_best_selling=True)
+        create_plan("Regular", floors=1)
+
+    def test_home_payload(self):
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['settings']['company_phone'], "0123456789")
+        self.assertEqual([plan['name'] for plan in response.data['popular']], ["Popular"])
+        self.assertEqual([plan['name'] for plan in response.data['best_selling']], ["Best Seller"])
+        self.assertEqual(len(response.data['popular'][0]['plan_images']), 2)
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=600)
+class CatalogCacheTestCase(CatalogAPITestCase):
+    """Catalog responses are served from cache until a catalog model changes"""
+
+    def setUp(self):
+        super().setUp()
+        self.plan = create_plan(floors=1)
+
+    def test_cache_key_varies_by_scheme(self):
+        self.client.get(reverse('houseplan-list'))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('houseplan-list'), secure=True)
+        self.assertTrue(queries.captured_queries)  # absolute media URLs differ, so no shared entry
+
+    def test_cached_list_skips_database(self):
+        self.client.get(reverse('houseplan-list'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('houseplan-list'))
+        self.assertEqual(response.data[0]['name'], "Test Plan")
+
+    def test_child_change_invalidates_cache(self):
+        url = reverse('houseplan-detail', args=[self.plan.pk])
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Feature.objects.create(house_plan=self.plan, name="Solar", order=5)
+        response = self.client.get(url)
+        self.assertIn("Solar", [f['name'] for f in response.data['features']])
+
+    def test_settings_change_invalidates_cache(self):
+        self.client.get(reverse('site-settings'))
+        with self.captureOnCommitCallbacks(execute=True):
+            SiteSettings.objects.create(company_email="info@example.com")
+        response = self.client.get(reverse('site-settings'))
+        self.assertEqual(response.data['company_email'], "info@example.com")
+
+
+class ConditionalGetTestCase(CatalogAPITestCase):
+    """Plan and settings endpoints emit validators and answer 304 when unchanged"""
+
+    def setUp(self):
+        super().setUp()
+        self.plan = create_plan(floors=1)
+        SiteSettings.objects.create(company_phone="0123456789")
+
+    def assert_revalidates(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response.headers)
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+        etag = response.headers['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+        return etag
+
+    def test_list_detail_settings_and_home_revalidate(self):
+        for url in (reverse('houseplan-list'), reverse('houseplan-detail', args=[self.plan.pk]),
+                    reverse('site-settings'), reverse('home')):
+            self.assert_revalidates(url)
+
+    def test_not_modified_skips_serialization(self):
+        url = reverse('houseplan-detail', args=[self.plan.pk])
+        etag = self.client.get(url).headers['ETag']
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_child_change_changes_etag(self):
+        url = reverse('houseplan-detail', args=[self.plan.pk])
+        etag = self.assert_revalidates(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Amenity.objects.create(house_plan=self.plan, name="Pool", order=9)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_missing_plan_is_404(self):
+        response = self.client.get(reverse('houseplan-detail', args=[self.plan.pk + 100]))
+        self.assertEqual(response.status_code, 404)
+
+
+class SiteSettingsSingletonTestCase(CatalogAPITestCase):
+    """Site settings are a cached single row under a fixed primary key"""
+
+    def test_save_keeps_single_row(self):
+        SiteSettings(company_phone="111").save()
+        with self.assertNumQueries(1):
+            SiteSettings(company_phone="222").save()
+        self.assertEqual(SiteSettings.objects.count(), 1)
+        self.assertEqual(SiteSettings.objects.get().pk, SiteSettings.SINGLETON_PK)
+        self.assertEqual(SiteSettings.load().company_phone, "222")
+
+    def test_load_is_served_from_memory(self):
+        SiteSettings.objects.create(company_email="info@example.com")
+        SiteSettings.load()
+        with self.assertNumQueries(0):
+            self.assertEqual(SiteSettings.load().company_email, "info@example.com")
+
+    def test_load_expires_after_timeout(self):
+        SiteSettings.objects.create(company_email="info@example.com")
+        SiteSettings.load()
+        # Another worker's save does not bump a process-local catalog version
+        SiteSettings.objects.update(company_email="new@example.com")
+        self.assertEqual(SiteSettings.load().company_email, "info@example.com")
+        with mock.patch('core.models.time.monotonic', return_value=time.monotonic() + 31):
+            self.assertEqual(SiteSettings.load().company_email, "new@example.com")
+
+    def test_save_honours_update_fields(self):
+        SiteSettings(company_phone="111", company_email="a@example.com").save()
+        SiteSettings(company_phone="222", company_email="b@example.com").save(update_fields=['company_phone'])
+        self.assertEqual(SiteSettings.objects.values_list('company_phone', 'company_email').get(),
+                         ("222", "a@example.com"))
+
+    def test_load_returns_none_when_unset(self):
+        self.assertIsNone(SiteSettings.load())
+
+
+class HousePlanAggregatesTestCase(TestCase):
+    """Denormalized floor totals and cover image follow floor and image writes"""
+
+    def test_aggregates_follow_floor_changes(self):
+        plan = create_plan(floors=2)
+        plan.refresh_from_db()
+        self.assertEqual((plan.floor_count, plan.total_floor_area, plan.total_lounges, plan.total_dining_areas),
+                         (2, 200, 2, 2))
+        plan.floors.first().delete()
+        plan.refresh_from_db()
+        self.assertEqual((plan.floor_count, plan.total_floor_area), (1, 100))
+
+    def test_cover_image_prefers_primary_image(self):
+        plan = create_plan(floors=2)
+        plan.refresh_from_db()
+        self.assertEqual(plan.cover_image, "plans/Test Plan-0.jpg")
+        plan.image = "plans/primary.jpg"
+        plan.save()
+        plan.refresh_from_db()
+        self.assertEqual(plan.cover_image, "plans/primary.jpg")
+
+    def test_backfill_command(self):
+        plan = create_plan(floors=3)
+        HousePlan.objects.update(floor_count=0, total_floor_area=0, cover_image='')
+        call_command('backfill_plan_aggregates', stdout=StringIO())
+        plan.refresh_from_db()
+        self.assertEqual((plan.floor_count, plan.total_floor_area), (3, 300))
+        self.assertEqual(plan.cover_image, "plans/Test Plan-0.jpg")
+
+
+class HousePlanFullTextSearchTestCase(CatalogAPITestCase):
+    """?search= matches plan, feature and amenity text (LIKE fallback on SQLite)"""
+
+    def setUp(self):
+        super().setUp()
+        self.farmhouse = create_plan("Farmhouse", floors=1, description="Wrap-around veranda")
+        self.loft = create_plan("City Loft", floors=1)
+        Amenity.objects.create(house_plan=self.loft, name="Rooftop pool", order=5)
+
+    def test_search_document_tracks_children(self):
+        self.loft.refresh_from_db()
+        self.assertIn("Rooftop pool", self.loft.search_document)
+        self.loft.amenities.get(name="Rooftop pool").delete()
+        self.loft.refresh_from_db()
+        self.assertNotIn("Rooftop pool", self.loft.search_document)
+
+    def test_list_search(self):
+        response = self.client.get(reverse('houseplan-list') + '?search=veranda')
+        self.assertEqual([plan['name'] for plan in response.data], ["Farmhouse"])
+        response = self.client.get(reverse('houseplan-list') + '?search=rooftop+POOL')
+        self.assertEqual([plan['name'] for plan in response.data], ["City Loft"])
+
+    def test_paginated_search_keeps_rank_order(self):
+        # Stand-in for the PostgreSQL rank order, which a cursor would replace with -created_at
+        ranked = mock.patch('core.search.search_plans', lambda queryset, terms: queryset.order_by('-name'))
+        with ranked, mock.patch('core.pagination.HousePlanRankedListPagination.page_size', 1):
+            response = self.client.get(reverse('houseplan-list') + '?search=home&cursor=')
+        self.assertEqual((response.data['count'], [plan['name'] for plan in response.data['results']]), (2, ["Farmhouse"]))
+        self.assertIn('page=2', response.data['next'])
+        with ranked:
+            response = self.client.get(reverse('houseplan-list') + '?search=home&page_size=10')
+        self.assertEqual([plan['name'] for plan in response.data['results']], ["Farmhouse", "City Loft"])
+
+    def test_search_endpoint_combines_with_filters(self):
+        response = self.client.get(reverse('houseplan-search') + '?search=feature&bedrooms_min=3')
+        self.assertEqual(response.data['count'], 2)
+        response = self.client.get(reverse('houseplan-search') + '?search=nothing-matches')
+        self.assertEqual(response.data['count'], 0)
+
+
+class StorageTestCase(TestCase):
+    """Storage is a process-wide singleton and public S3 URLs need no boto call"""
+
+    def test_storage_is_shared(self):
+        self.assertIs(get_storage(), get_storage())
+        self.assertIs(HousePlan._meta.get_field('image').storage, HousePlanImage._meta.get_field('image').storage)
+
+    def test_public_s3_url_matches_stock_backend(self):
+        from storages.backends.s3boto3 import S3Boto3Storage
+        from .s3 import PublicS3Storage
+        kwargs = {'bucket_name': 'bucket', 'custom_domain': 'bucket.s3.amazonaws.com', 'querystring_auth': False}
+        name = 'plans/Screenshot 2025-07-20 120142.png'
+        storage = PublicS3Storage(**kwargs)
+        with mock.patch.object(S3Boto3Storage, 'connection', new_callable=mock.PropertyMock) as connection:
+            self.assertEqual(storage.url(name), S3Boto3Storage(**kwargs).url(name))
+            connection.assert_not_called()
+
+
+class MediaURLTestCase(TestCase):
+    """Serializer image URLs come from a base URL resolved once per process"""
+
+    def tearDown(self):
+        media_base_url.cache_clear()
+
+    @override_settings(USE_S3=True, MEDIA_URL='https://bucket.s3.eu-north-1.amazonaws.com/')
+    def test_s3_base(self):
+        media_base_url.cache_clear()
+        self.assertEqual(media_url('plans/a b.jpg'), 'https://bucket.s3.eu-north-1.amazonaws.com/plans/a%20b.jpg')
+
+    @override_settings(USE_S3=False, MEDIA_URL='/media/', BACKEND_URL='http://api.example.com/')
+    def test_local_base_uses_backend_url(self):
+        media_base_url.cache_clear()
+        self.assertEqual(media_url('plans/a.jpg'), 'http://api.example.com/media/plans/a.jpg')
+        self.assertIsNone(media_url(''))
+
+    @override_settings(USE_S3=False, MEDIA_URL='/media/', BACKEND_URL='')
+    def test_relative_base_made_absolute_per_request(self):
+        media_base_url.cache_clear()
+        plan = create_plan(floors=1, image='plans/primary.jpg')
+        cache.clear()
+        data = APIClient().get(reverse('houseplan-detail', args=[plan.pk])).data
+        self.assertEqual(data['image_url'], 'http://testserver/media/plans/primary.jpg')
+        self.assertEqual(data['image'], data['image_url'])
+        self.assertEqual(data['plan_images'][0]['image_url'], 'http://testserver/media/plans/Test%20Plan-0.jpg')
+
+
+@override_settings(IMAGE_DERIVATIVE_WIDTHS=[320, 640, 1280], MEDIA_URL='/media/', BACKEND_URL='http://api.example.com')
+class ImageDerivativeTestCase(TestCase):
+    """Plan images get width-bucketed WebP/JPEG copies exposed as srcset strings"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+        media_base_url.cache_clear()
+        cache.clear()
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+        media_base_url.cache_clear()
+
+    def upload(self, width=1000, height=500, name='house.png'):
+        from PIL import Image
+        buffer = BytesIO()
+        Image.new('RGB', (width, height), 'white').save(buffer, 'PNG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+    def test_derivatives_generated_on_upload(self):
+        plan = create_plan(floors=0, image=self.upload())
+        run_pending()
+        plan.refresh_from_db()
+        variants = plan.image_variants
+        self.assertEqual(variants['source'], plan.image.name)
+        # No upscaling: 1000px original yields 320 and 640 buckets plus a full-width copy
+        self.assertEqual([(v['width'], v['format']) for v in variants['files']],
+                         [(320, 'webp'), (320, 'jpeg'), (640, 'webp'), (640, 'jpeg'), (1000, 'webp'), (1000, 'jpeg')])
+        storage = get_storage()
+        for variant in variants['files']:
+            self.assertTrue(variant['name'].startswith('plans/house'))
+            self.assertTrue(storage.exists(variant['name']))
+
+    def test_srcset_in_api(self):
+        plan = create_plan(floors=0, image=self.upload())
+        HousePlanImage.objects.create(house_plan=plan, image=self.upload(400, 300, 'gallery.png'))
+        run_pending()
+        data = APIClient().get(reverse('houseplan-detail', args=[plan.pk])).data
+        self.assertEqual(
+            data['image_srcset']['webp'].split(', ')[0],
+            'http://api.example.com/media/plans/house_w320.webp 320w',
+        )
+        self.assertEqual(len(data['image_srcset']['jpeg'].split(', ')), 3)
+        self.assertEqual(data['plan_images'][0]['image_srcset']['webp'],
+                         'http://api.example.com/media/plans/gallery_w320.webp 320w, '
+                         'http://api.example.com/media/plans/gallery_w400.webp 400w')
+
+    def test_narrow_image_is_not_upscaled(self):
+        plan = create_plan(floors=0, image=self.upload(500, 250))
+        run_pending()
+        plan.refresh_from_db()
+        self.assertEqual([(v['width'], v['name']) for v in plan.image_variants['files'] if v['format'] == 'webp'],
+                         [(320, 'plans/house_w320.webp'), (500, 'plans/house_w500.webp')])
+
+    def test_replaced_and_deleted_images_remove_derivatives(self):
+        storage = get_storage()
+        plan = create_plan(floors=0, image=self.upload())
+        run_pending()
+        plan.refresh_from_db()
+        old = [v['name'] for v in plan.image_variants['files']]
+        plan.image = self.upload(name='replacement.png')
+        plan.save()
+        run_pending()
+        plan.refresh_from_db()
+        self.assertFalse(any(storage.exists(name) for name in old))
+        new = [v['name'] for v in plan.image_variants['files']]
+        self.assertTrue(all(storage.exists(name) and 'replacement' in name for name in new))
+        plan.delete()
+        run_pending()
+        self.assertFalse(any(storage.exists(name) for name in new))
+
+    def test_unreadable_image_is_skipped(self):
+        plan = create_plan(floors=1, image='plans/missing.jpg')
+        run_pending()
+        plan.refresh_from_db()
+        self.assertEqual(plan.image_variants, {})
+        self.assertTrue(Job.objects.filter(task='images.derivatives', status='pending', attempts=1).exists())
+        self.assertIsNone(APIClient().get(reverse('houseplan-detail', args=[plan.pk])).data['image_srcset'])
+
+    def test_backfill_command(self):
+        plan = create_plan(floors=0, image=self.upload())
+        HousePlan.objects.filter(pk=plan.pk).update(image_variants={})
+        out = StringIO()
+        call_command('generate_image_derivatives', stdout=out)
+        plan.refresh_from_db()
+        self.assertEqual(plan.image_variants['source'], plan.image.name)
+        self.assertIn('Generated derivatives for 1 images', out.getvalue())
+
+
+@override_settings(JOBS_EAGER=False, JOB_MAX_ATTEMPTS=2, JOB_RETRY_DELAY=30)
+class JobQueueTestCase(TestCase):
+    """Image side effects are queued and processed by the run_jobs worker"""
+
+    def setUp(self):
+        self.calls = []
+        # Register the test handler for this test only, not in the module-wide registry
+        patcher = mock.patch.dict(TASKS, {'tests.flaky': self.flaky})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def flaky(self, fail=False):
+        self.calls.append(fail)
+        if fail:
+            raise RuntimeError('boom')
+
+    def test_image_save_queues_jobs_once(self):
+        plan = HousePlan.objects.create(name='Queued', price=1, square_feet=1, image='plans/queued.jpg')
+        plan.name = 'Queued again'
+        plan.save()
+        self.assertEqual(
+            sorted(Job.objects.filter(key=f'core.houseplan:{plan.pk}').values_list('task', flat=True)),
+            ['images.check_upload', 'images.derivatives'],
+        )
+        self.assertEqual(plan.image_variants, {})
+
+    def test_retry_with_backoff_then_fail(self):
+        job = enqueue('tests.flaky', fail=True)
+        self.assertEqual(run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('pending', 1))
+        self.assertIn('RuntimeError: boom', job.last_error)
+        self.assertGreater(job.run_at, job.updated_at)
+        self.assertEqual(run_pending(), 0)  # not due yet
+
+        Job.objects.filter(pk=job.pk).update(run_at=job.updated_at)
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+        out = StringIO()
+        call_command('run_jobs', '--retry-failed', stdout=out)
+        call_command('run_jobs', '--once', stdout=out)
+        self.assertEqual(self.calls, [True, True, True])
+        call_command('run_jobs', '--status', stdout=out)
+        self.assertIn('tests.flaky', out.getvalue())
+
+    def test_success_and_stale_lock_reclaimed(self):
+        job = enqueue('tests.flaky')
+        Job.objects.filter(pk=job.pk).update(status='running', locked_at=job.created_at - timedelta(hours=1))
+        call_command('run_jobs', '--once', stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, self.calls), ('done', 1, [False]))
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = enqueue('tests.flaky')
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+
+
+@skipIf(mock_aws is None, 'moto is not installed')
+@override_settings(DIRECT_UPLOAD_PART_SIZE=5 * 1024 * 1024, DIRECT_UPLOAD_CONTENT_TYPES=['image/jpeg'])
+class DirectUploadTestCase(TestCase):
+    """Presigned multipart uploads against a moto S3 bucket"""
+
+    def setUp(self):
+        self.aws = mock_aws()
+        self.aws.start()
+        self.addCleanup(self.aws.stop)
+        from .s3 import PublicS3Storage
+        self.storage = PublicS3Storage(
+            bucket_name='media', region_name='us-east-1', access_key='test', secret_key='test',
+            custom_domain='media.s3.amazonaws.com', querystring_auth=False,
+        )
+        self.client_s3 = self.storage.connection.meta.client
+        self.client_s3.create_bucket(Bucket='media')
+        patcher = mock.patch('core.uploads.get_storage', return_value=self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user('staff', password='x', is_staff=True))
+        self.plan = create_plan(floors=0)
+
+    def upload(self, size, filename='../Big Plan.jpg'):
+        response = self.api.post(reverse('direct-upload-list'), {
+            'filename': filename, 'content_type': 'image/jpeg', 'size': size,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        started = response.data
+        self.assertRegex(started['key'], r'^plans/[0-9a-f]{32}/\w+\.jpg$')
+        parts = []
+        for part in started['parts']:
+            self.assertIn(f"partNumber={part['part_number']}", part['url'])
+            body = b'x' * min(started['part_size'], size - (part['part_number'] - 1) * started['part_size'])
+            result = self.client_s3.upload_part(
+                Bucket='media', Key=started['key'], UploadId=started['upload_id'],
+                PartNumber=part['part_number'], Body=body,
+            )
+            parts.append({'part_number': part['part_number'], 'etag': result['ETag']})
+        return started, parts
+
+    def test_multipart_upload_and_confirm(self):
+        size = 6 * 1024 * 1024
+        started, parts = self.upload(size)
+        self.assertEqual(len(parts), 2)
+        response = self.api.post(reverse('direct-upload-complete'), {
+            'key': started['key'], 'upload_id': started['upload_id'], 'parts': parts,
+        }, format='json')
+        self.assertEqual(response.data, {'key': started['key'], 'size': size, 'content_type': 'image/jpeg'})
+
+        response = self.api.post(reverse('direct-upload-confirm'), {
+            'key': started['key'], 'house_plan': self.plan.pk, 'title': 'Elevation',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        image = HousePlanImage.objects.get(pk=response.data['id'])
+        self.assertEqual(image.image.name, started['key'])
+        self.assertTrue(Job.objects.filter(task='images.derivatives', key=f'core.houseplanimage:{image.pk}').exists())
+
+    def test_long_filename_is_shortened_to_fit(self):
+        started, parts = self.upload(10, filename='Very long plan name ' * 8 + '.jpg')
+        self.assertEqual(len(started['key']), 100)
+        self.assertRegex(started['key'], r'/Very_long_plan_name_Very_long_plan_name_Very_long_plan_na\.jpg$')
+        response = self.api.post(reverse('direct-upload-complete'), {
+            'key': started['key'], 'upload_id': started['upload_id'], 'parts': parts,
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        response = self.api.post(reverse('direct-upload-confirm'), {
+            'key': started['key'], 'house_plan': self.plan.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_rejections(self):
+        url = reverse('direct-upload-list')
+        response = self.api.post(url, {'filename': 'a.pdf', 'content_type': 'application/pdf', 'size': 10}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.api.post(reverse('direct-upload-confirm'), {
+            'key': 'plans/missing.jpg', 'house_plan': self.plan.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.api.post(reverse('direct-upload-confirm'), {
+            'key': 'homes/other.jpg', 'house_plan': self.plan.pk,
+        }, format='json')
+        self.assertIn('plans/', str(response.data['key']))
+        self.assertEqual(APIClient().post(url, {}, format='json').status_code, 403)
+
+    def test_abort(self):
+        started, _ = self.upload(10)
+        response = self.api.post(reverse('direct-upload-abort'), {
+            'key': started['key'], 'upload_id': started['upload_id'],
+        }, format='json')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client_s3.list_multipart_uploads(Bucket='media').get('Uploads', []), [])
+
+    def test_admin_form_accepts_uploaded_key(self):
+        from .forms import DirectUploadImageField
+        started, parts = self.upload(10)
+        self.api.post(reverse('direct-upload-complete'), {
+            'key': started['key'], 'upload_id': started['upload_id'], 'parts': parts,
+        }, format='json')
+        field = DirectUploadImageField()
+        widget_value = field.widget.value_from_datadict({'image_key': started['key']}, {}, 'image')
+        self.assertEqual(field.clean(widget_value), started['key'])
+        with self.assertRaises(Exception):
+            field.clean('plans/missing.jpg')
+
+
+class DirectUploadLocalStorageTestCase(TestCase):
+    def test_requires_s3(self):
+        api = APIClient()
+        api.force_authenticate(User.objects.create_user('staff', password='x', is_staff=True))
+        response = api.post(reverse('direct-upload-list'), {
+            'filename': 'a.jpg', 'content_type': 'image/jpeg', 'size': 10,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('S3', response.data['detail'])
+
+
+class UploadInstrumentationTestCase(TestCase):
+    """Uploads emit structured events and metrics without touching storage URLs"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        upload_size_bytes.clear()
+        upload_duration_seconds.clear()
+
+    def test_upload_event_and_metrics(self):
+        storage_class = type(get_storage())
+        with mock.patch.object(storage_class, 'url') as url, \
+                self.assertLogs('core.events', level='INFO') as logs:
+            plan = create_plan(floors=0, image=SimpleUploadedFile('plan.jpg', b'x' * 2048))
+        url.assert_not_called()
+        record = logs.records[0]
+        self.assertEqual(record.fields['event'], 'upload.saved')
+        self.assertEqual(record.fields['size'], 2048)
+        self.assertEqual(record.fields['name'], plan.image.name)
+        self.assertEqual(record.fields['backend'], storage_class.__name__)
+
+        labels = (storage_class.__name__, 'core.houseplan')
+        self.assertEqual(upload_size_bytes.samples()[labels]['sum'], 2048)
+        self.assertEqual(upload_duration_seconds.samples()[labels]['count'], 1)
+
+        # Saving again without a new file records nothing
+        plan.save()
+        self.assertEqual(upload_size_bytes.samples()[labels]['count'], 1)
+
+    def test_queue_handler_writes_json_off_thread(self):
+        stream = StringIO()
+        target = logging.StreamHandler(stream)
+        target.setFormatter(JSONFormatter())
+        handler = QueueListenerHandler([target])
+        logger = logging.getLogger('core.tests.queue')
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            logger.warning('upload.saved', extra={'fields': {'size': 10}})
+        finally:
+            logger.removeHandler(handler)
+            logger.propagate = True
+            handler.close()  # stops the listener after draining the queue
+        line = json.loads(stream.getvalue())
+        self.assertEqual((line['message'], line['size'], line['level']), ('upload.saved', 10, 'WARNING'))
+
+    def test_queue_handler_keeps_tracebacks_separate(self):
+        stream = StringIO()
+        target = logging.StreamHandler(stream)
+        target.setFormatter(JSONFormatter())
+        handler = QueueListenerHandler([target])
+        logger = logging.getLogger('core.tests.queue.errors')
+        logger.propagate = False
+        logger.addHandler(handler)
+        try:
+            try:
+                raise ValueError('bad image')
+            except ValueError:
+                logger.exception('upload %s failed', 'x.jpg')
+        finally:
+            logger.removeHandler(handler)
+            logger.propagate = True
+            handler.close()
+        line = json.loads(stream.getvalue())
+        self.assertEqual(line['message'], 'upload x.jpg failed')
+        self.assertTrue(line['exc_info'].startswith('Traceback'))
+        self.assertIn('ValueError: bad image', line['exc_info'])
+
+
+@override_settings(SERVER_TIMING=True, CATALOG_CACHE_TIMEOUT=0, METRICS_TOKEN='scrape', METRICS_ALLOWED_IPS=['127.0.0.1'])
+class RequestTimingTestCase(CatalogAPITestCase):
+    """Server-Timing headers and the per-route Prometheus metrics"""
+
+    def setUp(self):
+        super().setUp()
+        for metric in REGISTRY.values():
+            metric.clear()
+        create_plan()
+
+    def test_server_timing_header(self):
+        with self.assertNumQueries(HousePlanQueryBudgetTestCase.LIST_BUDGET) as queries:
+            response = self.client.get(reverse('houseplan-list'))
+        header = response['Server-Timing']
+        self.assertIn('db;dur=', header)
+        self.assertIn(f'desc="{len(queries.captured_queries)} queries"', header)
+        self.assertRegex(header, r'serialize;dur=[0-9.]+, total;dur=[0-9.]+$')
+
+    def test_metrics_endpoint(self):
+        for _ in range(3):
+            self.client.get(reverse('houseplan-list'))
+        body = self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1').content.decode()
+        self.assertIn('core_requests_total{route="houseplan-list",method="GET",status="200"} 3', body)
+        self.assertIn('core_request_duration_seconds_count{route="houseplan-list",method="GET"} 3', body)
+        self.assertIn('core_request_duration_seconds_bucket{route="houseplan-list",method="GET",le="+Inf"} 3', body)
+        self.assertIn('core_request_duration_seconds_quantile{route="houseplan-list",method="GET",quantile="0.99"}', body)
+
+    def test_metrics_access(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.5').status_code, 403)
+        response = self.client.get(url, REMOTE_ADDR='10.0.0.5', HTTP_AUTHORIZATION='Bearer scrape')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_TOKEN='', METRICS_ALLOWED_IPS=[])
+    def test_metrics_closed_by_default(self):
+        # Behind a local reverse proxy every client arrives from loopback
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1').status_code, 403)
+        response = self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1', HTTP_AUTHORIZATION='Bearer ')
+        self.assertEqual(response.status_code, 403)
+
+    def test_quantile_interpolation(self):
+        histogram = Histogram('test_seconds', 'test', buckets=[0.1, 0.2, 0.4])
+        for value in [0.05] * 50 + [0.15] * 45 + [0.3] * 5:
+            histogram.observe(value)
+        series = histogram.samples()[()]
+        self.assertAlmostEqual(histogram.quantile(0.5, series), 0.1)
+        self.assertAlmostEqual(histogram.quantile(0.95, series), 0.2)
+        self.assertAlmostEqual(histogram.quantile(0.99, series), 0.36)
+
+
+class SeedCatalogTestCase(TestCase):
+    """seed_catalog writes plans with their denormalized fields already consistent"""
+
+    def seed(self, **options):
+        options = {'plans': 5, 'floors': 2, 'features': 2, 'amenities': 1, 'images': 3, 'contacts': 4,
+                   'quotes': 4, 'purchases': 4, 'batch_size': 2, 'no_files': True, **options}
+        call_command('seed_catalog', stdout=StringIO(), **options)
+
+    def test_counts(self):
+        self.seed()
+        self.assertEqual(HousePlan.objects.count(), 5)
+        self.assertEqual((Floor.objects.count(), Feature.objects.count(), Amenity.objects.count(),
+                          HousePlanImage.objects.count()), (10, 10, 5, 15))
+        self.assertEqual((Contact.objects.count(), Purchase.objects.count()), (4, 4))
+        self.assertFalse(Job.objects.exists())
+
+    def test_denormalized_fields_match_recomputed_values(self):
+        self.seed()
+        seeded = list(HousePlan.objects.order_by('pk').values_list(
+            'floor_count', 'total_floor_area', 'total_lounges', 'cover_image', 'search_document'))
+        HousePlan.objects.all().refresh_aggregates()
+        HousePlan.objects.all().refresh_search_documents()
+        self.assertEqual(seeded, list(HousePlan.objects.order_by('pk').values_list(
+            'floor_count', 'total_floor_area', 'total_lounges', 'cover_image', 'search_document')))
+
+    def test_deterministic(self):
+        self.seed(seed=7)
+        first = list(HousePlan.objects.order_by('pk').values_list('name', 'price'))
+        HousePlan.objects.all().delete()
+        self.seed(seed=7)
+        self.assertEqual(first, list(HousePlan.objects.order_by('pk').values_list('name', 'price')))
+
+
+class CatalogTransferTestCase(TestCase):
+    """export_plans/import_plans round-trip the plan graph and match plans by name"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        create_plan("Alpha", floors=2, description="Open plan living")
+        create_plan("Beta", floors=3)
+
+    def export(self, filename):
+        path = f'{self.tmp}/{filename}'
+        call_command('export_plans', output=path, stderr=StringIO())
+        return path
+
+    def import_plans(self, path, *args):
+        out = StringIO()
+        call_command('import_plans', path, *args, stdout=out)
+        return out.getvalue()
+
+    def snapshot(self):
+        return [
+            (plan.name, plan.price, plan.floor_count, plan.total_floor_area, plan.cover_image, plan.search_document,
+             [(floor.level, floor.floor_area) for floor in plan.floors.all()],
+             [image.image.name for image in plan.plan_images.all()])
+            for plan in HousePlan.objects.order_by('name').prefetch_related('floors', 'plan_images')
+        ]
+
+    def test_round_trip_into_empty_catalog(self):
+        for filename in ('plans.ndjson', 'plans.csv'):
+            before = self.snapshot()
+            path = self.export(filename)
+            HousePlan.objects.all().delete()
+            self.assertIn('Plans: 2 created', self.import_plans(path))
+            self.assertEqual(self.snapshot(), before)
+            self.assertIn('0 updated, 2 unchanged', self.import_plans(path))
+
+    def test_updates_matched_plans(self):
+        path = self.export('plans.csv')
+        with open(path) as stream:
+            rows = list(csv.DictReader(stream))
+        rows[0]['price'] = '300000.00'
+        floors = json.loads(rows[0]['floors'])
+        floors[0]['floor_area'] = 150
+        rows[0]['floors'] = json.dumps(floors[:1])
+        with open(path, 'w', newline='') as stream:
+            writer = csv.DictWriter(stream, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+        output = self.import_plans(path, '--prune')
+        self.assertIn('Plans: 0 created, 1 updated, 1 unchanged', output)
+        self.assertIn('1 updated, 1 deleted', output)
+        plan = HousePlan.objects.get(name="Alpha")
+        self.assertEqual(plan.price, 300000)
+        self.assertEqual((plan.floor_count, plan.total_floor_area), (1, 150))
+
+    def test_invalid_record(self):
+        path = f'{self.tmp}/plans.ndjson'
+        with open(path, 'w') as stream:
+            stream.write(json.dumps({'name': 'Gamma', 'price': 'free', 'square_feet': 10}) + '\n')
+        with self.assertRaisesMessage(CommandError, 'Record 1'):
+            self.import_plans(path)
+        self.assertFalse(HousePlan.objects.filter(name='Gamma').exists())
+
+
+class AdminCSVExportTestCase(TestCase):
+    """Changelist CSV exports stream every row matching the active filters"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        self.client.force_login(self.admin)
+        Contact.objects.create(name="Read", email="read@example.com", message="Hi", is_read=True)
+        Contact.objects.create(name="=HYPERLINK(\"x\")", email="unread@example.com", message="Hi")
+
+    def rows(self, response):
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="contacts-', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(content.startswith('﻿'))
+        return list(csv.reader(StringIO(content[1:])))
+
+    def test_export_respects_changelist_filters(self):
+        response = self.client.get(reverse('admin:core_contact_export'), {'is_read__exact': '1'})
+        rows = self.rows(response)
+        self.assertEqual(rows[0][:3], ['ID', 'Received', 'Name'])
+        self.assertEqual([row[2] for row in rows[1:]], ['Read'])
+        self.assertEqual(rows[1][-1], 'Yes')
+
+    def test_export_action_escapes_formulas(self):
+        response = self.client.post(reverse('admin:core_contact_changelist'), {
+            'action': 'export_csv', '_selected_action': list(Contact.objects.values_list('pk', flat=True)),
+        })
+        names = [row[2] for row in self.rows(response)[1:]]
+        self.assertIn("'=HYPERLINK(\"x\")", names)
+
+    def test_export_requires_permission(self):
+        staff = User.objects.create_user('staff', 'staff@example.com', 'pass', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(reverse('admin:core_contact_export')).status_code, 403)
+
+
+class AdminChangelistScalingTestCase(TestCase):
+    """Quote/Purchase changelists: joined plan loading, autocomplete plan filter, estimated counts"""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pass'))
+        self.plans = [HousePlan.objects.create(name=f"Plan {n}", price=1000, square_feet=100) for n in range(3)]
+
+    def add_quotes(self, count):
+        for n in range(count):
+            Quote.objects.create(name=f"Lead {n}", email="lead@example.com", phone="1",
+                                 house_plan=self.plans[n % len(self.plans)])
+
+    def test_query_count_does_not_grow_with_rows(self):
+        url = reverse('admin:core_quote_changelist')
+        self.add_quotes(2)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        self.add_quotes(10)
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(url)
+        self.assertEqual(len(few.captured_queries), len(many.captured_queries))
+
+    def test_autocomplete_plan_filter(self):
+        self.add_quotes(6)
+        response = self.client.get(reverse('admin:core_quote_changelist'),
+                                   {'house_plan__id__exact': self.plans[1].pk})
+        self.assertEqual(response.context['cl'].result_count, 2)
+        content = response.content.decode()
+        self.assertIn('admin-autocomplete', content)
+        self.assertIn('core/admin/autocomplete_filter.js', content)
+        # Only the selected plan is rendered as an option, not the whole catalog
+        self.assertIn(f'<option value="{self.plans[1].pk}" selected>Plan 1</option>', content)
+        self.assertNotIn('>Plan 2</option>', content)
+
+    def test_estimated_count_paginator(self):
+        self.add_quotes(3)
+        paginator = EstimatedCountPaginator(Quote.objects.all(), 2)
+        self.assertEqual(paginator.count, 3)  # exact on SQLite
+        with mock.patch.object(EstimatedCountPaginator, 'estimated_count', return_value=5_000_000):
+            self.assertEqual(EstimatedCountPaginator(Quote.objects.all(), 2).count, 5_000_000)
+        with mock.patch.object(EstimatedCountPaginator, 'estimated_count', return_value=50):
+            self.assertEqual(EstimatedCountPaginator(Quote.objects.all(), 2).count, 3)
+
+    def test_estimated_count_only_for_unfiltered_tables(self):
+        self.add_quotes(3)
+        with mock.patch('core.pagination.connections') as connections:
+            connection = connections.__getitem__.return_value
+            connection.vendor = 'postgresql'
+            connection.cursor.return_value.__enter__.return_value.fetchone.return_value = (5_000_000,)
+            self.assertEqual(EstimatedCountPaginator(Quote.objects.all(), 2).count, 5_000_000)
+            self.assertEqual(EstimatedCountPaginator(Quote.objects.filter(pk__gt=0), 2).count, 3)
+
+    def test_stale_estimate_falls_back_to_last_page(self):
+        self.add_quotes(3)
+        with mock.patch.object(EstimatedCountPaginator, 'estimated_count', return_value=5_000_000):
+            paginator = EstimatedCountPaginator(Quote.objects.order_by('pk'), 2)
+            self.assertEqual(paginator.num_pages, 2_500_000)
+            page = paginator.page(40)
+        self.assertEqual(page.number, 2)
+        self.assertEqual(len(page.object_list), 1)
+        self.assertEqual((paginator.count, paginator.num_pages), (3, 2))
+
+
+THROTTLED = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'submissions_ip': '2/min', 'submissions_global': '5/min'}}
+
+
+@override_settings(REST_FRAMEWORK=THROTTLED)
+class SubmissionThrottleTestCase(TestCase):
+    """Public submissions are limited per client IP and globally"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def post(self, ip):
+        return self.client.post(reverse('contact-list'), {'name': 'A', 'email': 'a@example.com', 'message': 'Hi'},
+                                format='json', REMOTE_ADDR=ip)
+
+    def test_per_ip_limit(self):
+        self.assertEqual([self.post('10.0.0.1').status_code for _ in range(3)], [201, 201, 429])
+        response = self.post('10.0.0.1')
+        self.assertTrue(0 < int(response['Retry-After']) <= 60)
+        self.assertEqual(self.post('10.0.0.2').status_code, 201)
+
+    def test_forwarded_for_does_not_reset_the_limit(self):
+        statuses = [self.client.post(reverse('contact-list'), {'name': 'A', 'email': 'a@example.com', 'message': 'Hi'},
+                                     format='json', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=f'203.0.113.{n}').status_code
+                    for n in range(3)]
+        self.assertEqual(statuses, [201, 201, 429])
+
+    def test_global_limit(self):
+        statuses = [self.post(f'10.0.1.{n}').status_code for n in range(6)]
+        self.assertEqual(statuses, [201] * 5 + [429])
+
+    def test_reads_are_not_limited(self):
+        for _ in range(4):
+            self.post('10.0.0.1')
+        self.assertNotEqual(self.client.get(reverse('contact-list'), REMOTE_ADDR='10.0.0.1').status_code, 429)
+
+
+class SharedCacheCheckTestCase(TestCase):
+    """Throttles are refused over a process-local cache outside DEBUG"""
+
+    def test_throttles_require_shared_cache(self):
+        with override_settings(DEBUG=False):
+            self.assertEqual([issue.id for issue in check_throttle_cache(None)], ['core.W001'])
+            self.assertEqual([issue.id for issue in check_throttle_cache_deploy(None)], ['core.E001'])
+            with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                                                       'LOCATION': 'cedric_cache'}}):
+                self.assertEqual(check_throttle_cache_deploy(None), [])
+            disabled = {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}}
+            with override_settings(REST_FRAMEWORK=disabled):
+                self.assertEqual(check_throttle_cache_deploy(None), [])
+        with override_settings(DEBUG=True):
+            self.assertEqual(check_throttle_cache_deploy(None), [])
+
+
+@override_settings(INTAKE_BUFFERED=True, INTAKE_FLUSH_INTERVAL=0)
+class BufferedIntakeTestCase(TestCase):
+    """Buffered mode spools validated submissions and flushes them in batches, exactly once"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.spool = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool)
+        self.override = override_settings(INTAKE_SPOOL_DIR=self.spool)
+        self.override.enable()
+        self.addCleanup(self.override.disable)
+
+    def submit_quote(self, **data):
+        body = {'name': 'Lead', 'email': 'lead@example.com', 'phone': '0800000000', 'requirements': 'Double garage', **data}
+        return self.client.post(reverse('quote-list'), body, format='json')
+
+    def test_submissions_are_spooled_then_flushed(self):
+        plan = create_plan()
+        response = self.submit_quote(house_plan=plan.pk)
+        self.assertEqual(response.status_code, 202)
+        self.submit_quote()
+        self.assertFalse(Quote.objects.exists())
+        self.assertEqual(len(os.listdir(self.spool)), 1)
+
+        self.assertEqual(flush_intake(), 2)
+        quote = Quote.objects.get(intake_id=response.data['intake_id'])
+        self.assertEqual(quote.house_plan, plan)
+        self.assertEqual(os.listdir(self.spool), [])
+        self.assertEqual(flush_intake(), 0)
+
+    def test_invalid_submission_is_rejected_up_front(self):
+        self.assertEqual(self.submit_quote(email='not-an-email').status_code, 400)
+        self.assertEqual(os.listdir(self.spool), [])
+
+    def test_replayed_batch_and_orphaned_spool(self):
+        self.submit_quote()
+        self.submit_quote(house_plan=create_plan().pk)
+        [spool_file] = os.listdir(self.spool)
+        with open(os.path.join(self.spool, spool_file)) as stream:
+            lines = stream.read()
+        HousePlan.objects.all().delete()
+        flush_intake()
+        # A crash after commit leaves the batch behind; a dead worker leaves its spool
+        with open(os.path.join(self.spool, '999999-replay.batch'), 'w') as stream:
+            stream.write(lines)
+        with open(os.path.join(self.spool, '999999.ndjson'), 'w') as stream:
+            stream.write(lines + '{"torn": ')
+        with mock.patch('core.intake.pid_alive', side_effect=lambda pid: pid == os.getpid()):
+            flush_intake()
+        self.assertEqual(Quote.objects.count(), 2)
+        self.assertEqual(Quote.objects.filter(house_plan__isnull=True).count(), 2)
+        self.assertEqual(os.listdir(self.spool), [])
+
+    def test_purchases_are_never_buffered(self):
+        plan = create_plan()
+        response = self.client.post(reverse('purchase-list'), {
+            'name': 'Buyer', 'email': 'b@example.com', 'phone': '1', 'house_plan': plan.pk, 'plan_price': '1500.00',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Purchase.objects.filter(pk=response.data['id']).exists())
+
+
+class PaymentStatusTestCase(TestCase):
+    """Yoco callbacks move purchases through the payment state machine exactly once"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.purchase = Purchase.objects.create(name='Buyer', email='b@example.com', phone='1', plan_price='1500.00')
+        self.url = reverse('purchase-update-payment-status', args=[self.purchase.pk])
+
+    def callback(self, payment_status, key=None, **data):
+        headers = {'HTTP_IDEMPOTENCY_KEY': key} if key else {}
+        return self.client.post(self.url, {'payment_status': payment_status, **data}, format='json', **headers)
+
+    def test_transition_is_applied_and_recorded(self):
+        response = self.callback('completed', key='evt_1', yoco_payment_id='ch_1', yoco_reference='ref')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['payment_status'], 'completed')
+        self.purchase.refresh_from_db()
+        self.assertIsNotNone(self.purchase.paid_at)
+        self.assertEqual((self.purchase.yoco_payment_id, self.purchase.yoco_reference), ('ch_1', 'ref'))
+        transition = self.purchase.payment_transitions.get()
+        self.assertEqual((transition.from_status, transition.to_status, transition.idempotency_key),
+                         ('pending', 'completed', 'evt_1'))
+
+    def test_retried_callback_is_applied_once(self):
+        self.callback('processing', yoco_payment_id='ch_1')
+        paid_at = self.callback('completed', key='evt_2').data['paid_at']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.callback('completed', key='evt_2')
+        self.assertEqual(response.data['paid_at'], paid_at)
+        self.assertFalse([query for query in queries if query['sql'].startswith(('UPDATE', 'INSERT'))])
+        # A late duplicate of the first (keyless) callback cannot move the purchase back
+        self.assertEqual(self.callback('processing', yoco_payment_id='ch_1').status_code, 409)
+        self.assertEqual(list(self.purchase.payment_transitions.values_list('to_status', flat=True)),
+                         ['processing', 'completed'])
+
+    def test_failed_payment_can_be_retried_without_keys(self):
+        for payment_status in ('processing', 'failed', 'processing', 'completed'):
+            response = self.callback(payment_status, yoco_payment_id='ch_1')
+            self.assertEqual((response.status_code, response.data['payment_status']), (200, payment_status))
+        self.assertEqual(list(self.purchase.payment_transitions.values_list('from_status', 'to_status')), [
+            ('pending', 'processing'), ('processing', 'failed'), ('failed', 'processing'), ('processing', 'completed'),
+        ])
+
+    def test_final_status_is_not_regressed(self):
+        self.callback('completed', key='evt_1')
+        response = self.callback('pending', key='evt_0')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['payment_status'], 'completed')
+        self.purchase.refresh_from_db()
+        self.assertEqual(self.purchase.payment_status, 'completed')
+
+    def test_concurrent_change_is_not_overwritten(self):
+        # Another callback completes the purchase between the read and the conditional UPDATE
+        original = QuerySet.update
+
+        def racing_update(queryset, **values):
+            QuerySet.update = original
+            Purchase.objects.filter(pk=self.purchase.pk).update(payment_status='completed')
+            return original(queryset, **values)
+
+        with mock.patch.object(QuerySet, 'update', racing_update):
+            self.assertEqual(self.callback('failed', key='evt_late').status_code, 409)
+        self.purchase.refresh_from_db()
+        self.assertEqual(self.purchase.payment_status, 'completed')
+        self.assertFalse(self.purchase.payment_transitions.exists())
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.callback('refunded').status_code, 400)
+        missing = reverse('purchase-update-payment-status', args=[self.purchase.pk + 1])
+        self.assertEqual(self.client.post(missing, {'payment_status': 'completed'}, format='json').status_code, 404)
@@ -0,0 +1,70 @@
+"""
+Rate limits for the public submission endpoints (contacts, quotes, purchases).
+
+Counters live in the default cache, which must be shared by every worker
+(database, Redis, Memcached): with the per-process locmem default each worker
+would enforce its own limit. Outside DEBUG that combination is reported by
+the core.W001 system check and fails `manage.py check --deploy` (core.E001).
+"""
+import time
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from .metrics import throttled_total
+
+
+class WindowRateThrottle(SimpleRateThrottle):
+    """
+    Fixed-window counter: one cache.add/cache.incr per request instead of the
+    read-modify-write request history SimpleRateThrottle keeps, which loses
+    updates under concurrency and grows with the rate. Only creates are
+    limited; reads and admin updates pass through.
+    """
+
+    def get_rate(self):
+        # Read at request time (the base class binds the rates at import), None disables the scope
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def allow_request(self, request, view):
+        if self.rate is None or getattr(view, 'action', None) != 'create':
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        key = f'{self.key}:{window}'
+        self.cache.add(key, 0, self.duration)
+        try:
+            count = self.cache.incr(key)
+        except ValueError:  # evicted between add and incr
+            self.cache.add(key, 1, self.duration)
+            count = 1
+        self.window_end = (window + 1) * self.duration
+        if count > self.num_requests:
+            throttled_total.inc(scope=self.scope)
+            return False
+        return True
+
+    def wait(self):
+        return max(0, self.window_end - self.now)
+
+    def timer(self):
+        return time.time()
+
+
+class SubmissionIPThrottle(WindowRateThrottle):
+    """Submissions per client IP (REST_FRAMEWORK['NUM_PROXIES'] decides which address)"""
+    scope = 'submissions_ip'
+
+    def get_cache_key(self, request, view):
+        return f'throttle:{self.scope}:{self.get_ident(request)}'
+
+
+class SubmissionGlobalThrottle(WindowRateThrottle):
+    """Submissions across all clients, protecting the database from spikes"""
+    scope = 'submissions_global'
+
+    def get_cache_key(self, request, view):
+        return f'throttle:{self.scope}'
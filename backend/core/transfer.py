@@ -0,0 +1,280 @@
+"""
+Streaming export and import of the house plan catalog.
+
+Each plan is one record carrying its floors, features, amenities and gallery
+image references, written as newline-delimited JSON or CSV (one row per
+plan, nested lists JSON-encoded in their own columns). Images are exported
+as storage names, not files: copy the media bucket separately, or run
+`manage.py generate_image_derivatives --force` when the target storage does
+not already hold the derivatives.
+
+Imports match plans by name and children by their natural key within the
+plan (floor level, feature/amenity name, image name), and write in batches
+with bulk_create/bulk_update. Signals do not run, so the denormalized plan
+fields are recomputed per batch and the catalog version is bumped once.
+"""
+import csv
+import datetime
+import json
+import sys
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.utils import timezone
+
+from .bulk import explicit_timestamps, insert_rows
+from .cache import bump_catalog_version
+from .models import HousePlan, Floor, Feature, Amenity, HousePlanImage, build_search_document
+
+FORMATS = ('ndjson', 'csv')
+
+
+def data_fields(model, *extra):
+    """Editable columns of a catalog model, minus the primary key and parent FK"""
+    fields = [field for field in model._meta.concrete_fields
+              if (field.editable or field.name in extra) and not field.primary_key
+              and field.name != 'house_plan']
+    return {field.name: field for field in fields}
+
+
+PLAN_FIELDS = data_fields(HousePlan, 'image_variants', 'created_at')
+# record key -> (model, related_name, natural key field, fields)
+CHILDREN = {
+    'floors': (Floor, 'floors', 'level', data_fields(Floor)),
+    'features': (Feature, 'features', 'name', data_fields(Feature)),
+    'amenities': (Amenity, 'amenities', 'name', data_fields(Amenity)),
+    'images': (HousePlanImage, 'plan_images', 'image', data_fields(HousePlanImage, 'image_variants')),
+}
+CSV_COLUMNS = [*PLAN_FIELDS, *CHILDREN]
+
+
+class CatalogImportError(Exception):
+    """A record that cannot be imported"""
+
+    def __init__(self, number, message):
+        super().__init__(f"Record {number}: {message}")
+
+
+class CatalogJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder, keeping full microsecond precision so timestamps round-trip unchanged"""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def export_records(chunk_size=1000):
+    """
+    Yield one record per plan in pk order. Plans are streamed with
+    .values().iterator(); the children of each chunk of plans are fetched with
+    one query per child table, so memory stays bounded by chunk_size.
+    """
+    plans = HousePlan.objects.order_by('pk').values('pk', *PLAN_FIELDS).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(plans, chunk_size))
+        if not chunk:
+            return
+        children = {row['pk']: {key: [] for key in CHILDREN} for row in chunk}
+        for key, (model, _, _, fields) in CHILDREN.items():
+            rows = model.objects.filter(house_plan_id__in=children).values('house_plan_id', *fields)
+            for row in rows.iterator(chunk_size=chunk_size * 4):
+                children[row.pop('house_plan_id')][key].append(row)
+        for row in chunk:
+            yield {**row, **children.pop(row.pop('pk'))}
+
+
+def write_records(records, stream, fmt='ndjson'):
+    """Write records to a text stream; returns the number written"""
+    count = 0
+    if fmt == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        for record in records:
+            writer.writerow({column: csv_value(record[column]) for column in CSV_COLUMNS})
+            count += 1
+        return count
+    for record in records:
+        stream.write(json.dumps(record, cls=CatalogJSONEncoder, ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+
+def csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, cls=CatalogJSONEncoder, ensure_ascii=False)
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return CatalogJSONEncoder().default(value)  # Decimal, datetime
+
+
+def read_records(stream, fmt='ndjson'):
+    """Yield records from a text stream, one at a time"""
+    if fmt == 'csv':
+        # Descriptions and JSON-encoded child lists can exceed the 128 KiB default
+        csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+        for row in csv.DictReader(stream):
+            for key in CHILDREN:
+                row[key] = json.loads(row[key]) if row.get(key) else []
+            yield row
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def clean_values(fields, data):
+    """Convert the exported (or CSV text) values of the fields present in data"""
+    values = {}
+    for name, field in fields.items():
+        if name not in data:
+            continue
+        value = data[name]
+        if value == '' and field.null:
+            value = None
+        elif isinstance(field, models.JSONField) and isinstance(value, str):
+            value = json.loads(value) if value else field.get_default()
+        elif value is None and not field.null:
+            value = '' if isinstance(field, (models.CharField, models.TextField, models.FileField)) else field.get_default()
+        values[name] = field.to_python(value)
+    return values
+
+
+def current_value(obj, name):
+    value = getattr(obj, name)
+    return value.name if isinstance(value, models.fields.files.FieldFile) else value
+
+
+def same_value(a, b):
+    # CSV cannot tell an empty string from NULL, so neither counts as a change
+    return a == b or (a in (None, '') and b in (None, ''))
+
+
+def apply_values(obj, values):
+    """Set values on obj; returns the names of the fields that changed"""
+    changed = []
+    for name, value in values.items():
+        if not same_value(current_value(obj, name), value):
+            setattr(obj, name, value)
+            changed.append(name)
+    return changed
+
+
+def import_records(records, batch_size=1000, prune=False):
+    """
+    Create or update plans (matched by name) and their children from records.
+    With prune, children of imported plans that are not in their record are
+    deleted. Returns counts per outcome.
+    """
+    stats = dict.fromkeys(['created', 'updated', 'unchanged', 'children_created', 'children_updated',
+                           'children_deleted'], 0)
+    records = iter(records)
+    number = 0
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        with transaction.atomic():
+            import_batch(batch, number, stats, prune)
+        number += len(batch)
+    if any(stats[key] for key in stats if key != 'unchanged'):
+        bump_catalog_version()
+    return stats
+
+
+def import_batch(batch, offset, stats, prune):
+    now = timezone.now()
+    # Later records with the same name replace earlier ones
+    by_name = {}
+    for number, record in enumerate(batch, offset + 1):
+        if not record.get('name'):
+            raise CatalogImportError(number, "missing plan name")
+        try:
+            values = clean_values(PLAN_FIELDS, record)
+            children = {
+                key: [clean_values(fields, child) for child in record.get(key) or []]
+                for key, (_, _, _, fields) in CHILDREN.items()
+            }
+        except (ValidationError, ValueError, TypeError) as exc:
+            raise CatalogImportError(number, exc) from exc
+        by_name[values['name']] = (number, values, children)
+
+    existing = {}
+    for plan in HousePlan.objects.filter(name__in=by_name).order_by('-pk').defer('search_document'):
+        existing[plan.name] = plan  # lowest pk wins when names repeat
+
+    new_plans, changed_plans, changed_fields = [], [], set()
+    for name, (_, values, children) in by_name.items():
+        plan = existing.get(name)
+        if plan is None:
+            plan = HousePlan(**values)
+            plan.created_at = values.get('created_at') or now
+            plan.updated_at = now
+            # Complete from the record alone; matched plans are refreshed below
+            plan.search_document = build_search_document(
+                plan.name, plan.description,
+                [Feature(**child) for child in children['features']] + [Amenity(**child) for child in children['amenities']],
+            )
+            new_plans.append(plan)
+            existing[name] = plan
+            continue
+        changed = apply_values(plan, values)
+        if changed:
+            plan.updated_at = now
+            changed_fields.update(changed)
+            changed_plans.append(plan)
+    with explicit_timestamps(HousePlan):
+        HousePlan.objects.bulk_create(new_plans)
+    if changed_plans:
+        HousePlan.objects.bulk_update(changed_plans, [*changed_fields, 'updated_at'])
+    stats['created'] += len(new_plans)
+    stats['updated'] += len(changed_plans)
+    stats['unchanged'] += len(by_name) - len(new_plans) - len(changed_plans)
+
+    plans = {name: existing[name] for name in by_name}
+    touched = {plan.pk for plan in [*new_plans, *changed_plans]}
+    new_ids = {plan.pk for plan in new_plans}
+    matched_ids = [plan.pk for plan in plans.values() if plan.pk not in new_ids]
+    for key, (model, _, natural_key, fields) in CHILDREN.items():
+        current = {}
+        for child in model.objects.filter(house_plan_id__in=matched_ids).order_by('pk'):
+            current.setdefault((child.house_plan_id, current_value(child, natural_key)), []).append(child)
+        to_create, to_update, update_fields = [], [], set()
+        for name, (_, _, children) in by_name.items():
+            plan_id = plans[name].pk
+            for values in children[key]:
+                matches = current.get((plan_id, values.get(natural_key)))
+                if matches:
+                    child = matches.pop(0)
+                    changed = apply_values(child, values)
+                    if changed:
+                        update_fields.update(changed)
+                        to_update.append(child)
+                        touched.add(plan_id)
+                else:
+                    to_create.append(model(house_plan_id=plan_id, **values))
+                    touched.add(plan_id)
+        insert_rows(model, to_create)
+        if to_update:
+            model.objects.bulk_update(to_update, list(update_fields), batch_size=1000)
+        stats['children_created'] += len(to_create)
+        stats['children_updated'] += len(to_update)
+        if prune:
+            leftover = [child for matches in current.values() for child in matches]
+            if leftover:
+                model.objects.filter(pk__in=[child.pk for child in leftover]).delete()
+                stats['children_deleted'] += len(leftover)
+                touched.update(child.house_plan_id for child in leftover)
+
+    # Plans whose record matched the database exactly keep their updated_at
+    if touched:
+        HousePlan.objects.filter(pk__in=touched).refresh_aggregates()
+        HousePlan.objects.filter(pk__in=touched - new_ids).refresh_search_documents()
+    # Plans changed only through their children count as updated too
+    children_only = len(touched) - len(new_plans) - len(changed_plans)
+    stats['updated'] += children_only
+    stats['unchanged'] -= children_only
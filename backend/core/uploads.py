@@ -0,0 +1,144 @@
+"""
+Direct-to-bucket multipart uploads.
+
+The browser asks for presigned UploadPart URLs, PUTs the file parts straight
+to S3, completes the upload, and only the resulting object key is saved onto
+the model. Image bytes never pass through the Django process.
+"""
+import math
+import os
+import uuid
+
+from django.conf import settings
+from django.utils.text import get_valid_filename
+from storages.utils import clean_name
+
+from .events import emit
+from .metrics import upload_size_bytes
+from .models import HousePlanImage
+from .storage import get_storage
+
+UPLOAD_PREFIX = 'plans/'
+# S3 rejects multipart parts below 5 MiB (except the last) and more than 10,000 parts
+MIN_PART_SIZE = 5 * 1024 * 1024
+MAX_PARTS = 10000
+# Keys end up in HousePlanImage.image and the key fields of the upload serializers
+MAX_NAME_LENGTH = HousePlanImage._meta.get_field('image').max_length
+
+
+class DirectUploadError(Exception):
+    """Invalid direct upload request, or the bucket rejected it"""
+
+
+def bucket_client():
+    """(storage, boto3 client) for the media bucket"""
+    storage = get_storage()
+    if not hasattr(storage, 'bucket_name'):
+        raise DirectUploadError("Direct uploads require S3 media storage (USE_S3=True).")
+    return storage, storage.connection.meta.client
+
+
+def object_key(storage, name):
+    """Bucket key for a storage name (applies AWS_LOCATION)"""
+    return storage._normalize_name(clean_name(name))
+
+
+def call_s3(method, **params):
+    from botocore.exceptions import ClientError
+    try:
+        return method(**params)
+    except ClientError as exc:
+        raise DirectUploadError(exc.response.get('Error', {}).get('Message') or str(exc)) from exc
+
+
+def check_upload_name(name):
+    if not name.startswith(UPLOAD_PREFIX) or '..' in name:
+        raise DirectUploadError(f"Uploads must be stored under {UPLOAD_PREFIX}.")
+
+
+def upload_name(filename):
+    """
+    Storage name for a new upload: a unique directory plus the sanitized
+    basename, shortened (keeping the extension) to fit the image field.
+    """
+    prefix = f"{UPLOAD_PREFIX}{uuid.uuid4().hex}/"
+    basename = get_valid_filename(os.path.basename(filename))
+    room = MAX_NAME_LENGTH - len(prefix)
+    if len(basename) > room:
+        stem, extension = os.path.splitext(basename)
+        extension = extension[:room // 2]
+        basename = stem[:room - len(extension)] + extension
+    return prefix + basename
+
+
+def start_upload(filename, content_type, size):
+    """
+    Create a multipart upload and presign one PUT URL per part.
+    Returns {'key', 'upload_id', 'part_size', 'parts': [{'part_number', 'url'}]}.
+    """
+    if content_type not in settings.DIRECT_UPLOAD_CONTENT_TYPES:
+        raise DirectUploadError(f"Unsupported content type: {content_type}")
+    if size > settings.DIRECT_UPLOAD_MAX_SIZE:
+        raise DirectUploadError(f"File exceeds the {settings.DIRECT_UPLOAD_MAX_SIZE} byte upload limit.")
+    part_size = max(settings.DIRECT_UPLOAD_PART_SIZE, MIN_PART_SIZE, math.ceil(size / MAX_PARTS))
+    part_count = max(1, math.ceil(size / part_size))
+
+    storage, client = bucket_client()
+    name = upload_name(filename)
+    key = object_key(storage, name)
+    upload = call_s3(client.create_multipart_upload, Bucket=storage.bucket_name, Key=key, ContentType=content_type)
+    parts = [
+        {
+            'part_number': number,
+            'url': client.generate_presigned_url(
+                'upload_part',
+                Params={'Bucket': storage.bucket_name, 'Key': key, 'UploadId': upload['UploadId'], 'PartNumber': number},
+                ExpiresIn=settings.DIRECT_UPLOAD_URL_EXPIRY,
+            ),
+        }
+        for number in range(1, part_count + 1)
+    ]
+    return {'key': name, 'upload_id': upload['UploadId'], 'part_size': part_size, 'parts': parts}
+
+
+def complete_upload(name, upload_id, parts):
+    """Assemble the uploaded parts ([{'part_number', 'etag'}]) into the final object"""
+    check_upload_name(name)
+    storage, client = bucket_client()
+    call_s3(
+        client.complete_multipart_upload,
+        Bucket=storage.bucket_name,
+        Key=object_key(storage, name),
+        UploadId=upload_id,
+        MultipartUpload={'Parts': [
+            {'PartNumber': part['part_number'], 'ETag': part['etag']}
+            for part in sorted(parts, key=lambda part: part['part_number'])
+        ]},
+    )
+    upload = verify_upload(name)
+    upload_size_bytes.observe(upload['size'], backend='direct', model='')
+    emit('upload.completed', name=name, size=upload['size'], parts=len(parts), backend='direct')
+    return upload
+
+
+def abort_upload(name, upload_id):
+    """Discard an unfinished upload so its parts stop accruing storage"""
+    check_upload_name(name)
+    storage, client = bucket_client()
+    call_s3(client.abort_multipart_upload, Bucket=storage.bucket_name, Key=object_key(storage, name), UploadId=upload_id)
+
+
+def verify_upload(name):
+    """
+    Check that a completed upload exists and is an accepted image before its
+    key is saved onto a model. Returns {'key', 'size', 'content_type'}.
+    """
+    check_upload_name(name)
+    storage, client = bucket_client()
+    head = call_s3(client.head_object, Bucket=storage.bucket_name, Key=object_key(storage, name))
+    content_type = head.get('ContentType', '')
+    if content_type not in settings.DIRECT_UPLOAD_CONTENT_TYPES:
+        raise DirectUploadError(f"Unsupported content type: {content_type}")
+    if head['ContentLength'] > settings.DIRECT_UPLOAD_MAX_SIZE:
+        raise DirectUploadError(f"File exceeds the {settings.DIRECT_UPLOAD_MAX_SIZE} byte upload limit.")
+    return {'key': name, 'size': head['ContentLength'], 'content_type': content_type}
@@ -10,7 +10,9 @@ router.register(r'plans', views.HousePlanViewSet, basename='houseplan')
 router.register(r'contacts', views.ContactViewSet, basename='contact')
 router.register(r'quotes', views.QuoteViewSet, basename='quote')
 router.register(r'purchases', views.PurchaseViewSet, basename='purchase')
+router.register(r'uploads', views.DirectUploadViewSet, basename='direct-upload')
 urlpatterns = [
     path('', include(router.urls)),
     path('settings/', views.get_site_settings, name='site-settings'),
+    path('home/', views.get_home, name='home'),
 ]
\ No newline at end of file
@@ -1,64 +1,193 @@
 """
 Core app views
 """
+import secrets
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import require_GET
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from .models import HousePlan, BuiltHome, Contact, Quote, Purchase, SiteSettings
 from . import serializers
+from .cache import cache_catalog_response
+from .conditional import plan_list_condition, plan_detail_condition, site_settings_condition, home_condition
+from .filters import HousePlanFilter, plan_facets
+from .intake import spool_submission
+from .metrics import intake_submissions_total, render_prometheus
+from .pagination import HousePlanCursorPagination, HousePlanRankedListPagination, HousePlanSearchPagination
+from .payments import PAYMENT_STATUSES, PaymentTransitionError, apply_payment_status
+from .search import SEARCH_PARAM, HousePlanSearchFilter
+from .throttling import SubmissionGlobalThrottle, SubmissionIPThrottle
+from .uploads import DirectUploadError, abort_upload, complete_upload, start_upload
+
+
+EMPTY_SITE_SETTINGS = {
+    'youtube_link': None,
+    'company_phone': None,
+    'company_email': None,
+    'company_address': None,
+    'about_text': None
+}
+
+
+def site_settings_data():
+    """Serialized site settings, or empty values when none are configured"""
+    site_settings = SiteSettings.load()
+    if site_settings:
+        return serializers.SiteSettingsSerializer(site_settings).data
+    return dict(EMPTY_SITE_SETTINGS)
 
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
+@site_settings_condition
+@cache_catalog_response
 def get_site_settings(request):
     """Endpoint to get site settings (public access)"""
     try:
-        settings = SiteSettings.objects.first()
-        if settings:
-            serializer = serializers.SiteSettingsSerializer(settings)
-            return Response(serializer.data)
+        return Response(site_settings_data())
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+@home_condition
+@cache_catalog_response
+def get_home(request):
+    """Homepage payload: site settings plus popular and best-selling plan cards (public access)"""
+    try:
+        limit = settings.HOME_SECTION_LIMIT
+        plans = HousePlan.objects.with_details({'plan_images'}).defer('description', 'search_document')
+        context = {'request': request}
+        popular = plans.filter(is_popular=True)[:limit]
+        best_selling = plans.filter(is_best_selling=True)[:limit]
         return Response({
-            'youtube_link': None,
-            'company_phone': None,
-            'company_email': None,
-            'company_address': None,
-            'about_text': None
+            'settings': site_settings_data(),
+            'popular': serializers.HousePlanCardSerializer(popular, many=True, context=context).data,
+            'best_selling': serializers.HousePlanCardSerializer(best_selling, many=True, context=context).data,
         })
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@method_decorator([plan_list_condition, cache_catalog_response], name='list')
+@method_decorator([plan_detail_condition, cache_catalog_response], name='retrieve')
+@method_decorator([plan_list_condition, cache_catalog_response], name='search')
 class HousePlanViewSet(viewsets.ReadOnlyModelViewSet):
-    """ViewSet for viewing house plans"""
-    queryset = HousePlan.objects.all()
+    """
+    ViewSet for viewing house plans.
+    List responses use the compact summary representation; nested
+    collections can be requested with ?expand= and trimmed with ?fields=.
+    Passing ?page_size= or ?cursor= switches the list to cursor pagination.
+    /plans/search/ filters in the database and returns facet counts.
+    ?search= runs a ranked full-text search (see core.search); paginated
+    searches are paged by number so the rank order is kept.
+    GET responses are cached until the catalog changes (see core.cache) and
+    carry ETag/Last-Modified validators (see core.conditional).
+    """
+    # search_document is only ever filtered on, never rendered
+    queryset = HousePlan.objects.defer('search_document')
     serializer_class = serializers.HousePlanSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = HousePlanCursorPagination
+    filter_backends = [DjangoFilterBackend, HousePlanSearchFilter]
     filterset_fields = ['is_popular', 'bedrooms', 'display_on']
-    search_fields = ['name', 'description']
     ordering_fields = ['price', 'created_at']
 
+    summary_actions = ('list', 'search')
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.action == 'list' \
+                and self.request.query_params.get(SEARCH_PARAM, '').strip():
+            self._paginator = HousePlanRankedListPagination()
+        return super().paginator
+
+    def get_serializer_class(self):
+        if self.action in self.summary_actions:
+            return serializers.HousePlanSummarySerializer
+        return serializers.HousePlanSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in self.summary_actions:
+            return queryset.with_details()
+        expand = self.get_serializer_class().requested_expansions(self.request)
+        queryset = queryset.with_details(expand & HousePlan.DETAIL_RELATIONS)
+        if 'description' not in expand:
+            queryset = queryset.defer('description')
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Faceted plan search: one page of results plus facet counts"""
+        queryset = HousePlanSearchFilter().filter_queryset(request, self.get_queryset(), self)
+        filterset = HousePlanFilter(request.query_params, queryset=queryset, request=request)
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = filterset.qs
+        paginator = HousePlanSearchPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return Response({
+            'count': paginator.page.paginator.count,
+            'page': paginator.page.number,
+            'num_pages': paginator.page.paginator.num_pages,
+            'results': serializer.data,
+            'facets': plan_facets(filterset),
+        })
+
+
+class SubmissionIntakeMixin:
+    """
+    Public create endpoint: per-IP and global throttles, and with
+    buffered_intake + INTAKE_BUFFERED the validated submission is spooled
+    (core.intake) and answered with 202 instead of being inserted in the request.
+    """
+    throttle_classes = [SubmissionIPThrottle, SubmissionGlobalThrottle]
+    buffered_intake = False
+
+    def create(self, request, *args, **kwargs):
+        label = self.queryset.model._meta.label_lower
+        if not (self.buffered_intake and settings.INTAKE_BUFFERED):
+            response = super().create(request, *args, **kwargs)
+            intake_submissions_total.inc(model=label, mode='direct')
+            return response
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        intake_id = spool_submission(serializer)
+        return Response({'status': 'accepted', 'intake_id': intake_id}, status=status.HTTP_202_ACCEPTED)
 
-class ContactViewSet(viewsets.ModelViewSet):
+
+class ContactViewSet(SubmissionIntakeMixin, viewsets.ModelViewSet):
     """ViewSet for contact messages"""
     queryset = Contact.objects.all()
     serializer_class = serializers.ContactSerializer
     permission_classes = [permissions.AllowAny]
+    buffered_intake = True
 
     def perform_create(self, serializer):
         serializer.save()
 
 
-class QuoteViewSet(viewsets.ModelViewSet):
+class QuoteViewSet(SubmissionIntakeMixin, viewsets.ModelViewSet):
     """ViewSet for quote requests"""
     queryset = Quote.objects.all()
     serializer_class = serializers.QuoteSerializer
     permission_classes = [permissions.AllowAny]
+    buffered_intake = True
 
     def perform_create(self, serializer):
         serializer.save()
 
-class PurchaseViewSet(viewsets.ModelViewSet):
-    """ViewSet for purchases and payments"""
+class PurchaseViewSet(SubmissionIntakeMixin, viewsets.ModelViewSet):
+    """ViewSet for purchases and payments (never buffered: the payment flow needs the id)"""
     queryset = Purchase.objects.all()
     serializer_class = serializers.PurchaseSerializer
     permission_classes = [permissions.AllowAny]
@@ -71,24 +200,80 @@ class PurchaseViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'], permission_classes=[permissions.AllowAny])
     def update_payment_status(self, request, pk=None):
-        """Endpoint to update payment status from Yoco"""
-        purchase = self.get_object()
+        """
+        Endpoint to update payment status from Yoco. Retries are deduplicated
+        by the Idempotency-Key header (or idempotency_key field) when sent;
+        disallowed changes get 409.
+        """
         payment_status = request.data.get('payment_status')
-        yoco_payment_id = request.data.get('yoco_payment_id')
-        yoco_reference = request.data.get('yoco_reference')
-        
-        if payment_status:
-            purchase.payment_status = payment_status
-        if yoco_payment_id:
-            purchase.yoco_payment_id = yoco_payment_id
-        if yoco_reference:
-            purchase.yoco_reference = yoco_reference
-        
-        if payment_status == 'completed':
-            from django.utils import timezone
-            purchase.paid_at = timezone.now()
-        
-        purchase.save()
-        
-        serializer = self.get_serializer(purchase)
-        return Response(serializer.data)
\ No newline at end of file
+        if payment_status not in PAYMENT_STATUSES:
+            return Response({'payment_status': ['A valid payment status is required.']},
+                            status=status.HTTP_400_BAD_REQUEST)
+        key = request.headers.get('Idempotency-Key') or request.data.get('idempotency_key')
+        try:
+            apply_payment_status(pk, payment_status, str(key)[:200] if key else None,
+                                 yoco_payment_id=request.data.get('yoco_payment_id'),
+                                 yoco_reference=request.data.get('yoco_reference'))
+        except (Purchase.DoesNotExist, ValueError):
+            raise Http404
+        except PaymentTransitionError as exc:
+            return Response({'detail': str(exc), 'payment_status': exc.current}, status=status.HTTP_409_CONFLICT)
+
+        serializer = self.get_serializer(self.get_object())
+        return Response(serializer.data)
+
+
+class DirectUploadViewSet(viewsets.ViewSet):
+    """
+    Presigned multipart uploads straight to the media bucket (staff only).
+
+    POST uploads/           {filename, content_type, size} -> key, upload_id, part URLs
+    POST uploads/complete/  {key, upload_id, parts: [{part_number, etag}]}
+    POST uploads/abort/     {key, upload_id}
+    POST uploads/confirm/   {key, house_plan, title, order} -> gallery image
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def run(self, serializer_class, request, operation):
+        serializer = serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            return operation(serializer.validated_data)
+        except DirectUploadError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    def create(self, request):
+        return self.run(serializers.DirectUploadStartSerializer, request, lambda data: Response(
+            start_upload(data['filename'], data['content_type'], data['size']), status=status.HTTP_201_CREATED,
+        ))
+
+    @action(detail=False, methods=['post'])
+    def complete(self, request):
+        return self.run(serializers.DirectUploadCompleteSerializer, request, lambda data: Response(
+            complete_upload(data['key'], data['upload_id'], data['parts']),
+        ))
+
+    @action(detail=False, methods=['post'])
+    def abort(self, request):
+        def abort(data):
+            abort_upload(data['key'], data['upload_id'])
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return self.run(serializers.DirectUploadAbortSerializer, request, abort)
+
+    @action(detail=False, methods=['post'])
+    def confirm(self, request):
+        serializer = serializers.DirectUploadConfirmSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        image = serializer.save()
+        data = serializers.HousePlanImageSerializer(image, context={'request': request}).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
+
+@require_GET
+def metrics(request):
+    """Prometheus scrape endpoint for the in-process metrics (METRICS_TOKEN or METRICS_ALLOWED_IPS only)"""
+    token = settings.METRICS_TOKEN
+    has_token = bool(token) and secrets.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    if not has_token and request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
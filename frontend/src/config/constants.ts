@@ -11,11 +11,19 @@ export const BACKEND_URL = import.meta.env.VITE_BACKEND_URL || '';
 export const FRONTEND_URL = import.meta.env.VITE_FRONTEND_URL || '';
 export const ADMIN_URL = import.meta.env.VITE_ADMIN_URL || '';
 
+// VITE_API_HOME (optional): aggregated homepage endpoint (/api/core/home/). Defaults to the
+// sibling of VITE_API_SETTINGS; when neither is usable the homepage falls back to fetching
+// settings and plans separately.
+const API_SETTINGS = import.meta.env.VITE_API_SETTINGS || '';
+const API_HOME = import.meta.env.VITE_API_HOME
+  || (/settings\/?$/.test(API_SETTINGS) ? API_SETTINGS.replace(/settings\/?$/, 'home/') : '');
+
 // API Endpoints
 export const API_ENDPOINTS = {
   PLANS: import.meta.env.VITE_API_PLANS || '',
   PLAN_DETAIL: (id: string | number) => import.meta.env.VITE_API_PLAN_DETAIL ? import.meta.env.VITE_API_PLAN_DETAIL.replace(':id', String(id)) : '',
-  SETTINGS: import.meta.env.VITE_API_SETTINGS || '',
+  SETTINGS: API_SETTINGS,
+  HOME: API_HOME,
   CONTACTS: import.meta.env.VITE_API_CONTACTS || '',
   QUOTES: import.meta.env.VITE_API_QUOTES || '',
   PURCHASES: import.meta.env.VITE_API_PURCHASES || '',
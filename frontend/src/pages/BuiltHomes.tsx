@@ -494,7 +494,7 @@ export const BuiltHomes = () => {
     const fetchBuiltHomes = async () => {
       try {
         setLoading(true);
-        const response = await fetch(`${API_ENDPOINTS.PLANS}?display_on=built-homes`);
+        const response = await fetch(`${API_ENDPOINTS.PLANS}?display_on=built-homes&expand=description,video_url,features,amenities,plan_images`);
         const data = await response.json();
         
         // Handle both paginated and non-paginated responses
@@ -97,7 +97,7 @@ export const HouseDetails = () => {
             bathrooms: Math.round(planData.bathrooms),
             garage: planData.garage || 2,
             floorArea: planData.square_feet,
-            levels: planData.floors?.length || 2,
+            levels: planData.floor_count || 2,
             width: planData.width || 30,
             depth: planData.depth || 40,
             style: ['Modern'],
@@ -108,8 +108,8 @@ export const HouseDetails = () => {
             features: planData.features?.map((f: any) => f.name) || ['Quality Build'],
             videoUrl: planData.video_url || '',
             enSuite: 1,
-            lounges: planData.floors?.reduce((sum: number, f: any) => sum + (f.lounges || 0), 0) || 1,
-            diningAreas: planData.floors?.reduce((sum: number, f: any) => sum + (f.dining_areas || 0), 0) || 1,
+            lounges: planData.total_lounges || 1,
+            diningAreas: planData.total_dining_areas || 1,
             garageParking: planData.garage || 1,
             coveredParking: 2,
             petFriendly: planData.pet_friendly || false,
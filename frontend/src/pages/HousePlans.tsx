@@ -575,7 +575,8 @@ export const HousePlans = () => {
     const fetchPlans = async () => {
       try {
         console.log('Fetching house plans from API');
-        const response = await fetch(`${API_ENDPOINTS.PLANS}?display_on=house-plans`);
+        // Card fields only (floor totals are on the summary); the details page loads the full plan
+        const response = await fetch(`${API_ENDPOINTS.PLANS}?display_on=house-plans&expand=video_url,plan_images`);
         const data = await response.json();
         console.log('API Response:', data);
         
@@ -607,24 +608,20 @@ export const HousePlans = () => {
               bathrooms: Math.round(plan.bathrooms),
               garage: plan.garage || 2,
               floorArea: plan.square_feet,
-              levels: plan.floors?.length || 2,
+              levels: plan.floor_count || 2,
               width: plan.width || 30,
               depth: plan.depth || 40,
               style: ['Modern'],
               isNew: plan.is_new || false,
               isPopular: plan.is_popular || false,
               images: images,
-              description: plan.description || '',
-              features: plan.features?.map((f: any) => f.name) || ['Quality Build'],
               videoUrl: plan.video_url || 'https://www.youtube.com/embed/ciXvD_-rtts',
               enSuite: 1,
-              lounges: plan.floors?.reduce((sum: number, f: any) => sum + (f.lounges || 0), 0) || 1,
-              diningAreas: plan.floors?.reduce((sum: number, f: any) => sum + (f.dining_areas || 0), 0) || 1,
+              lounges: plan.total_lounges || 1,
+              diningAreas: plan.total_dining_areas || 1,
               garageParking: plan.garage || 1,
               coveredParking: 2,
               petFriendly: plan.pet_friendly || false,
-              amenities: plan.amenities?.map((a: any) => a.name) || ['Built in cupboards'],
-              floors: plan.floors || [],
             };
           });
           console.log('Transformed Plans:', transformedPlans);
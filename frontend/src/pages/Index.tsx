@@ -124,25 +124,40 @@ const Index = () => {
   const [popularPlans, setPopularPlans] = useState<any[]>([]);
   const [bestSellingPlans, setBestSellingPlans] = useState<any[]>([]);
 
+  // Site settings plus the popular and best-selling plans
+  const fetchHomeData = async () => {
+    if (API_ENDPOINTS.HOME) {
+      // One request for settings and both homepage sections
+      const homeResponse = await fetch(API_ENDPOINTS.HOME);
+      return homeResponse.json();
+    }
+
+    // No home endpoint configured: fetch settings and the catalog separately
+    const settingsResponse = await fetch(API_ENDPOINTS.SETTINGS);
+    const settings = await settingsResponse.json();
+    const plansResponse = await fetch(`${API_ENDPOINTS.PLANS}?expand=plan_images`);
+    const plansData = await plansResponse.json();
+    const plans = Array.isArray(plansData) ? plansData : plansData.results || [];
+    return {
+      settings,
+      popular: plans.filter((plan: any) => plan.is_popular),
+      best_selling: plans.filter((plan: any) => plan.is_best_selling),
+    };
+  };
+
   // Fetch site settings and house plans from backend
   useEffect(() => {
     const fetchData = async () => {
       try {
-        // Fetch site settings
-        const settingsResponse = await fetch(API_ENDPOINTS.SETTINGS);
-        const settingsData = await settingsResponse.json();
+        const homeData = await fetchHomeData();
+        const settingsData = homeData.settings || {};
         
         if (settingsData.youtube_link) {
           setYoutubeLink(settingsData.youtube_link);
         }
 
-        // Fetch all house plans
-        const plansResponse = await fetch(API_ENDPOINTS.PLANS);
-        const plansData = await plansResponse.json();
-
-        // Filter and transform popular plans
-        const popular = plansData
-          .filter((plan: any) => plan.is_popular)
+        // Transform popular plans
+        const popular = (homeData.popular || [])
           .map((plan: any) => ({
             image: plan.image_url || plan.plan_images?.[0]?.image_url || '/placeholder.jpg',
             title: plan.name,
@@ -153,9 +168,8 @@ const Index = () => {
             id: plan.id
           }));
 
-        // Filter and transform best-selling plans
-        const bestSelling = plansData
-          .filter((plan: any) => plan.is_best_selling)
+        // Transform best-selling plans
+        const bestSelling = (homeData.best_selling || [])
           .map((plan: any) => ({
             image: plan.image_url || plan.plan_images?.[0]?.image_url || '/placeholder.jpg',
             title: plan.name,